@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     AotdUserData, Album, DailyAlbum, Review, ReviewHistory,
-    UserAlbumOutage, UserChanceCache, GlobalTag, AlbumTag
+    UserAlbumOutage, UserChanceCache, GlobalTag, AlbumTag, MonthlyReviewStats,
+    AlbumBackfillCheckpoint
 )
 
 
@@ -63,6 +64,13 @@ class UserChanceCacheAdmin(admin.ModelAdmin):
     readonly_fields = ('last_updated',)
 
 
+@admin.register(MonthlyReviewStats)
+class MonthlyReviewStatsAdmin(admin.ModelAdmin):
+    list_display = ('year', 'month', 'generation_timestamp')
+    ordering = ('-year', '-month')
+    readonly_fields = ('generation_timestamp',)
+
+
 @admin.register(GlobalTag)
 class GlobalTagAdmin(admin.ModelAdmin):
     list_display = ('text', 'created_by', 'created_at')
@@ -73,4 +81,11 @@ class GlobalTagAdmin(admin.ModelAdmin):
 class AlbumTagAdmin(admin.ModelAdmin):
     list_display = ('tag_text', 'album', 'submitted_by', 'is_approved', 'submitted_at')
     list_filter = ('is_approved',)
-    search_fields = ('tag_text', 'album__title')
\ No newline at end of file
+    search_fields = ('tag_text', 'album__title')
+
+
+@admin.register(AlbumBackfillCheckpoint)
+class AlbumBackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('job_name', 'last_pk', 'processed', 'updated', 'started_at', 'updated_at', 'completed_at')
+    search_fields = ('job_name',)
+    readonly_fields = ('started_at', 'updated_at')
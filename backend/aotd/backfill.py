@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.utils import timezone
+
+import logging
+import datetime
+import time
+
+from .models import Album, AlbumBackfillCheckpoint
+from .musicbrainz import musicbrainz_client
+from .utils import buildAlbumFromRelease, invalidateAlbumCatalog
+
+# Declare logging
+logger = logging.getLogger()
+
+# MusicBrainz-derived Album fields a backfill can refresh
+BACKFILL_FIELDS = ('raw_data', 'track_list', 'release_date', 'release_date_str', 'release_group_id')
+
+
+## =========================================================================================================================================================================================
+## Resumable album metadata backfill. Walks the catalog in pk order (keyset, one batch at a time), fetches each batch
+## concurrently through the shared rate limited MusicBrainz client, and writes only the columns that changed with
+## bulk_update. The checkpoint is committed with every batch, so a job can be interrupted and rerun to resume.
+## =========================================================================================================================================================================================
+
+def releaseFieldValues(data: dict) -> dict:
+  '''Return the BACKFILL_FIELDS values for an Album built from a musicbrainz release lookup.'''
+  fresh = buildAlbumFromRelease(data)
+  release_date = fresh.release_date
+  if(isinstance(release_date, datetime.datetime)):
+    release_date = release_date.date()
+  return {
+    'raw_data': fresh.raw_data,
+    'track_list': fresh.track_list,
+    'release_date': release_date,
+    'release_date_str': fresh.release_date_str,
+    'release_group_id': data['release-group']['id'] if ('release-group' in data.keys()) else None,
+  }
+
+
+def _writeBatch(albums: list, changes: dict):
+  '''bulk_update the changed albums, one UPDATE per distinct set of changed columns so untouched columns are never rewritten.'''
+  groups = {}
+  for album in albums:
+    if(album.pk in changes):
+      groups.setdefault(changes[album.pk], []).append(album)
+  for changed_fields, group in groups.items():
+    Album.objects.bulk_update(group, list(changed_fields))
+
+
+def runAlbumBackfill(job_name: str = "album_metadata", fields: tuple = BACKFILL_FIELDS, restart: bool = False, batch_size: int = 50, workers: int = 4, max_age: int = 0, report=print) -> AlbumBackfillCheckpoint:
+  '''
+  Refresh the given MusicBrainz-derived fields for every album, resuming from the job's checkpoint.
+
+  :param job_name: Checkpoint name, rerunning the same job resumes it (a completed job starts over)
+  :param fields: Album fields to refresh (subset of BACKFILL_FIELDS)
+  :param restart: Ignore any existing checkpoint and start from the first album
+  :param batch_size: Albums fetched and written per batch (and per checkpoint commit)
+  :param workers: Concurrent fetches, requests are still paced by the MusicBrainz rate limiter
+  :param max_age: Max age (seconds) of a cached MusicBrainz response to reuse, 0 always revalidates
+  :param report: Callable used for progress lines
+  :return: The final checkpoint
+  '''
+  unknown = set(fields) - set(BACKFILL_FIELDS)
+  if(unknown):
+    raise ValueError(f"Cannot backfill album fields: {', '.join(sorted(unknown))}")
+  checkpoint, created = AlbumBackfillCheckpoint.objects.get_or_create(job_name=job_name, defaults={'fields': list(fields)})
+  if(restart or (checkpoint.completed_at is not None) or (set(checkpoint.fields) != set(fields))):
+    checkpoint.fields = list(fields)
+    checkpoint.last_pk = 0
+    checkpoint.processed = 0
+    checkpoint.updated = 0
+    checkpoint.failed = []
+    checkpoint.started_at = timezone.now()
+    checkpoint.completed_at = None
+    checkpoint.save()
+  elif(not created):
+    report(f"Resuming backfill '{job_name}' after album pk {checkpoint.last_pk} ({checkpoint.processed} already processed)")
+  # Counted once, progress is tracked from the checkpoint instead of recounting every iteration
+  remaining = Album.objects.filter(pk__gt=checkpoint.last_pk).count()
+  report(f"Backfilling {', '.join(fields)} for {remaining} albums (batch size {batch_size}, {workers} workers)")
+  run_started = time.monotonic()
+  run_processed = 0
+  while(True):
+    albums = list(Album.objects.filter(pk__gt=checkpoint.last_pk).order_by('pk').only('pk', 'mbid', *fields)[:batch_size])
+    if(not albums):
+      break
+    # Fetch the batch concurrently (under the rate limiter)
+    results = {mbid: (data, error) for mbid, data, error in musicbrainz_client.fetch_many([album.mbid for album in albums], workers=workers, max_age=max_age)}
+    # Diff against the stored values, keeping only changed columns
+    changes = {}
+    failures = []
+    for album in albums:
+      data, error = results[album.mbid]
+      try:
+        if(error is not None):
+          raise error
+        values = releaseFieldValues(data)
+      except Exception as e:
+        failures.append({'pk': album.pk, 'mbid': album.mbid, 'error': repr(e)})
+        continue
+      changed_fields = frozenset(field for field in fields if getattr(album, field) != values[field])
+      for field in changed_fields:
+        setattr(album, field, values[field])
+      if(changed_fields):
+        changes[album.pk] = changed_fields
+    # Write the batch and advance the checkpoint together
+    with transaction.atomic():
+      _writeBatch(albums, changes)
+      checkpoint.last_pk = albums[-1].pk
+      checkpoint.processed += len(albums)
+      checkpoint.updated += len(changes)
+      checkpoint.failed = checkpoint.failed + failures
+      checkpoint.save()
+    if(changes):
+      # bulk_update skips save signals, drop the cached catalog ourselves
+      invalidateAlbumCatalog()
+    for failure in failures:
+      report(f"FAILED - album {failure['pk']} ({failure['mbid']}): {failure['error']}")
+    # Throughput/ETA report
+    run_processed += len(albums)
+    remaining -= len(albums)
+    elapsed = time.monotonic() - run_started
+    rate = run_processed / elapsed if (elapsed > 0) else 0
+    eta = datetime.timedelta(seconds=int(max(remaining, 0) / rate)) if (rate > 0) else "unknown"
+    report(f"{checkpoint.processed} processed ({len(changes)} updated this batch, {len(checkpoint.failed)} failed total) - {rate:.2f} albums/s, {max(remaining, 0)} remaining, ETA {eta}")
+  checkpoint.completed_at = timezone.now()
+  checkpoint.save(update_fields=['completed_at', 'updated_at'])
+  report(f"Backfill '{job_name}' complete: {checkpoint.processed} processed, {checkpoint.updated} updated, {len(checkpoint.failed)} failed")
+  return checkpoint
@@ -0,0 +1,159 @@
+import logging
+import os
+import json
+import queue
+import threading
+import time
+import atexit
+
+from backend.redis_client import getRedisClient, redisKey
+from backend.write_behind import BackgroundWorker
+
+# Declare logging
+logger = logging.getLogger()
+
+# Which transport to publish review events over ("REDIS" in deployed environments, "MEMORY" for local use and tests)
+REVIEW_EVENT_BACKEND = os.getenv("REVIEW_EVENT_BACKEND", "REDIS").upper()
+# Max number of events waiting to be published, new events are dropped once this is reached
+REVIEW_EVENT_QUEUE_SIZE = int(os.getenv("REVIEW_EVENT_QUEUE_SIZE", 1000))
+# Max number of events sent in a single pipeline flush
+REVIEW_EVENT_BATCH_SIZE = int(os.getenv("REVIEW_EVENT_BATCH_SIZE", 50))
+# Backoff bounds (seconds) after a failed flush, and how many attempts a batch gets before it is dropped
+REVIEW_EVENT_BACKOFF_MIN = 0.5
+REVIEW_EVENT_BACKOFF_MAX = 30.0
+REVIEW_EVENT_MAX_ATTEMPTS = 3
+
+
+## =========================================================================================================================================================================================
+## Review event fan-out. Views enqueue events and return immediately, a background thread drains the queue and publishes
+## to the "<namespace>-aotd_review:<mbid>" channels the frontend listens on, batching each flush into one pipeline.
+## =========================================================================================================================================================================================
+
+class RedisEventTransport:
+  """Publishes batches of (channel, message) pairs over a pooled Redis connection in a single pipeline."""
+
+  def __init__(self):
+    self.client = getRedisClient()
+
+  def send(self, batch: list):
+    pipe = self.client.pipeline(transaction=False)
+    for channel, message in batch:
+      pipe.publish(channel, message)
+    pipe.execute()
+
+
+class MemoryEventTransport:
+  """In-memory stand-in for Redis, keeps every published (channel, message) pair so it can be inspected."""
+
+  def __init__(self):
+    self.published = []
+    self._lock = threading.Lock()
+
+  def send(self, batch: list):
+    with self._lock:
+      self.published.extend(batch)
+
+
+class ReviewEventPublisher(BackgroundWorker):
+  """Bounded queue + background publisher thread with batching, drop and backoff policy."""
+
+  thread_name = "review-event-publisher"
+
+  def __init__(self, transport=None, queue_size: int = REVIEW_EVENT_QUEUE_SIZE, batch_size: int = REVIEW_EVENT_BATCH_SIZE):
+    super().__init__()
+    self.transport = transport
+    self.batch_size = batch_size
+    self._queue = queue.Queue(maxsize=queue_size)
+    self._backoff = 0.0
+    # Metrics (also exposed to prometheus when available)
+    self.metrics = {"enqueued": 0, "published": 0, "dropped_full": 0, "dropped_failed": 0, "flush_failures": 0}
+
+  def _get_transport(self):
+    if(self.transport is None):
+      if(REVIEW_EVENT_BACKEND == "MEMORY"):
+        self.transport = MemoryEventTransport()
+      else:
+        self.transport = RedisEventTransport()
+    return self.transport
+
+  def _count(self, metric: str, amount: int = 1):
+    self.metrics[metric] += amount
+    if(EVENT_COUNTER is not None):
+      EVENT_COUNTER.labels(outcome=metric).inc(amount)
+
+  def publish(self, channel: str, payload: dict) -> bool:
+    """Enqueue an event without blocking. Returns False if the event was dropped because the queue is full."""
+    try:
+      self._queue.put_nowait((channel, json.dumps(payload)))
+    except queue.Full:
+      self._count("dropped_full")
+      logger.warning(f"Review event queue full, dropping event for channel {channel}")
+      return False
+    self._count("enqueued")
+    self._ensureThread()
+    return True
+
+  def _drain_batch(self, timeout: float = 1.0) -> list:
+    """Block for the first event, then take whatever else is waiting up to batch_size."""
+    try:
+      batch = [self._queue.get(timeout=timeout)]
+    except queue.Empty:
+      return []
+    while(len(batch) < self.batch_size):
+      try:
+        batch.append(self._queue.get_nowait())
+      except queue.Empty:
+        break
+    return batch
+
+  def flush_batch(self, batch: list) -> bool:
+    """Send a batch, retrying with exponential backoff. The batch is dropped (and counted) after REVIEW_EVENT_MAX_ATTEMPTS failures."""
+    for attempt in range(1, REVIEW_EVENT_MAX_ATTEMPTS + 1):
+      if(self._backoff > 0):
+        time.sleep(self._backoff)
+      try:
+        self._get_transport().send(batch)
+        self._backoff = 0.0
+        self._count("published", len(batch))
+        return True
+      except Exception as e:
+        self._count("flush_failures")
+        self._backoff = min(REVIEW_EVENT_BACKOFF_MAX, max(REVIEW_EVENT_BACKOFF_MIN, self._backoff * 2))
+        logger.warning(f"Failed to publish {len(batch)} review events (attempt {attempt}/{REVIEW_EVENT_MAX_ATTEMPTS}), backing off {self._backoff}s: {e}")
+    self._count("dropped_failed", len(batch))
+    logger.error(f"Dropping {len(batch)} review events after {REVIEW_EVENT_MAX_ATTEMPTS} failed attempts")
+    return False
+
+  def flush(self):
+    """Synchronously publish everything currently queued (used on shutdown and in tests)."""
+    while(True):
+      batch = self._drain_batch(timeout=0)
+      if(not batch):
+        return
+      self.flush_batch(batch)
+
+  def _run(self):
+    while(True):
+      batch = self._drain_batch()
+      if(batch):
+        self.flush_batch(batch)
+
+
+# Prometheus counter for publisher outcomes (django-prometheus ships prometheus_client)
+try:
+  from prometheus_client import Counter
+  EVENT_COUNTER = Counter("cordpal_review_events_total", "Review event publisher outcomes", ["outcome"])
+except Exception:
+  EVENT_COUNTER = None
+
+# Process wide publisher
+review_event_publisher = ReviewEventPublisher()
+# Publish anything still queued on shutdown
+atexit.register(review_event_publisher.flush)
+
+
+def publishAlbumEvent(album_mbid: str, event_type: str):
+  """Queue a frontend rerender event for an album's review channel (review, reaction and tag changes)."""
+  channel = redisKey(f"aotd_review:{album_mbid}")
+  logger.info(f"Queueing {event_type} event for Redis channel: {channel}")
+  return review_event_publisher.publish(channel, {'album_id': album_mbid, 'event': event_type})
@@ -0,0 +1,64 @@
+"""
+Management command to refresh MusicBrainz-derived album fields (raw_data,
+track_list, release_date, release_date_str, release_group_id) for the whole
+catalog, using the resumable backfill engine in aotd/backfill.py.
+
+Progress is checkpointed to the DB after every batch, so the job can be
+interrupted (Ctrl+C) and rerun with the same --job name to resume.
+
+Usage:
+  python manage.py backfill_album_metadata
+  python manage.py backfill_album_metadata --fields raw_data track_list
+
+Flags:
+  --job NAME          Checkpoint name to resume (default: album_metadata)
+  --fields F [F ...]  Album fields to refresh (default: all)
+  --restart           Ignore the existing checkpoint and start from the first album
+  --batch-size N      Albums fetched and written per batch (default: 50)
+  --workers N         Concurrent MusicBrainz fetches (default: 4)
+  --use-cache         Reuse cached MusicBrainz responses instead of revalidating every album
+"""
+
+import os
+
+from dotenv import load_dotenv
+from django.core.management.base import BaseCommand
+
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV == "PROD" else ".env.local")
+
+from aotd.backfill import BACKFILL_FIELDS, runAlbumBackfill
+
+
+class Command(BaseCommand):
+    help = 'Refresh MusicBrainz-derived album metadata for the whole catalog (resumable).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', default='album_metadata', help='Checkpoint name to resume.')
+        parser.add_argument('--fields', nargs='+', choices=BACKFILL_FIELDS, default=list(BACKFILL_FIELDS), help='Album fields to refresh.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the existing checkpoint and start from the first album.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Albums fetched and written per batch.')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent MusicBrainz fetches.')
+        parser.add_argument('--use-cache', action='store_true', help='Reuse cached MusicBrainz responses instead of revalidating every album.')
+
+    def handle(self, *args, **options):
+        try:
+            checkpoint = runAlbumBackfill(
+                job_name=options['job'],
+                fields=tuple(options['fields']),
+                restart=options['restart'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                max_age=None if options['use_cache'] else 0,
+                report=self.stdout.write,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(f"\nInterrupted, rerun with --job {options['job']} to resume from the last checkpoint."))
+            return
+
+        if checkpoint.failed:
+            self.stdout.write(self.style.WARNING(f'\n{len(checkpoint.failed)} album(s) failed:'))
+            for failure in checkpoint.failed:
+                self.stdout.write(f"  FAILED  album {failure['pk']} ({failure['mbid']}): {failure['error']}")
+        else:
+            self.stdout.write(self.style.SUCCESS('All albums refreshed.'))
@@ -0,0 +1,56 @@
+"""
+Management command to rebuild the denormalized AlbumTag vote counters
+(upvotes, downvotes, net_score) and approval state from Vote rows.
+
+Counters are normally kept in step by AlbumTag.apply_vote_delta in the same
+transaction as each Vote write; this command repairs any drift (e.g. after
+manual DB edits) using a single grouped query over Vote.
+
+Usage:
+  python manage.py reconcile_tag_votes
+
+Flags:
+  --dry-run   Report drifted tags without writing anything to the DB
+"""
+
+import os
+
+from dotenv import load_dotenv
+from django.core.management.base import BaseCommand
+
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV == "PROD" else ".env.local")
+
+from aotd.utils import reconcileTagVoteCounters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild AlbumTag vote counters and approval state from Vote rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted tags without writing anything to the DB.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN — no changes will be written.\n'))
+
+        drifted = reconcileTagVoteCounters(dry_run=dry_run)
+
+        for tag, old, new in drifted:
+            self.stdout.write(
+                f'  FIX   "{tag.tag_text}" on {tag.album.title} (id={tag.pk}) — '
+                f'up/down/net/approved {old} → {new}'
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All tag vote counters are in sync.'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f'\n{len(drifted)} tag(s) would be updated.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\n{len(drifted)} tag(s) updated.'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.12 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aotd', '0041_aotduserdata_review_rate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyalbum',
+            name='selection_pool_size',
+            field=models.IntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='dailyalbum',
+            name='selection_seed',
+            field=models.BigIntegerField(default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.12 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aotd', '0042_dailyalbum_selection_seed_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('payload', models.JSONField()),
+                ('generation_timestamp', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('year', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.12 on 2026-10-18 14:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_vote_counters(apps, schema_editor):
+    AlbumTag = apps.get_model('aotd', 'AlbumTag')
+    Vote = apps.get_model('votes', 'Vote')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ct = ContentType.objects.filter(app_label='aotd', model='albumtag').first()
+    if ct is None:
+        return
+    counts = {
+        row['object_id']: row
+        for row in Vote.objects.filter(content_type=ct)
+            .values('object_id')
+            .annotate(up=Count('id', filter=Q(vote_type=1)), down=Count('id', filter=Q(vote_type=-1)))
+    }
+    tags = list(AlbumTag.objects.filter(pk__in=counts.keys()))
+    for tag in tags:
+        tag.upvotes = counts[tag.pk]['up']
+        tag.downvotes = counts[tag.pk]['down']
+        tag.net_score = tag.upvotes - tag.downvotes
+    AlbumTag.objects.bulk_update(tags, ['upvotes', 'downvotes', 'net_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aotd', '0043_monthlyreviewstats'),
+        ('votes', '0002_alter_vote_user'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='albumtag',
+            name='downvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='albumtag',
+            name='net_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='albumtag',
+            name='upvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.12 on 2026-10-18 16:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aotd', '0044_albumtag_vote_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlbumBackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_name', models.CharField(max_length=100, unique=True)),
+                ('fields', models.JSONField(default=list)),
+                ('last_pk', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('failed', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
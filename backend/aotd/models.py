@@ -151,7 +151,12 @@ class Album(models.Model):
     out['submission_date'] = self.submission_date.strftime("%m/%d/%Y, %H:%M:%S")
     out['release_date_str'] = self.release_date_str
     out['user_comment'] = self.user_comment
-    recent_transfer = self.ownership_history.order_by('-transferred_at').first()
+    # Use prefetched ownership history when available (see serializeReviews) to avoid a query per album
+    if('ownership_history' in getattr(self, '_prefetched_objects_cache', {})):
+      transfers = self._prefetched_objects_cache['ownership_history']
+      recent_transfer = max(transfers, key=lambda transfer: transfer.transferred_at) if transfers else None
+    else:
+      recent_transfer = self.ownership_history.order_by('-transferred_at').first()
     if recent_transfer and recent_transfer.previous_owner:
       out['submitter'] = recent_transfer.previous_owner.nickname
       out['submitter_id'] = recent_transfer.previous_owner.discord_id
@@ -165,7 +170,7 @@ class Album(models.Model):
     return out
 
   def save(self, edited_by=None, *args, **kwargs):
-    from users.models import UserAction
+    from users.audit import recordUserAction
     if self.pk and edited_by is not None:
       old = Album.objects.get(pk=self.pk)
       if old.user_comment != self.user_comment:
@@ -175,7 +180,7 @@ class Album(models.Model):
           edited_by=edited_by,
           admin_edit=(edited_by != self.submitted_by)
         )
-        UserAction.objects.create(
+        recordUserAction(
           user=edited_by,
           action_type="UPDATE",
           entity_type="ALBUM_COMMENT",
@@ -192,14 +197,14 @@ class Album(models.Model):
     """
     Change album ownership in the event of an inactive user owning an album another user would like to submit
     """
-    from users.models import UserAction
+    from users.audit import recordUserAction
     previous_owner = self.submitted_by
     AlbumOwnershipHistory.objects.create(
       album=self,
       previous_owner=previous_owner,
       new_owner=rescuer
     )
-    UserAction.objects.create(
+    recordUserAction(
       user=rescuer,
       action_type="UPDATE",
       entity_type="ALBUM_OWNER",
@@ -213,17 +218,20 @@ class Album(models.Model):
     if comment is not None:
       self.user_comment = comment
     super(Album, self).save()
+    # A new owner changes selection chances (plain album saves do not recalculate them)
+    from .utils import scheduleAOTDChanceRecalc
+    scheduleAOTDChanceRecalc()
 
   # Custom delete function to log the user action
   def delete(self, deleter=None, reason=None, *args, **kwargs):
     # Log the action before actually deleting
-    from users.models import UserAction  # Import inside to avoid circular import
+    from users.audit import recordUserAction  # Import inside to avoid circular import
     # If deleter is not provided, log critical log and do not delete album
     if(deleter == None):
       logger.critical(f"ATTEMPTED DELETE OF ALBUM (ID: {self.mbid}) WITH NO USER PASSED IN! KEEPING ALBUM: {self.title}")
       return
     # Create user action log
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter,
       action_type="DELETE",
       entity_type="ALBUM",
@@ -299,6 +307,9 @@ class DailyAlbum(models.Model):
   rating_timeline = models.JSONField(default=generateTimelineDict, null=True)
   rating = models.FloatField(default=11.0, null=False) # Score for this day, will only be populated after the day is over (11 means it was not populated yet, Null means no reviews were made)
   standard_deviation = models.FloatField(default=None, null=True)
+  # Random selection audit data, the seed and eligible pool size used by setAlbumOfDay (null for manual/admin selections)
+  selection_seed = models.BigIntegerField(default=None, null=True)
+  selection_pool_size = models.IntegerField(default=None, null=True)
 
   def getReviewCount(self):
     return Review.objects.filter(aotd_date=self.date, album=self.album).count()
@@ -393,7 +404,7 @@ class Review(models.Model):
 
   def save(self, silent_update: bool = False, *args, **kwargs):
     """Save override, will create a history object and user action."""
-    from users.models import UserAction
+    from users.audit import recordUserAction
     # Create a history record before updating the review
     if self.pk and not silent_update:  # Only if this is an update, not a new review and is not a silent update by an admin
       # Fetch the original (pre-save) instance from the DB
@@ -412,7 +423,7 @@ class Review(models.Model):
         advancedReviewDict=old_review.advancedReviewDict
       )
       # Create UserAction for review update
-      UserAction.objects.create(
+      recordUserAction(
         user=self.user,
         action_type="UPDATE",
         entity_type="REVIEW",
@@ -521,14 +532,14 @@ class UserAlbumOutage(models.Model):
   # Custom delete function to log the user action
   def delete(self, deleter=None, delete_reason=None, *args, **kwargs):
     # Log the action before actually deleting
-    from users.models import UserAction  # Import inside to avoid circular import
+    from users.audit import recordUserAction  # Import inside to avoid circular import
 
     # If deleter is not provided, log critical log and do not delete album
     if(deleter == None):
       logger.critical(f"ATTEMPTED DELETE OF ALBUM_SELECTION_OUTAGE (ID: {self.pk}) WITH NO DELETER USER PASSED IN! KEEPING OUTAGE: {self.pk}")
       return
     # Create user action log
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter,
       action_type="DELETE",
       entity_type="ALBUM_SELECTION_OUTAGE",
@@ -539,6 +550,24 @@ class UserAlbumOutage(models.Model):
     super().delete(*args, **kwargs)
 
 
+# Stored review stats for a closed month
+class MonthlyReviewStats(models.Model):
+  """
+  Materialized snapshot of getReviewStatsByMonth for a closed month. Review data for a month
+  never changes once the month is over, so the payload is generated once and served from here.
+  """
+  year = models.IntegerField(null=False)
+  month = models.IntegerField(null=False)
+  payload = models.JSONField(null=False)
+  generation_timestamp = models.DateTimeField(auto_now_add=True)
+
+  class Meta:
+    unique_together = ('year', 'month')
+
+  def __str__(self):
+    return f"Review stats for {self.month}/{self.year}"
+
+
 # Storage for User chance object, representing the chance that a user will be selected for the next AOtD
 class UserChanceCache(models.Model):
   """
@@ -576,6 +605,25 @@ class UserChanceCache(models.Model):
     return out
 
 
+class AlbumBackfillCheckpoint(models.Model):
+  """
+  Progress of a resumable album metadata backfill job (see aotd/backfill.py). Albums are walked in pk order and
+  last_pk is committed together with each written batch, so an interrupted job resumes where it stopped.
+  """
+  job_name = models.CharField(max_length=100, unique=True) # Name of the backfill job, one checkpoint per job
+  fields = models.JSONField(default=list) # Album fields the job refreshes
+  last_pk = models.IntegerField(default=0) # Highest album pk processed so far
+  processed = models.IntegerField(default=0) # Albums processed (fetched or failed)
+  updated = models.IntegerField(default=0) # Albums with at least one changed field written
+  failed = models.JSONField(default=list) # [{pk, mbid, error}] for albums that could not be fetched or parsed
+  started_at = models.DateTimeField(default=now)
+  updated_at = models.DateTimeField(auto_now=True)
+  completed_at = models.DateTimeField(null=True) # Set once the job reaches the end of the catalog
+
+  def __str__(self):
+    return f"Backfill {self.job_name} at album pk {self.last_pk} ({self.processed} processed)"
+
+
 # Global Tag for all albums (appearing as suggestions for future albums)
 class GlobalTag(models.Model):
   """
@@ -594,11 +642,11 @@ class GlobalTag(models.Model):
   created_at = models.DateTimeField(auto_now_add=True)
 
   def save(self, *args, **kwargs):
-    from users.models import UserAction
+    from users.audit import recordUserAction
     is_new = self.pk is None
     super().save(*args, **kwargs)
     if is_new and self.created_by:
-      UserAction.objects.create(
+      recordUserAction(
         user=self.created_by,
         action_type="CREATE",
         entity_type="GLOBAL_TAG",
@@ -607,11 +655,11 @@ class GlobalTag(models.Model):
       )
 
   def delete(self, deleter=None, reason=None, *args, **kwargs):
-    from users.models import UserAction
+    from users.audit import recordUserAction
     if deleter is None:
       logger.critical(f"ATTEMPTED DELETE OF GLOBAL_TAG (ID: {self.pk}) WITH NO DELETER PASSED IN! KEEPING TAG: {self.text}")
       return
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter,
       action_type="DELETE",
       entity_type="GLOBAL_TAG",
@@ -655,26 +703,50 @@ class AlbumTag(models.Model):
     related_name="usages"
   )
   emoji = models.CharField(max_length=255, null=True, blank=True)
+  # Denormalized vote counters, kept in step with Vote rows by apply_vote_delta (rebuild with `manage.py reconcile_tag_votes`)
+  upvotes = models.IntegerField(default=0)
+  downvotes = models.IntegerField(default=0)
+  net_score = models.IntegerField(default=0)
+
+  APPROVAL_THRESHOLD = 3
 
   class Meta:
     unique_together = ('album', 'tag_text')  # case-sensitive at DB level; enforce iexact in view
 
   def get_net_score(self):
-    from django.db.models import Sum
-    result = self.votes.aggregate(total=Sum('vote_type'))
-    return result['total'] or 0
+    return self.net_score
+
+  def apply_vote_delta(self, upvote_delta: int = 0, downvote_delta: int = 0):
+    """
+    Atomically adjust the vote counters (F-expressions, so concurrent votes do not clobber each other) and re-derive is_approved
+    from the new net score. Call inside the same transaction as the Vote write. Refreshes the counters on this instance.
+    """
+    from django.db.models import F, Q, ExpressionWrapper, BooleanField
+    tags = AlbumTag.objects.filter(pk=self.pk)
+    tags.update(
+      upvotes=F('upvotes') + upvote_delta,
+      downvotes=F('downvotes') + downvote_delta,
+      net_score=F('net_score') + (upvote_delta - downvote_delta)
+    )
+    tags.update(is_approved=ExpressionWrapper(Q(net_score__gte=AlbumTag.APPROVAL_THRESHOLD), output_field=BooleanField()))
+    was_approved = self.is_approved
+    self.refresh_from_db(fields=['upvotes', 'downvotes', 'net_score', 'is_approved'])
+    # Queryset updates skip post_save, so drop the album catalog cache here when approval flips
+    if(was_approved != self.is_approved):
+      from .utils import invalidateAlbumCatalog
+      invalidateAlbumCatalog()
 
   def recalculate_approval(self):
-    """Recompute is_approved and save. Call after any vote change."""
-    self.is_approved = self.get_net_score() >= 3
+    """Derive is_approved from the stored net score and save."""
+    self.is_approved = self.net_score >= AlbumTag.APPROVAL_THRESHOLD
     self.save(update_fields=['is_approved'])
 
   def save(self, *args, **kwargs):
-    from users.models import UserAction
+    from users.audit import recordUserAction
     is_new = self.pk is None
     super().save(*args, **kwargs)
     if is_new and self.submitted_by:
-      UserAction.objects.create(
+      recordUserAction(
         user=self.submitted_by,
         action_type="CREATE",
         entity_type="ALBUM_TAG",
@@ -683,11 +755,11 @@ class AlbumTag(models.Model):
       )
 
   def delete(self, deleter=None, reason=None, admin_delete=False, *args, **kwargs):
-    from users.models import UserAction
+    from users.audit import recordUserAction
     if deleter is None:
       logger.critical(f"ATTEMPTED DELETE OF ALBUM_TAG (ID: {self.pk}) WITH NO DELETER PASSED IN! KEEPING TAG: {self.tag_text}")
       return
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter,
       action_type="DELETE",
       entity_type="ALBUM_TAG",
@@ -698,8 +770,8 @@ class AlbumTag(models.Model):
 
   def log_vote(self, voter, vote_type):
     """Log a vote event on this tag. Call this from the view after a Vote is created or changed."""
-    from users.models import UserAction
-    UserAction.objects.create(
+    from users.audit import recordUserAction
+    recordUserAction(
       user=voter,
       action_type="CREATE",
       entity_type="ALBUM_TAG_VOTE",
@@ -708,8 +780,6 @@ class AlbumTag(models.Model):
     )
 
   def toJSON(self, user=None, short=False):
-    upvotes = self.votes.filter(vote_type=1).count()
-    downvotes = self.votes.filter(vote_type=-1).count()
     # Build out return dict
     out = {}
     out['id'] = self.pk
@@ -720,13 +790,17 @@ class AlbumTag(models.Model):
       out['submitted_by'] = self.submitted_by.nickname if self.submitted_by else None
       out['submitted_by_id'] = self.submitted_by.discord_id if self.submitted_by else None
       out['submitted_at'] = self.submitted_at.strftime("%m/%d/%Y, %H:%M:%S")
-      out['net_score'] = upvotes - downvotes
-      out['upvotes'] = upvotes
-      out['downvotes'] = downvotes
+      out['net_score'] = self.net_score
+      out['upvotes'] = self.upvotes
+      out['downvotes'] = self.downvotes
       out['user_vote'] = None
     if user:
-      user_vote = self.votes.filter(user=user).first()
-      out['user_vote'] = user_vote.vote_type if user_vote else None
+      # Prefer the requesting user's vote annotated onto the queryset (user_vote_type, see getTagsForAlbum)
+      if(hasattr(self, 'user_vote_type')):
+        out['user_vote'] = self.user_vote_type
+      else:
+        user_vote = self.votes.filter(user=user).first()
+        out['user_vote'] = user_vote.vote_type if user_vote else None
     return out
 
   def __str__(self):
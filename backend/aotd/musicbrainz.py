@@ -0,0 +1,241 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import logging
+import threading
+import hashlib
+import random
+import json
+import time
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Declare logging
+logger = logging.getLogger()
+
+# Determine runtime enviornment
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
+
+# Base URL of the MusicBrainz web service (point at a local fake server for testing)
+MUSICBRAINZ_BASE_URL = os.getenv("MUSICBRAINZ_BASE_URL", "https://musicbrainz.org/ws/2").rstrip("/")
+MUSICBRAINZ_USER_AGENT = os.getenv("MUSICBRAINZ_USER_AGENT", "CordPal/0.0.1 ( www.cordpal.app )")
+# Requests per second allowed by the MusicBrainz rate limiting policy (shared by every worker when the limiter is REDIS)
+MUSICBRAINZ_RATE_LIMIT = float(os.getenv("MUSICBRAINZ_RATE_LIMIT", 1.0))
+# Where the rate limiter keeps its state: "REDIS" (shared between workers and scripts) or "MEMORY" (per-process)
+MUSICBRAINZ_LIMITER_BACKEND = os.getenv("MUSICBRAINZ_LIMITER_BACKEND", "REDIS").upper()
+# On-disk response cache directory (empty to disable, defaults to backend/mb_cache regardless of the working directory)
+# and how long (seconds) a cached response is served without revalidating
+MUSICBRAINZ_CACHE_DIR = os.getenv("MUSICBRAINZ_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mb_cache"))
+MUSICBRAINZ_CACHE_MAX_AGE = int(os.getenv("MUSICBRAINZ_CACHE_MAX_AGE", 86400))
+# Per-request timeout (seconds) and how many times a throttled/failed request is attempted
+MUSICBRAINZ_TIMEOUT = float(os.getenv("MUSICBRAINZ_TIMEOUT", 10))
+MUSICBRAINZ_MAX_ATTEMPTS = int(os.getenv("MUSICBRAINZ_MAX_ATTEMPTS", 4))
+# Default includes for release lookups (what Album.raw_data is built from)
+RELEASE_INC = ("artists", "release-groups", "recordings", "genres")
+
+
+## =========================================================================================================================================================================================
+## Shared MusicBrainz client. Every lookup (album submission, replacement, backfill scripts) goes through one pooled
+## keep-alive session and a token bucket that holds all workers to MusicBrainz's 1 request/second policy.
+## Responses are kept in an on-disk cache keyed by mbid and inc set, and revalidated with If-None-Match once stale.
+## =========================================================================================================================================================================================
+
+class MusicBrainzError(Exception):
+  """Raised when a MusicBrainz lookup fails (status is the HTTP status, or None for connection errors)."""
+
+  def __init__(self, message: str, status: int = None):
+    super().__init__(message)
+    self.status = status
+
+
+class MemoryTokenBucket:
+  """Per-process token bucket, acquire() blocks until a request may be sent."""
+
+  def __init__(self, rate: float, burst: int = 1):
+    self.rate = rate
+    self.burst = burst
+    self._tokens = float(burst)
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+  def reserve(self) -> float:
+    """Take a token, returning how long (seconds) the caller must wait before using it."""
+    with self._lock:
+      current = time.monotonic()
+      self._tokens = min(self.burst, self._tokens + (current - self._updated) * self.rate)
+      self._updated = current
+      self._tokens -= 1
+      return 0.0 if (self._tokens >= 0) else (-self._tokens / self.rate)
+
+  def acquire(self):
+    wait = self.reserve()
+    if(wait > 0):
+      time.sleep(wait)
+
+
+class RedisTokenBucket:
+  """
+  Token bucket shared through Redis, so web workers and scripts together stay under the rate limit.
+  Each reservation atomically claims the next free send slot (using the Redis server clock), then sleeps until it.
+  Falls back to a per-process bucket if Redis is unreachable.
+  """
+
+  # KEYS[1] = next free slot (microseconds), ARGV[1] = interval between requests (microseconds)
+  RESERVE_SCRIPT = """
+    local now = redis.call('TIME')
+    local now_us = tonumber(now[1]) * 1000000 + tonumber(now[2])
+    local slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if slot < now_us then slot = now_us end
+    redis.call('SET', KEYS[1], slot + tonumber(ARGV[1]), 'PX', 60000)
+    return slot - now_us
+  """
+
+  def __init__(self, rate: float):
+    from backend.redis_client import getRedisClient, redisKey
+    self._redis = getRedisClient(decode_responses=False, socket_timeout=2)
+    self._key = redisKey("musicbrainz:next_slot")
+    self._interval_us = int(1000000 / rate)
+    self._reserve = self._redis.register_script(self.RESERVE_SCRIPT)
+    self._fallback = MemoryTokenBucket(rate)
+
+  def acquire(self):
+    try:
+      wait = int(self._reserve(keys=[self._key], args=[self._interval_us])) / 1000000
+    except Exception as e:
+      logger.warning(f"MusicBrainz rate limiter could not reach redis, using per-process limiter: {e}")
+      wait = self._fallback.reserve()
+    if(wait > 0):
+      time.sleep(wait)
+
+
+class DiskResponseCache:
+  """JSON responses cached on disk as {etag, fetched_at, data}, one file per (mbid, inc set)."""
+
+  def __init__(self, directory: str):
+    self.directory = directory
+
+  def _path(self, entity: str, mbid: str, inc: tuple) -> str:
+    inc_key = hashlib.sha1("+".join(sorted(inc)).encode()).hexdigest()[:12]
+    return os.path.join(self.directory, entity, f"{mbid}_{inc_key}.json")
+
+  def get(self, entity: str, mbid: str, inc: tuple) -> dict | None:
+    if(not self.directory):
+      return None
+    try:
+      with open(self._path(entity, mbid, inc), "r") as file:
+        return json.load(file)
+    except (FileNotFoundError, ValueError):
+      return None
+
+  def set(self, entity: str, mbid: str, inc: tuple, entry: dict):
+    if(not self.directory):
+      return
+    path = self._path(entity, mbid, inc)
+    try:
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      # Write to a temp file then swap it in, so concurrent readers never see a partial file
+      temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+      with open(temp_path, "w") as file:
+        json.dump(entry, file)
+      os.replace(temp_path, path)
+    except OSError as e:
+      logger.warning(f"Failed to write MusicBrainz cache entry for {entity} {mbid}: {e}")
+
+
+class MusicBrainzClient:
+  """Rate limited, caching MusicBrainz web service client (safe to share between threads)."""
+
+  def __init__(self, base_url: str = MUSICBRAINZ_BASE_URL, limiter=None, cache_dir: str = MUSICBRAINZ_CACHE_DIR, max_age: int = MUSICBRAINZ_CACHE_MAX_AGE, pool_size: int = 8):
+    self.base_url = base_url.rstrip("/")
+    self.max_age = max_age
+    self.cache = DiskResponseCache(cache_dir)
+    self._limiter = limiter
+    self.session = requests.Session()
+    self.session.headers.update({'User-Agent': MUSICBRAINZ_USER_AGENT, 'Accept': 'application/json'})
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    self.session.mount("http://", adapter)
+    self.session.mount("https://", adapter)
+
+  @property
+  def limiter(self):
+    if(self._limiter is None):
+      if(MUSICBRAINZ_LIMITER_BACKEND == "REDIS"):
+        try:
+          self._limiter = RedisTokenBucket(MUSICBRAINZ_RATE_LIMIT)
+        except Exception as e:
+          logger.error(f"Failed to create redis MusicBrainz limiter, falling back to memory limiter: {e}")
+          self._limiter = MemoryTokenBucket(MUSICBRAINZ_RATE_LIMIT)
+      else:
+        self._limiter = MemoryTokenBucket(MUSICBRAINZ_RATE_LIMIT)
+    return self._limiter
+
+  def _request(self, url: str, params: dict, headers: dict) -> requests.Response:
+    """Send a GET under the rate limiter, retrying throttled (503/429) responses and connection errors with backoff."""
+    for attempt in range(1, MUSICBRAINZ_MAX_ATTEMPTS + 1):
+      self.limiter.acquire()
+      try:
+        response = self.session.get(url, params=params, headers=headers, timeout=MUSICBRAINZ_TIMEOUT)
+      except requests.RequestException as e:
+        if(attempt == MUSICBRAINZ_MAX_ATTEMPTS):
+          raise MusicBrainzError(f"MusicBrainz request to {url} failed: {e}")
+        time.sleep(min(30, 2 ** attempt) + random.random())
+        continue
+      if(response.status_code in (429, 503) and attempt < MUSICBRAINZ_MAX_ATTEMPTS):
+        retry_after = response.headers.get("Retry-After")
+        delay = float(retry_after) if (retry_after and retry_after.isdigit()) else min(30, 2 ** attempt)
+        logger.warning(f"MusicBrainz throttled request to {url} (attempt {attempt}/{MUSICBRAINZ_MAX_ATTEMPTS}), retrying in {delay}s")
+        time.sleep(delay + random.random())
+        continue
+      return response
+    raise MusicBrainzError(f"MusicBrainz request to {url} still throttled after {MUSICBRAINZ_MAX_ATTEMPTS} attempts", status=429)
+
+  def lookup(self, entity: str, mbid: str, inc: tuple = (), max_age: int = None) -> dict:
+    """
+    Look up a MusicBrainz entity (release, release-group, artist, ...) by mbid and return the decoded JSON.
+    Cached responses younger than max_age (default MUSICBRAINZ_CACHE_MAX_AGE) are returned without a request,
+    older ones are revalidated with If-None-Match. Pass max_age=0 to always revalidate.
+    """
+    max_age = self.max_age if (max_age is None) else max_age
+    cached = self.cache.get(entity, mbid, inc)
+    if(cached and (time.time() - cached['fetched_at']) < max_age):
+      return cached['data']
+    headers = {}
+    if(cached and cached.get('etag')):
+      headers['If-None-Match'] = cached['etag']
+    params = {'fmt': 'json'}
+    if(inc):
+      params['inc'] = "+".join(inc)
+    response = self._request(f"{self.base_url}/{entity}/{mbid}", params, headers)
+    if(response.status_code == 304 and cached):
+      cached['fetched_at'] = time.time()
+      self.cache.set(entity, mbid, inc, cached)
+      return cached['data']
+    if(response.status_code != 200):
+      raise MusicBrainzError(f"MusicBrainz {entity} lookup for {mbid} returned {response.status_code}", status=response.status_code)
+    data = response.json()
+    self.cache.set(entity, mbid, inc, {'etag': response.headers.get("ETag"), 'fetched_at': time.time(), 'data': data})
+    return data
+
+  def fetch_release(self, mbid: str, inc: tuple = RELEASE_INC, max_age: int = None) -> dict:
+    """Look up a release with the includes Album.raw_data is built from."""
+    return self.lookup("release", mbid, inc, max_age)
+
+  def fetch_many(self, mbids, inc: tuple = RELEASE_INC, entity: str = "release", workers: int = 4, max_age: int = None):
+    """
+    Look up many entities concurrently, yielding (mbid, data, error) as each completes (error is None on success).
+    Requests are still paced by the rate limiter, the worker threads only overlap network latency and cache reads.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="musicbrainz-fetch") as executor:
+      futures = {executor.submit(self.lookup, entity, mbid, inc, max_age): mbid for mbid in mbids}
+      for future in as_completed(futures):
+        mbid = futures[future]
+        try:
+          yield mbid, future.result(), None
+        except Exception as e:
+          yield mbid, None, e
+
+
+# Process wide client
+musicbrainz_client = MusicBrainzClient()
@@ -1,7 +1,7 @@
 # This script for repeated use to force a recaclulation of all AOTD standard deviaions and all user review STDs
 
-from ..models import DailyAlbum, AotdUserData
-from ..utils import retrieveAlbumSTD, calculateUserReviewData
+from ..models import DailyAlbum
+from ..utils import retrieveAlbumSTD, calculateAllUserReviewData
 
 def run():
   print(f"Calculating standard deviation for all AOTD Objects")
@@ -15,13 +15,8 @@ def run():
     except:
       print(f"ERROR Calculating standard deviation for {aotd.album.title} - {aotd.album.mbid}")
   print(f"Calculating all user stats for all AotD Users")
-  # Get all aotd objects
-  all_users = AotdUserData.objects.all()
-  # Iterate and calculate
-  for user in all_users:
-    try:
-      print(f"Calculating AotD stats for {user.user.nickname}")
-      calculateUserReviewData(user)
-    except:
-      print(f"ERROR Calculating AotD stats for {user.user.nickname}")
-  
\ No newline at end of file
+  # Recalculate every user in a single batch
+  try:
+    calculateAllUserReviewData()
+  except Exception as e:
+    print(f"ERROR Calculating AotD stats for all users: {e}")
@@ -1,17 +1,21 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.forms.models import model_to_dict
 from .models import ( 
   Album,
+  AlbumTag,
+  DailyAlbum,
   Review,
-  UserAlbumOutage
+  UserAlbumOutage,
+  AotdUserData
 )
-from users.models import UserAction
+from .utils import invalidateAlbumCatalog, scheduleAOTDChanceRecalc
+from users.audit import recordUserAction
 
 @receiver(post_save, sender=Album)
 def log_album_creation(sender, instance: Album, created, **kwargs):
   if created:  # Ensure it runs only on first creation
-    UserAction.objects.create(
+    recordUserAction(
       user=instance.submitted_by,
       action_type="CREATE",
       entity_type="ALBUM",
@@ -22,7 +26,7 @@ def log_album_creation(sender, instance: Album, created, **kwargs):
 @receiver(post_save, sender=Review)
 def log_review_creation(sender, instance: Review, created, **kwargs):
   if created:  # Ensure it runs only on first creation
-    UserAction.objects.create(
+    recordUserAction(
       user=instance.user,
       action_type="CREATE",
       entity_type="REVIEW",
@@ -34,10 +38,36 @@ def log_review_creation(sender, instance: Review, created, **kwargs):
 @receiver(post_save, sender=UserAlbumOutage)
 def log_album_selection_outage_creation(sender, instance: UserAlbumOutage, created, **kwargs):
   if created:  # Ensure it runs only on first creation
-    UserAction.objects.create(
+    recordUserAction(
       user=(instance.admin_enactor if (instance.admin_enacted) else instance.user),
       action_type="CREATE",
       entity_type="ALBUM_SELECTION_OUTAGE",
       entity_id=instance.pk,
       details={"affected_user": instance.user.pk, "reason": instance.reason}
-    )
\ No newline at end of file
+    )
+
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=AlbumTag)
+@receiver(post_delete, sender=AlbumTag)
+@receiver(post_save, sender=DailyAlbum)
+@receiver(post_delete, sender=DailyAlbum)
+def invalidate_album_catalog(sender, **kwargs):
+  # Any write to albums, their tags or their AOtD days changes the getAllAlbums payload
+  invalidateAlbumCatalog()
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_save, sender=DailyAlbum)
+@receiver(post_save, sender=AotdUserData)
+def recalculate_aotd_chances_on_create(sender, instance, created, **kwargs):
+  # A new album, AOtD selection or enrollment changes selection chances (edits to these rows do not, ownership transfers schedule this from Album.rescue)
+  if created:
+    scheduleAOTDChanceRecalc()
+
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=UserAlbumOutage)
+@receiver(post_delete, sender=UserAlbumOutage)
+def recalculate_aotd_chances(sender, **kwargs):
+  # Album delete and outage create/change/delete change selection chances (flag changes schedule this from utils)
+  scheduleAOTDChanceRecalc()
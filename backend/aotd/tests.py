@@ -1,3 +1,86 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from unittest import mock
+import tempfile
+import time
+
+from backend.test_utils import StubHTTPServer
+from .musicbrainz import MemoryTokenBucket, MusicBrainzClient, MusicBrainzError, MUSICBRAINZ_MAX_ATTEMPTS
+
+
+class MusicBrainzClientTests(SimpleTestCase):
+  def setUp(self):
+    self.stub = StubHTTPServer("/ws/2")
+    self.cache_dir = tempfile.TemporaryDirectory()
+    self.client = MusicBrainzClient(base_url=self.stub.base_url, limiter=MemoryTokenBucket(1000), cache_dir=self.cache_dir.name)
+
+  def tearDown(self):
+    self.client.session.close()
+    self.stub.close()
+    self.cache_dir.cleanup()
+
+  def test_token_bucket_spaces_requests(self):
+    bucket = MemoryTokenBucket(rate=10)
+    self.assertEqual(bucket.reserve(), 0.0)
+    # The burst is spent, the next two reservations are queued one interval apart
+    self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.02)
+    self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.02)
+
+  def test_requests_are_paced_by_the_limiter(self):
+    self.stub.responses = [(200, {}, {'id': "release"})]
+    self.client._limiter = MemoryTokenBucket(rate=20)
+    started = time.monotonic()
+    for _ in range(3):
+      self.client.lookup("release", "mbid", max_age=0)
+    # Three requests at 20/s need at least two intervals
+    self.assertGreaterEqual(time.monotonic() - started, 0.09)
+    self.assertEqual(len(self.stub.requests), 3)
+
+  def test_fresh_cache_entry_is_served_without_a_request(self):
+    self.stub.responses = [(200, {'ETag': '"v1"'}, {'title': "Album"})]
+    self.client.lookup("release", "mbid", ("artists",))
+    self.assertEqual(self.client.lookup("release", "mbid", ("artists",)), {'title': "Album"})
+    self.assertEqual(len(self.stub.requests), 1)
+
+  def test_stale_cache_entry_is_revalidated_with_etag(self):
+    self.stub.responses = [(200, {'ETag': '"v1"'}, {'title': "Album"}), (304, {'ETag': '"v1"'}, None)]
+    first = self.client.lookup("release", "mbid", ("artists",), max_age=0)
+    second = self.client.lookup("release", "mbid", ("artists",), max_age=0)
+    self.assertEqual(first, {'title': "Album"})
+    self.assertEqual(second, first)
+    self.assertNotIn('If-None-Match', self.stub.requests[0][1])
+    self.assertEqual(self.stub.requests[1][1].get('If-None-Match'), '"v1"')
+    # A 304 renews the cached entry
+    cached = self.client.cache.get("release", "mbid", ("artists",))
+    self.assertLess(time.time() - cached['fetched_at'], 5)
+
+  def test_cache_is_keyed_by_inc_set(self):
+    self.stub.responses = [(200, {}, {'title': "Album"})]
+    self.client.lookup("release", "mbid", ("artists",))
+    self.client.lookup("release", "mbid", ("artists", "recordings"))
+    self.assertEqual(len(self.stub.requests), 2)
+
+  @mock.patch("aotd.musicbrainz.time.sleep")
+  def test_throttled_responses_are_retried(self, sleep):
+    self.stub.responses = [(503, {'Retry-After': "2"}, {}), (429, {'Retry-After': "1"}, {}), (200, {}, {'title': "Album"})]
+    self.assertEqual(self.client.lookup("release", "mbid", max_age=0), {'title': "Album"})
+    self.assertEqual(len(self.stub.requests), 3)
+    # Retry-After is honoured (plus up to a second of jitter)
+    delays = [call.args[0] for call in sleep.call_args_list]
+    self.assertTrue(2 <= delays[0] < 3)
+    self.assertTrue(1 <= delays[1] < 2)
+
+  @mock.patch("aotd.musicbrainz.time.sleep")
+  def test_gives_up_after_max_attempts(self, sleep):
+    self.stub.responses = [(503, {'Retry-After': "1"}, {})]
+    with self.assertRaises(MusicBrainzError) as error:
+      self.client.lookup("release", "mbid", max_age=0)
+    self.assertEqual(error.exception.status, 503)
+    self.assertEqual(len(self.stub.requests), MUSICBRAINZ_MAX_ATTEMPTS)
+
+  def test_not_found_is_not_retried(self):
+    self.stub.responses = [(404, {}, {'error': "Not Found"})]
+    with self.assertRaises(MusicBrainzError) as error:
+      self.client.lookup("release", "mbid", max_age=0)
+    self.assertEqual(error.exception.status, 404)
+    self.assertEqual(len(self.stub.requests), 1)
@@ -1,6 +1,9 @@
 from django.http import HttpRequest
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Avg, Sum, StdDev, Q
+from django.db.models import Avg, Sum, StdDev, Q, F, Count, Max, QuerySet, Exists, OuterRef, Prefetch, Window
+from django.db.models.functions import TruncDate, RowNumber
+from django.db import transaction, connection
+from django.core.cache import cache
 
 import logging
 from dotenv import load_dotenv
@@ -8,21 +11,29 @@ import os
 import json
 import base64
 import datetime
-import requests
 import pytz
 from django.utils.timezone import now
 from datetime import timedelta
 import numpy
+import bisect
+import random
+import secrets
+import threading
 
 from users.models import User
+from .musicbrainz import musicbrainz_client
 from .models import (
   AotdUserData,
   Album,
   DailyAlbum,
   UserAlbumOutage,
   Review,
-  ReviewHistory
+  ReviewHistory,
+  AlbumTag,
+  AlbumOwnershipHistory,
+  UserChanceCache
 )
+from reactions.models import Reaction
 
 from users.utils import (
   getUserObj
@@ -35,6 +46,11 @@ logger = logging.getLogger()
 APP_ENV = os.getenv('APP_ENV') or 'DEV'
 load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
 
+# Cache key and lifetime for the serialized album catalog (getAllAlbums). The catalog is invalidated by signals on
+# Album/AlbumTag/DailyAlbum writes, the timeout is only a backstop for per-process cache backends.
+ALBUM_CATALOG_CACHE_KEY = "aotd:album_catalog"
+ALBUM_CATALOG_CACHE_TIMEOUT = 60 * 10
+
 
 ###
 # Returns True if the given user has submitted a review for today's AOTD date (CST).
@@ -89,171 +105,238 @@ def getAlbumRating(mbid, rounded=True, date: datetime.date = None, force_recalc:
   aotd_date = date if (date) else DailyAlbum.objects.filter(album__mbid=mbid).latest('date').date
   # Attempt to get aotd from database
   aotd = DailyAlbum.objects.get(date=aotd_date)
-  # If there is already a value in the databse for this date (not an 11) then return that, else calculate rating 
-  # Also recalculate if the force_recalc is passed in
-  if((not force_recalc) and (aotd.rating != 11)):
-    return (round(aotd.rating) if rounded else aotd.rating)
-  # Retrieve album from database
-  albumObj = aotd.album
-  # Get average review score of album
-  reviewList = Review.objects.filter(album=albumObj, aotd_date=aotd_date)
-  # Return None if the album has not been reviewed
-  if(reviewList.count() == 0):
-    logger.warning(f'Album for date \'{aotd_date.strftime("%Y-%m-%d")}\' has no reviews.')
-    return None
+  # Resolve through the rating layer (stored value for finalized days, live for in progress days)
+  return resolveDayRatings([aotd], rounded=rounded, force_recalc=force_recalc)[aotd.pk]
+
+
+# Rating resolution layer: finalized days (rating != 11) read straight from DailyAlbum.rating, in progress days (or
+# force_recalc) are computed live with a single grouped review query covering every day passed in.
+def resolveDayRatings(aotd_list: list, rounded: bool = False, force_recalc: bool = False) -> dict:
+  '''
+  Resolve ratings for a list of DailyAlbum objects without per-day queries.
+
+  Returns:
+    dict: DailyAlbum pk -> rating (None if the day has no reviews).
+  '''
+  ratings = {}
+  live_days = []
+  for aotd in aotd_list:
+    # If there is already a value in the databse for this date (not an 11) then return that, else calculate rating
+    if((not force_recalc) and (aotd.rating != 11)):
+      ratings[aotd.pk] = (round(aotd.rating) if (rounded and aotd.rating is not None) else aotd.rating)
+    else:
+      live_days.append(aotd)
+  if(len(live_days) == 0):
+    return ratings
   # Calculate Average [DO NOT STORE IN DB UNTIL DAY IS OVER (Handled in Aotd selection method)]
-  avg = reviewList.aggregate(avg=Avg('score'))['avg']
-  rating = ((round(avg * 2) / 2) if (rounded) else (avg)) if (reviewList.count() > 0) else 0.0
-  # Return rating
-  return rating
+  averages = {
+    (row['album_id'], row['aotd_date']): row['avg']
+    for row in Review.objects
+      .filter(aotd_date__in=[aotd.date for aotd in live_days])
+      .values('album_id', 'aotd_date')
+      .annotate(avg=Avg('score'))
+  }
+  for aotd in live_days:
+    avg = averages.get((aotd.album_id, aotd.date))
+    # Return None if the album has not been reviewed
+    if(avg is None):
+      logger.warning(f'Album for date \'{aotd.date.strftime("%Y-%m-%d")}\' has no reviews.')
+      ratings[aotd.pk] = None
+    else:
+      ratings[aotd.pk] = (round(avg * 2) / 2) if (rounded) else (avg)
+  return ratings
 
 
 # Check and set a user's aotd "selection_blocked_flag"
 # NOTE: This works on the idea that at midnight of the next day the user will be blocked, this is so it can be seen earlier on the website when that happens
 #       so a user is marked as blocked from selection if there will have been three days since their last review at the upcoming midnight.
-def checkSelectionFlag(aotd_user: AotdUserData, recent_review_users: list = None, outage_user_ids: set = None):
-  '''Check and set a user's aotd "selection_blocked_flag"
-    NOTE: This works on the idea that at midnight of the next day the user will be blocked, this is so it can be seen earlier on the website when that happens
-          so a user is marked as blocked from selection if there will have been three days since their last review at the upcoming midnight.
-    NOTE: recent_review_users and outage_user_ids can be pre-computed and passed in to avoid repeated DB queries when called in a loop.
+def checkSelectionFlag(aotd_user: AotdUserData):
+  '''Check and set a single user's aotd "selection_blocked_flag" and "active" flag (see evaluateSelectionFlags).'''
+  evaluateSelectionFlags([aotd_user])
+
+
+def evaluateSelectionFlags(aotd_users: list = None, schedule_recalc: bool = True) -> list:
+  '''
+  Evaluate "selection_blocked_flag" and "active" for every passed in AotdUserData (all users if None) and write changes with one bulk_update.
+  Uses one reviewer query (latest review per user over the inactivity window) and one outage query, regardless of the number of users.
+  - A user is blocked if they have not reviewed since two days ago (so the block is visible before it takes effect at midnight).
+  - A user is active if they reviewed in the last 14 days, had an outage in that window, or signed up in that window.
+  - Users under an outage tomorrow are left untouched.
+  Flag changes schedule an AOtD chance recalculation unless schedule_recalc is False.
+  Returns the list of AotdUserData objects that were changed.
   '''
   # Inactive days cutoff
   INACTIVE_DAYS = 14
-  # Get user
-  user = aotd_user.user
+  if(aotd_users is None):
+    aotd_users = list(AotdUserData.objects.select_related('user'))
+  if(len(aotd_users) == 0):
+    return []
+  user_pks = [aotd_user.user_id for aotd_user in aotd_users]
   # Get today in Central time
   today = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
-  # Get tomorrow date
   tomorrow = today + datetime.timedelta(days=1)
-  # Get 14 days ago
-  fortnight_ago = today - datetime.timedelta(days=14)
-  # Get a map of all outages in the last 14 days
-  inactivity_outage_map = list(
-    UserAlbumOutage.objects
-      .filter(Q(start_date__gte=fortnight_ago) | Q(end_date__gte=fortnight_ago))
-      .values_list('user_id', flat=True)
-  )
-  # Check if user is going to be under an outage — use pre-computed set if provided, otherwise query
-  if outage_user_ids is not None:
-    if user.pk in outage_user_ids:
-      logger.info(f"User {user.nickname} is under an outage (pre-computed map)")
-      return
-  else:
-    try:
-      outage = UserAlbumOutage.objects.filter(start_date__lte=tomorrow, end_date__gte=tomorrow).get(user = user)
-      logger.info(f"User {user.nickname} is under an outage until {outage.end_date.strftime('%m/%d/%Y')}")
-      return
-    except UserAlbumOutage.DoesNotExist as e:
-      logger.debug(f"User {user.nickname} is not under an outage")
-  # Use pre-computed reviewer list if provided, otherwise query
-  if recent_review_users is None:
-    selection_cutoff = today - timedelta(days=2)
-    recent_review_users = list(Review.objects.filter(review_date__date__gte=selection_cutoff).values_list('user__discord_id', flat=True).distinct())
-  logger.debug(f"Checking selection blocked flag for user: {aotd_user.user.nickname} [Flag is currently: {aotd_user.selection_blocked_flag}]...")
-  # Check if user is in the list of recent reviewers
-  blocked = aotd_user.user.discord_id not in recent_review_users
-  # If value is different, update it
-  if(aotd_user.selection_blocked_flag != blocked):
-    aotd_user.selection_blocked_flag = blocked
-    logger.info(f"Changing `selection_blocked_flag` to {blocked} for {aotd_user.user.nickname}...")
-    aotd_user.save()
-  # Check if user should be marked as inactive
-  active_users = list(Review.objects.filter(review_date__gte=now() - timedelta(days=INACTIVE_DAYS)).values_list('user__discord_id', flat=True).distinct()) # A user is active if they have reviewed in the last 14 days
-  # A user is active if they are in the active users pool OR they appear in the outages pool as they had an outage or they have an account created within the last 14 days
-  active = (aotd_user.user.discord_id in active_users) or (aotd_user.user.discord_id in inactivity_outage_map) or (aotd_user.creation_timestamp > (now() - timedelta(days=INACTIVE_DAYS)))
-  if(aotd_user.active != active):
-    aotd_user.active = active
-    logger.info(f"Changing `active` flag to {active} for {aotd_user.user.nickname}...")
-    aotd_user.save()
+  fortnight_ago = today - datetime.timedelta(days=INACTIVE_DAYS)
+  selection_cutoff = today - timedelta(days=2)
+  inactive_cutoff = now() - timedelta(days=INACTIVE_DAYS)
+  # Latest review (timestamp and local date) per user over the inactivity window
+  last_reviews = {
+    row['user_id']: row
+    for row in Review.objects
+      .filter(user_id__in=user_pks)
+      .filter(Q(review_date__gte=inactive_cutoff) | Q(review_date__date__gte=selection_cutoff))
+      .values('user_id')
+      .annotate(last_review=Max('review_date'), last_review_day=Max(TruncDate('review_date')))
+  }
+  # Outages touching the inactivity window, split into "in effect tomorrow" and "counts as activity"
+  outage_now_pks = set()
+  outage_recent_pks = set()
+  for outage in UserAlbumOutage.objects.filter(user_id__in=user_pks).filter(Q(start_date__gte=fortnight_ago) | Q(end_date__gte=fortnight_ago)).values('user_id', 'start_date', 'end_date'):
+    outage_recent_pks.add(outage['user_id'])
+    if(outage['start_date'] <= tomorrow <= outage['end_date']):
+      outage_now_pks.add(outage['user_id'])
+  changed = []
+  aotd_user: AotdUserData
+  for aotd_user in aotd_users:
+    # Check if user is going to be under an outage
+    if(aotd_user.user_id in outage_now_pks):
+      logger.info(f"User {aotd_user.user_id} is under an outage, skipping selection flag check")
+      continue
+    last_review = last_reviews.get(aotd_user.user_id)
+    blocked = (last_review is None) or (last_review['last_review_day'] < selection_cutoff)
+    active = ((last_review is not None) and (last_review['last_review'] >= inactive_cutoff)) or (aotd_user.user_id in outage_recent_pks) or (aotd_user.creation_timestamp > inactive_cutoff)
+    if((aotd_user.selection_blocked_flag != blocked) or (aotd_user.active != active)):
+      logger.info(f"Changing flags for user {aotd_user.user_id}: selection_blocked_flag {aotd_user.selection_blocked_flag} -> {blocked}, active {aotd_user.active} -> {active}")
+      aotd_user.selection_blocked_flag = blocked
+      aotd_user.active = active
+      changed.append(aotd_user)
+  if(changed):
+    AotdUserData.objects.bulk_update(changed, ['selection_blocked_flag', 'active'])
+    if(schedule_recalc):
+      scheduleAOTDChanceRecalc()
+  return changed
+
+
+def applyReviewToSelectionFlag(aotd_user: AotdUserData):
+  '''
+  Incremental path for review submission: a review submitted now always unblocks the user and marks them active,
+  so only an outage check is needed (users under an outage tomorrow are left untouched, same as evaluateSelectionFlags).
+  '''
+  if((not aotd_user.selection_blocked_flag) and aotd_user.active):
+    return
+  tomorrow = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date() + datetime.timedelta(days=1)
+  if(UserAlbumOutage.objects.filter(user_id=aotd_user.user_id, start_date__lte=tomorrow, end_date__gte=tomorrow).exists()):
+    return
+  logger.info(f"Review submitted, clearing selection block and marking user {aotd_user.user_id} active...")
+  aotd_user.selection_blocked_flag = False
+  aotd_user.active = True
+  aotd_user.save(update_fields=['selection_blocked_flag', 'active'])
+  # Unblocking changes everyone's selection chances
+  scheduleAOTDChanceRecalc()
+
+
+# Build a single timeline point dict, shared by the full rebuild and the incremental append path
+def buildTimelinePoint(user: User, score: float, timestamp: datetime.datetime, point_type: str, review_id: int, value: float):
+  return {
+    "timestamp": timestamp.astimezone(pytz.UTC).isoformat(),
+    "value": value, # The average value of the album by this timestamp
+    "user_id": user.pk,
+    "user_discord_id": user.discord_id,
+    "user_nickname": user.nickname,
+    "type": point_type,
+    "score": score, # The score given for this object
+    "review_id": review_id
+  }
 
 
 # Iterate all reviews and review updates associate with a given AOtD, returning in a format (sorted by timestamp) showing changes to AOTD average rating over the course of the day
-# This data should be updated to be stored in the database, so as to avoid having to recalculate it every time its viewed
-def generateDayRatingTimeline(aotd_obj: DailyAlbum):
-
-  def createReviewObj(reviewObj: Review):
-    """Generate a review object for the timeline"""
-    return {
-      "timestamp": reviewObj.last_updated.astimezone(pytz.UTC).isoformat(),
-      "value": getAlbumPartialReviewScore(review = reviewObj), # The average value of the album by this timestamp
-      "user_id": reviewObj.user.pk,
-      "user_discord_id": reviewObj.user.discord_id,
-      "user_nickname": reviewObj.user.nickname,
-      "type": "Review",
-      "score": reviewObj.score, # The score given for this object
-      "review_id": reviewObj.pk
-    }
-
-  def createUpdateObj(updateObj: ReviewHistory, is_first_submission: bool = False):
-    """Generate an update object for the timeline"""
-    return {
-      "timestamp": updateObj.last_updated.astimezone(pytz.UTC).isoformat(),
-      "value": getAlbumPartialReviewScore(update = updateObj), # The average value of the album by this timestamp
-      "user_id": updateObj.review.user.pk,
-      "user_discord_id": updateObj.review.user.discord_id,
-      "user_nickname": updateObj.review.user.nickname,
-      "type": "First Update" if is_first_submission else "Update",
-      "score": updateObj.score, # The score given for this object
-      "review_id": updateObj.review.pk
-    }
-  
-  def addToUserStack(trackingObj, updateObj: ReviewHistory):
-    '''
-    Add to user stack and return true if this update changes a users score. (Updates that have no previous version also return true as they altered score.s)
-    Return Data: (Updated Tracking Object, Boolean showing if update was a changing update, Boolean showing if this was the first submission)
-    '''
-    tracking: dict = trackingObj
-    if updateObj.review.user.nickname in trackingObj.keys():
-      status = (tracking[updateObj.review.user.nickname][-1].score != updateObj.score)
-      tracking[updateObj.review.user.nickname].append(updateObj)
-      return tracking, status, False
-    else:
-      tracking[updateObj.review.user.nickname] = [updateObj]
-      return tracking, True, True
-
+# Built in a single pass: every version of every review (history snapshots + the live review) is loaded once, sorted by the time that
+# version became active, and replayed against a running per-user score map and running sum/count so each point is emitted in O(1).
+# If incremental_review is passed in, the point for that review is appended to the stored timeline instead of regenerating the whole day.
+def generateDayRatingTimeline(aotd_obj: DailyAlbum, incremental_review: Review = None):
+  if(incremental_review is not None):
+    appendDayRatingTimelinePoint(aotd_obj, incremental_review)
+    return
   # Retrieve Album and date of aotd
   album = aotd_obj.album
   date = aotd_obj.date
   # Get all album reviews
-  aotd_reviews_list = list(Review.objects.filter(album=album, aotd_date=date).order_by('last_updated'))
-  # Get all album review updates
-  review_updates_list = list(ReviewHistory.objects.filter(review__in=aotd_reviews_list, aotd_date=date).order_by('recorded_at'))
-  # Declare output object, which is a list of values in timestamp order
+  aotd_reviews_list = list(Review.objects.filter(album=album, aotd_date=date).select_related('user'))
+  reviews_by_id = {review.pk: review for review in aotd_reviews_list}
+  # Get all album review updates (history rows are snapshots of the version being overwritten)
+  review_updates_list = list(ReviewHistory.objects.filter(review__in=aotd_reviews_list, aotd_date=date).order_by('last_updated', 'recorded_at'))
+  # Flatten into a list of (active_from, order, review, score, is_history) events
+  events = []
+  for update in review_updates_list:
+    events.append((update.last_updated, 0, reviews_by_id[update.review_id], update.score, True))
+  for review in aotd_reviews_list:
+    events.append((review.last_updated, 1, review, review.score, False))
+  events.sort(key=lambda event: (event[0], event[1]))
+  # Running state
+  user_scores = {}
+  last_history_score = {}
+  running_sum = 0.0
   out = []
-  # Implement a two pointer loop to ensure all of the data is captured from both querysets
-  review_p = 0
-  update_p = 0
-  # Track a list of users and their updates, to more efficiently get changes
-  users_obj = {}
-  # Iterate all events
-  while((review_p != len(aotd_reviews_list)) or (update_p != len(review_updates_list))):
-    curr_review = aotd_reviews_list[review_p] if (review_p != len(aotd_reviews_list)) else None
-    curr_update = review_updates_list[update_p] if (update_p != len(review_updates_list)) else None
-    # Determine the timestamps of each and store the earlier one in the list, then increment
-    if((curr_update == None) or (curr_review.last_updated < curr_update.recorded_at)):
-      out.append(createReviewObj(curr_review))
-      review_p += 1
-    elif((curr_review == None) or (curr_update.recorded_at < curr_review.last_updated)):
-      users_obj, status, first_update = addToUserStack(users_obj, curr_update)
+  for timestamp, _, review, score, is_history in events:
+    user_id = review.user_id
+    # Swap this user's previous score out of the running sum (or add them to the count)
+    if(user_id in user_scores):
+      running_sum -= user_scores[user_id]
+    running_sum += score
+    user_scores[user_id] = score
+    value = running_sum / len(user_scores)
+    if(not is_history):
+      out.append(buildTimelinePoint(review.user, score, timestamp, "Review", review.pk, value))
+    elif(review.pk not in last_history_score):
+      out.append(buildTimelinePoint(review.user, score, timestamp, "First Update", review.pk, value))
+    elif(last_history_score[review.pk] != score):
       # Only add an update to the list if it changed the score
-      if(status): 
-        out.append(createUpdateObj(curr_update, first_update))
-      update_p += 1
-    else: # In the rare event of a simultaneous submission, attach both and increment
-      # Add review object
-      out.append(createReviewObj(curr_review))
-      review_p += 1
-      # Add Update object
-      users_obj, status, first_update = addToUserStack(users_obj, curr_update)
-      # Only add an update to the list if it changed the score
-      if(status): 
-        out.append(createUpdateObj(curr_update, first_update))
-      update_p += 1
+      out.append(buildTimelinePoint(review.user, score, timestamp, "Update", review.pk, value))
+    if(is_history):
+      last_history_score[review.pk] = score
   # Save the object's timeline data
   aotd_obj.rating_timeline={"timeline": out}
   aotd_obj.save()
 
 
+# Append a single review save to a DailyAlbum's stored timeline without regenerating the day.
+# The running per-user score map is rebuilt from the stored points (no review queries), the review's previous
+# "Review" point is relabelled as an update (matching what a full rebuild would produce) and the new point is appended.
+def appendDayRatingTimelinePoint(aotd_obj: DailyAlbum, review: Review):
+  with transaction.atomic():
+    # Lock the row so two simultaneous submissions don't drop each others points
+    aotd_obj = DailyAlbum.objects.select_for_update().get(pk=aotd_obj.pk)
+    timeline = list((aotd_obj.rating_timeline or {}).get("timeline", []))
+    # Rebuild running state from stored points
+    user_scores = {}
+    for point in timeline:
+      user_scores[point['user_id']] = point['score']
+    # If the stored timeline is missing other reviewers (e.g. it was never populated for this day), fall back to a full rebuild
+    known_reviewers = set(user_scores.keys()) | {review.user_id}
+    if(Review.objects.filter(album=aotd_obj.album, aotd_date=aotd_obj.date).count() != len(known_reviewers)):
+      logger.info(f"Stored timeline for {aotd_obj.date} is out of sync with reviews, regenerating full timeline...")
+      generateDayRatingTimeline(aotd_obj)
+      return
+    # Relabel this review's previous live point, it is now a history snapshot
+    review_points = [index for index, point in enumerate(timeline) if point['review_id'] == review.pk]
+    if(review_points and timeline[review_points[-1]]['type'] == "Review"):
+      prev_index = review_points[-1]
+      prev_point = timeline[prev_index]
+      prev_history = [timeline[index] for index in review_points[:-1] if timeline[index]['type'] != "Review"]
+      if(not prev_history):
+        prev_point['type'] = "First Update"
+      elif(prev_history[-1]['score'] != prev_point['score']):
+        prev_point['type'] = "Update"
+      else:
+        # Only keep an update in the list if it changed the score
+        timeline.pop(prev_index)
+    # Apply new score and append
+    user_scores[review.user_id] = review.score
+    value = sum(user_scores.values()) / len(user_scores)
+    timeline.append(buildTimelinePoint(review.user, review.score, review.last_updated, "Review", review.pk, value))
+    aotd_obj.rating_timeline = {"timeline": timeline}
+    aotd_obj.save()
+
+
 # Get the average review score of an album up to a timestamp on any given day
 # Allows retrieval of a score partially thru the day (for timeline purposes)
 def getAlbumPartialReviewScore(album: Album = None, timestamp: datetime.datetime = None, review: Review = None, update: ReviewHistory = None):
@@ -289,81 +372,189 @@ def getAlbumPartialReviewScore(album: Album = None, timestamp: datetime.datetime
   return average
 
 
+# Every AotdUserData field written by the stats engine (used for bulk_update)
+USER_STAT_FIELDS = [
+  'total_reviews', 'missed_reviews', 'review_score_sum', 'average_review_score', 'review_score_stddev', 'median_review_score',
+  'first_listen_percentage', 'lowest_score_given', 'lowest_score_mbid', 'lowest_score_date', 'highest_score_given',
+  'highest_score_mbid', 'highest_score_date', 'review_ratio', 'review_rate', 'total_submissions', 'total_selected',
+  'selection_score_sum', 'average_selection_score'
+]
+
+
 # Update a user review and submission stats in database
-# First step in an attempt at optimizing user review stat retrieval
+# Thin wrapper around the batch engine so single-user callers share the same (constant query count) code path
 def calculateUserReviewData(aotdUserObj: AotdUserData):
-  user = aotdUserObj.user
-  # Get query set of all reviews left by user
-  all_reviews = Review.objects.filter(user=user)
-  # Get a count of total reviews 
-  total_reviews = all_reviews.count()
-  # Get the score of all reviews
-  review_sum = all_reviews.aggregate(Sum('score'))['score__sum']
-  # Get the standard deviation of all reviews from this user
-  review_stddev = all_reviews.aggregate(StdDev('score'))['score__stddev']
-  # Calculate average review score
-  average_review_score = (review_sum/total_reviews) if (total_reviews > 0) else (0.00)
-  # Calculate median review score
-  median_review_score = ((all_reviews.order_by("score")[int(total_reviews/2)].score) if (all_reviews.count() > 0) else 0.00)
-  # Calculate first time review percentage
-  ft_reviews = all_reviews.filter(first_listen=True).count()
-  first_time_listen_percentage = (ft_reviews/total_reviews) if (total_reviews > 0) else (0.00)
-  # Get lowest scored album
-  lowest_review = all_reviews.order_by('score').first()
-  lowest_review_score = lowest_review.score if lowest_review else None
-  lowest_review_mbid = lowest_review.album.mbid if lowest_review else None
-  lowest_review_date = lowest_review.aotd_date if lowest_review else None
-  # Get highest scored album
-  highest_review = all_reviews.order_by('score').last()
-  highest_review_score = highest_review.score if highest_review else None
-  highest_review_mbid = highest_review.album.mbid if highest_review else None
-  highest_review_date = highest_review.aotd_date if highest_review else None
-  # Calculate user's Review KD
-  ## Get date of user's AOTD User Data Creation
-  user_start_date = user.creation_timestamp.date()
-  ## Get count of AOTD objects since this date
+  calculateAllUserReviewData([aotdUserObj])
+
+
+# Return {user_id: {'lowest': (score, mbid, aotd_date), 'median': score, 'highest': (score, mbid, aotd_date)}} for the given users.
+# The median is the review at position total/2 in (score, pk) order, as it has always been (not an interpolated median).
+# Databases with window functions (Postgres) return only those three rows per user, others fall back to an ordered scan in Python.
+def getUserScorePositions(user_ids: list) -> dict:
+  reviews = Review.objects.filter(user_id__in=user_ids)
+  positions = {}
+  if(connection.features.supports_over_clause):
+    for user_id, score, mbid, aotd_date, position, review_count in (
+      reviews
+        .annotate(
+          position=Window(RowNumber(), partition_by=[F('user_id')], order_by=[F('score').asc(), F('pk').asc()]),
+          review_count=Window(Count('pk'), partition_by=[F('user_id')]),
+        )
+        .annotate(median_position=F('review_count') / 2 + 1)
+        .filter(Q(position=1) | Q(position=F('review_count')) | Q(position=F('median_position')))
+        .values_list('user_id', 'score', 'album__mbid', 'aotd_date', 'position', 'review_count')
+    ):
+      entry = positions.setdefault(user_id, {})
+      if(position == 1):
+        entry['lowest'] = (score, mbid, aotd_date)
+      if(position == review_count):
+        entry['highest'] = (score, mbid, aotd_date)
+      if(position == (review_count // 2) + 1):
+        entry['median'] = score
+    return positions
+  user_scores = {}
+  for user_id, score, mbid, aotd_date in reviews.order_by('user_id', 'score', 'pk').values_list('user_id', 'score', 'album__mbid', 'aotd_date'):
+    user_scores.setdefault(user_id, []).append((score, mbid, aotd_date))
+  for user_id, scores in user_scores.items():
+    positions[user_id] = {'lowest': scores[0], 'median': scores[len(scores) // 2][0], 'highest': scores[-1]}
+  return positions
+
+
+# Recompute review and submission stats for many users at once (all users if none are passed in).
+# Runs a fixed number of grouped queries regardless of user count: one aggregate pass over reviews, one for
+# median/lowest/highest (see getUserScorePositions), one for AOtD dates, two for submission stats, then a single bulk_update.
+def calculateAllUserReviewData(aotd_users: list = None):
+  if(aotd_users is None):
+    aotd_users = list(AotdUserData.objects.select_related('user'))
+  if(len(aotd_users) == 0):
+    return
+  user_ids = [aotd_user.user_id for aotd_user in aotd_users]
+  # Grouped review aggregates
+  review_aggs = {
+    row['user_id']: row
+    for row in Review.objects
+      .filter(user_id__in=user_ids)
+      .values('user_id')
+      .annotate(
+        total=Count('id'),
+        score_sum=Sum('score'),
+        score_stddev=StdDev('score'),
+        first_listens=Count('id', filter=Q(first_listen=True))
+      )
+  }
+  # Median, lowest and highest review per user
+  score_positions = getUserScorePositions(user_ids)
+  # All AOtD dates up to today, used to count how many days each user could have reviewed
   today = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
-  possible_aotd_count = DailyAlbum.objects.filter(date__gte=user_start_date).filter(date__lte=today).count()
-  ## Calculate count of days that user did not review
-  user_missed_review_count = possible_aotd_count - total_reviews
-  ## Calculate review ratio
-  try:
-    review_ratio: float = total_reviews/user_missed_review_count
-    review_rate: float = ((total_reviews/possible_aotd_count) * 100)
-  except ZeroDivisionError: 
-    review_ratio: float = total_reviews
-    review_rate: float = 0.00
-  # Get submission stats
-  total_subs = Album.objects.filter(submitted_by=user).count()
-  total_select = DailyAlbum.objects.filter(album__submitted_by=user)
-  select_score_sum = total_select.aggregate(Sum('rating'))['rating__sum']
-  try:
-    average_select_score = ((select_score_sum)/(total_select.count()))
-  except:
-    average_select_score = 0
-  # Update user data
-  aotdUserObj.total_reviews = total_reviews
-  aotdUserObj.missed_reviews = user_missed_review_count
-  aotdUserObj.review_score_sum = review_sum if review_sum is not None else 0
-  aotdUserObj.average_review_score = average_review_score
-  aotdUserObj.review_score_stddev = review_stddev if review_stddev is not None else 0
-  aotdUserObj.median_review_score = median_review_score
-  aotdUserObj.first_listen_percentage = first_time_listen_percentage
-  aotdUserObj.lowest_score_given = lowest_review_score
-  aotdUserObj.lowest_score_mbid = lowest_review_mbid
-  aotdUserObj.lowest_score_date = lowest_review_date
-  aotdUserObj.highest_score_given = highest_review_score
-  aotdUserObj.highest_score_mbid = highest_review_mbid
-  aotdUserObj.highest_score_date = highest_review_date
-  aotdUserObj.review_ratio = review_ratio
-  aotdUserObj.review_rate = review_rate
-  # Update user Selection/Submission Data
-  aotdUserObj.total_submissions = total_subs
-  aotdUserObj.total_selected = total_select.count()
-  aotdUserObj.selection_score_sum = select_score_sum if (select_score_sum != None) else 0
-  aotdUserObj.average_selection_score = average_select_score
+  aotd_dates = list(DailyAlbum.objects.filter(date__lte=today).order_by('date').values_list('date', flat=True))
+  # Submission stats
+  submission_counts = dict(
+    Album.objects.filter(submitted_by_id__in=user_ids).values('submitted_by_id').annotate(total=Count('pk')).values_list('submitted_by_id', 'total')
+  )
+  selection_aggs = {
+    row['album__submitted_by_id']: row
+    for row in DailyAlbum.objects
+      .filter(album__submitted_by_id__in=user_ids)
+      .values('album__submitted_by_id')
+      .annotate(total=Count('id'), rating_sum=Sum('rating'))
+  }
+  # Fill every user in memory
+  for aotdUserObj in aotd_users:
+    aggs = review_aggs.get(aotdUserObj.user_id, {})
+    positions = score_positions.get(aotdUserObj.user_id, {})
+    total_reviews = aggs.get('total', 0)
+    review_sum = aggs.get('score_sum')
+    review_stddev = aggs.get('score_stddev')
+    # Calculate user's Review KD (AOtD days since the user joined versus reviews left)
+    user_start_date = aotdUserObj.user.creation_timestamp.date()
+    possible_aotd_count = len(aotd_dates) - bisect.bisect_left(aotd_dates, user_start_date)
+    user_missed_review_count = possible_aotd_count - total_reviews
+    try:
+      review_ratio: float = total_reviews/user_missed_review_count
+      review_rate: float = ((total_reviews/possible_aotd_count) * 100)
+    except ZeroDivisionError:
+      review_ratio: float = total_reviews
+      review_rate: float = 0.00
+    lowest = positions.get('lowest', (None, None, None))
+    highest = positions.get('highest', (None, None, None))
+    selection = selection_aggs.get(aotdUserObj.user_id, {})
+    select_score_sum = selection.get('rating_sum')
+    try:
+      average_select_score = ((select_score_sum)/(selection.get('total', 0)))
+    except:
+      average_select_score = 0
+    # Update user data
+    aotdUserObj.total_reviews = total_reviews
+    aotdUserObj.missed_reviews = user_missed_review_count
+    aotdUserObj.review_score_sum = review_sum if review_sum is not None else 0
+    aotdUserObj.average_review_score = (review_sum/total_reviews) if (total_reviews > 0) else (0.00)
+    aotdUserObj.review_score_stddev = review_stddev if review_stddev is not None else 0
+    aotdUserObj.median_review_score = positions.get('median', 0.00)
+    aotdUserObj.first_listen_percentage = (aggs.get('first_listens', 0)/total_reviews) if (total_reviews > 0) else (0.00)
+    aotdUserObj.lowest_score_given, aotdUserObj.lowest_score_mbid, aotdUserObj.lowest_score_date = lowest
+    aotdUserObj.highest_score_given, aotdUserObj.highest_score_mbid, aotdUserObj.highest_score_date = highest
+    aotdUserObj.review_ratio = review_ratio
+    aotdUserObj.review_rate = review_rate
+    # Update user Selection/Submission Data
+    aotdUserObj.total_submissions = submission_counts.get(aotdUserObj.user_id, 0)
+    aotdUserObj.total_selected = selection.get('total', 0)
+    aotdUserObj.selection_score_sum = select_score_sum if (select_score_sum != None) else 0
+    aotdUserObj.average_selection_score = average_select_score
   # Save user data
-  aotdUserObj.save()
+  AotdUserData.objects.bulk_update(aotd_users, USER_STAT_FIELDS)
+
+
+# Fast path for a single review save: update counts, sums, stddev and min/max in place from the changed review
+# instead of rescanning the user's history. Falls back to a full recalculation when the in place update cannot be exact
+# (stats never calculated, or the user's lowest/highest review moved inward).
+def applyReviewToUserData(aotdUserObj: AotdUserData, review: Review, created: bool, previous_score: float = None, previous_first_listen: bool = None):
+  if((aotdUserObj.total_reviews is None) or ((not created) and (previous_score is None))):
+    calculateUserReviewData(aotdUserObj)
+    return
+  old_total = aotdUserObj.total_reviews
+  score = review.score
+  # Lowest/highest can only be updated in place if they move outward (or the changed review was not the extreme)
+  if((not created) and (previous_score != score)):
+    if(((previous_score == aotdUserObj.lowest_score_given) and (score > previous_score)) or ((previous_score == aotdUserObj.highest_score_given) and (score < previous_score))):
+      calculateUserReviewData(aotdUserObj)
+      return
+  # Recover running sum of squares from the stored (population) stddev
+  old_mean = (aotdUserObj.review_score_sum / old_total) if (old_total > 0) else 0.0
+  sum_squares = ((aotdUserObj.review_score_stddev ** 2) + (old_mean ** 2)) * old_total
+  first_listens = round(aotdUserObj.first_listen_percentage * old_total)
+  if(created):
+    total = old_total + 1
+    score_sum = aotdUserObj.review_score_sum + score
+    sum_squares += score ** 2
+    first_listens += 1 if review.first_listen else 0
+  else:
+    total = old_total
+    score_sum = aotdUserObj.review_score_sum - previous_score + score
+    sum_squares += (score ** 2) - (previous_score ** 2)
+    first_listens += (1 if review.first_listen else 0) - (1 if previous_first_listen else 0)
+  mean = score_sum / total
+  aotdUserObj.total_reviews = total
+  aotdUserObj.review_score_sum = score_sum
+  aotdUserObj.average_review_score = mean
+  aotdUserObj.review_score_stddev = numpy.sqrt(max(0.0, (sum_squares / total) - (mean ** 2)))
+  aotdUserObj.first_listen_percentage = first_listens / total
+  # Median still needs the sorted position (one windowed query on Postgres)
+  aotdUserObj.median_review_score = getUserScorePositions([aotdUserObj.user_id]).get(aotdUserObj.user_id, {}).get('median', 0.00)
+  if((aotdUserObj.lowest_score_given is None) or (score < aotdUserObj.lowest_score_given)):
+    aotdUserObj.lowest_score_given, aotdUserObj.lowest_score_mbid, aotdUserObj.lowest_score_date = score, review.album.mbid, review.aotd_date
+  if((aotdUserObj.highest_score_given is None) or (score > aotdUserObj.highest_score_given)):
+    aotdUserObj.highest_score_given, aotdUserObj.highest_score_mbid, aotdUserObj.highest_score_date = score, review.album.mbid, review.aotd_date
+  # Review KD, possible days = AOtD days since the user joined (one count, same range as calculateAllUserReviewData)
+  today = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
+  possible_aotd_count = DailyAlbum.objects.filter(date__gte=aotdUserObj.user.creation_timestamp.date(), date__lte=today).count()
+  aotdUserObj.missed_reviews = possible_aotd_count - aotdUserObj.total_reviews
+  try:
+    aotdUserObj.review_ratio = aotdUserObj.total_reviews/aotdUserObj.missed_reviews
+    aotdUserObj.review_rate = ((aotdUserObj.total_reviews/possible_aotd_count) * 100)
+  except ZeroDivisionError:
+    aotdUserObj.review_ratio = aotdUserObj.total_reviews
+    aotdUserObj.review_rate = 0.00
+  aotdUserObj.save(update_fields=USER_STAT_FIELDS)
 
 
 def update_user_streak(user: User, date_override: datetime.date | None = None):
@@ -391,24 +582,20 @@ def update_user_streak(user: User, date_override: datetime.date | None = None):
   profile.save()
 
 
-def get_album_from_mb(mbid: str) -> Album:
+def get_album_from_mb(mbid: str, max_age: int = None) -> Album:
   '''Given and mbid, query musicbrainz and get data about the album. Then return an UNSAVED Album object. 
      WARNING: submitted_by and user comment need to be populated. 
      
      NOTE: ALBUM OBJECT MUST BE SAVED TO GO INTO THE DATABASE
   '''
+  # Query musicbrainz to get full album data using mbid (to avoid issues with params), through the shared rate limited client
+  data = musicbrainz_client.fetch_release(mbid, max_age=max_age)
+  return buildAlbumFromRelease(data)
+
+
+def buildAlbumFromRelease(data: dict) -> Album:
+  '''Build an UNSAVED Album object from a musicbrainz release lookup (artists+release-groups+recordings+genres).'''
   from .views_album import parseReleaseDate
-  # Query musicbrainz to get full album data using mbid (to avoid issues with params)
-  url =  f"https://musicbrainz.org/ws/2/release/{mbid}"
-  params = {
-    'inc': 'artists+release-groups+recordings+genres',
-    'fmt': 'json'
-  }
-  headers = {
-    'User-Agent': 'CordPal/0.0.1 ( www.cordpal.app )'
-  }
-  response = requests.get(url, params=params, headers=headers)
-  data = response.json()
   # Parse full track list
   track_list = []
   # Iterate each side/disk of the release
@@ -465,4 +652,204 @@ def retrieveAlbumSTD(mbid: str, date: str = None, force: bool = False) -> float:
   # Store in DB and return
   aotdObj.standard_deviation = standardDev
   aotdObj.save()
-  return aotdObj.standard_deviation
\ No newline at end of file
+  return aotdObj.standard_deviation
+
+
+def invalidateAlbumCatalog():
+  '''Drop the cached album catalog, called from signals whenever an Album, AlbumTag or DailyAlbum is written.'''
+  cache.delete(ALBUM_CATALOG_CACHE_KEY)
+
+
+def getEligibleAlbumPool(day: datetime.date, blocked_discord_ids: list, outage_discord_ids: list) -> list:
+  '''
+  Return the pks (sorted, so draws are reproducible) of every album eligible to be AOtD on the given day.
+  Built in one query: albums from blocked or outage users are excluded and albums picked within the last two years
+  are removed with an anti-join against DailyAlbum.
+  '''
+  two_year_ago = day - datetime.timedelta(days=730)
+  recent_pick = DailyAlbum.objects.filter(album=OuterRef('pk'), date__gte=two_year_ago)
+  return list(
+    Album.objects
+      .exclude(submitted_by__discord_id__in=blocked_discord_ids)
+      .exclude(submitted_by__discord_id__in=outage_discord_ids)
+      .exclude(Exists(recent_pick))
+      .order_by('pk')
+      .values_list('pk', flat=True)
+  )
+
+
+def drawAlbumFromPool(album_pool: list, seed: int = None):
+  '''
+  Draw a single album pk from an eligible pool. Returns (album_pk, seed); passing the same seed and pool replays the same draw.
+  Returns (None, seed) if the pool is empty.
+  '''
+  if(seed is None):
+    seed = secrets.randbits(63)
+  if(len(album_pool) == 0):
+    return None, seed
+  return random.Random(seed).choice(album_pool), seed
+
+
+def serializeReviews(reviews: QuerySet, full: bool = False, include_streak: bool = False) -> list:
+  '''
+  Serialize a Review queryset to the same JSON shape as Review.toJSON in a fixed number of queries.
+  Users (and their AotdUserData when include_streak is set) and albums (without raw_data/track_list) are joined in,
+  reactions and their users are prefetched and grouped in Python, and ownership history is prefetched for full album output.
+  Parameters:
+  - full: Boolean - Include the serialized album on each review (same as Review.toJSON(full=True))
+  - include_streak: Boolean - Attach user_streak_data to each review (as returned by getReviewsForAlbum)
+  '''
+  related = ['user', 'album']
+  if(include_streak):
+    related.append('user__aotd_data')
+  prefetches = [Prefetch('reactions', queryset=Reaction.objects.select_related('user'))]
+  if(full):
+    related.append('album__submitted_by')
+    prefetches.append(Prefetch('album__ownership_history', queryset=AlbumOwnershipHistory.objects.select_related('previous_owner')))
+  queryset = (
+    reviews
+      .select_related(*related)
+      .defer('album__raw_data', 'album__track_list')
+      .prefetch_related(*prefetches)
+  )
+  out = []
+  review: Review
+  for review in queryset:
+    outObj = review.toJSON(full=full)
+    if(include_streak):
+      userAotdData: AotdUserData = review.user.aotd_data
+      outObj['user_streak_data'] = {
+        "current_streak": userAotdData.current_streak,
+        "longest_streak": userAotdData.longest_streak,
+        "last_review_date": userAotdData.last_review_date,
+        "streak_at_risk": userAotdData.isStreakAtRisk()
+      }
+    out.append(outObj)
+  return out
+
+
+def reconcileTagVoteCounters(dry_run: bool = False) -> list:
+  '''
+  Rebuild AlbumTag upvotes/downvotes/net_score (and is_approved) from Vote rows using one grouped query.
+  Returns a list of (tag, old_counters, new_counters) for every tag that had drifted, these are written back with a single bulk_update unless dry_run is set.
+  '''
+  from django.contrib.contenttypes.models import ContentType
+  from votes.models import Vote
+  ct = ContentType.objects.get_for_model(AlbumTag)
+  counts = {
+    row['object_id']: (row['up'], row['down'])
+    for row in Vote.objects.filter(content_type=ct)
+      .values('object_id')
+      .annotate(up=Count('id', filter=Q(vote_type=Vote.UPVOTE)), down=Count('id', filter=Q(vote_type=Vote.DOWNVOTE)))
+  }
+  drifted = []
+  tag: AlbumTag
+  for tag in AlbumTag.objects.select_related('album').only('pk', 'tag_text', 'album__title', 'upvotes', 'downvotes', 'net_score', 'is_approved'):
+    up, down = counts.get(tag.pk, (0, 0))
+    old = (tag.upvotes, tag.downvotes, tag.net_score, tag.is_approved)
+    new = (up, down, up - down, (up - down) >= AlbumTag.APPROVAL_THRESHOLD)
+    if(old != new):
+      tag.upvotes, tag.downvotes, tag.net_score, tag.is_approved = new
+      drifted.append((tag, old, new))
+  if(drifted and not dry_run):
+    AlbumTag.objects.bulk_update([tag for tag, _, _ in drifted], ['upvotes', 'downvotes', 'net_score', 'is_approved'], batch_size=500)
+    invalidateAlbumCatalog()
+  return drifted
+
+
+def calculateAllAOTDChances() -> int:
+  '''
+  Recompute every user's chance of being selected as the next AOtD and upsert all UserChanceCache rows at once.
+  Per-user eligible album counts come from one grouped query (same anti-join as getEligibleAlbumPool), chances are computed
+  as one NumPy pass over those counts, and outage/last-review details for blocked users are fetched in one query each.
+  Returns the number of rows written.
+  '''
+  # Get current date
+  day = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
+  tomorrow = day + datetime.timedelta(days=1)
+  two_year_ago = day - datetime.timedelta(days=730)
+  user_list = list(AotdUserData.objects.select_related('user'))
+  if(len(user_list) == 0):
+    return 0
+  # Refresh selection flags first, they decide who is in the pool
+  evaluateSelectionFlags(user_list, schedule_recalc=False)
+  # Outages in effect tomorrow (user pk -> outage)
+  outages = {outage.user_id: outage for outage in UserAlbumOutage.objects.filter(start_date__lte=tomorrow, end_date__gte=tomorrow)}
+  # Eligible (not picked in the last two years) album count per submitter
+  recent_pick = DailyAlbum.objects.filter(album=OuterRef('pk'), date__gte=two_year_ago)
+  eligible_counts = dict(
+    Album.objects
+      .exclude(Exists(recent_pick))
+      .values('submitted_by_id')
+      .annotate(eligible=Count('pk'))
+      .values_list('submitted_by_id', 'eligible')
+  )
+  # Last reviewed AOtD date for blocked users
+  blocked_pks = [aotd_user.user_id for aotd_user in user_list if aotd_user.selection_blocked_flag and aotd_user.user_id not in outages]
+  last_review_dates = dict(
+    Review.objects.filter(user_id__in=blocked_pks).values('user_id').annotate(last=Max('aotd_date')).values_list('user_id', 'last')
+  ) if blocked_pks else {}
+  # Vectorized chance computation over users in the selection pool
+  counts = numpy.array([eligible_counts.get(aotd_user.user_id, 0) for aotd_user in user_list], dtype=float)
+  in_pool = numpy.array([(not aotd_user.selection_blocked_flag) and (aotd_user.user_id not in outages) for aotd_user in user_list], dtype=bool)
+  pool_counts = numpy.where(in_pool, counts, 0.0)
+  total_eligible = pool_counts.sum()
+  chances = numpy.round((pool_counts / total_eligible) * 100.0, 3) if (total_eligible > 0) else numpy.zeros(len(user_list))
+  # Build cache rows and upsert them in one statement
+  rows = []
+  for aotd_user, chance in zip(user_list, chances):
+    row = UserChanceCache(aotd_user=aotd_user, chance_percentage=float(chance), block_type=None, outage=None, reason=None, last_updated=now())
+    if(aotd_user.user_id in outages):
+      outage = outages[aotd_user.user_id]
+      row.chance_percentage = 0.00
+      row.block_type = "OUTAGE"
+      row.outage = outage
+      row.reason = f"{outage.reason}"
+    elif(aotd_user.selection_blocked_flag):
+      days_since = day - last_review_dates.get(aotd_user.user_id, day)
+      row.chance_percentage = 0.00
+      row.block_type = "INACTIVITY"
+      row.reason = f"Inactivity, user has not reviewed in over two days. Last review was {days_since.days} days ago."
+    rows.append(row)
+  UserChanceCache.objects.bulk_create(
+    rows,
+    update_conflicts=True,
+    unique_fields=['aotd_user'],
+    update_fields=['chance_percentage', 'block_type', 'outage', 'reason', 'last_updated']
+  )
+  logger.info(f"Recalculated AOtD chances for {len(rows)} users ({int(total_eligible)} eligible albums)")
+  return len(rows)
+
+
+class _ChanceRecalc:
+  """One pending recalculation, shared by every trigger until it runs."""
+
+  def __init__(self):
+    self.done = False
+
+  def run(self):
+    if(self.done):
+      return
+    self.done = True
+    try:
+      calculateAllAOTDChances()
+    except Exception as e:
+      logger.error(f"Failed to recalculate AOtD chances: {e}")
+
+
+# Pending recalculation of this thread (each thread has its own connection, and so its own transaction)
+_chance_recalc_local = threading.local()
+
+def scheduleAOTDChanceRecalc():
+  '''
+  Queue a recalculation of all AOtD chances for when the current transaction commits (runs immediately in autocommit).
+  Several triggering writes inside one transaction (e.g. cascading deletes) only recalculate once.
+  Called from the events that change chances: album submit/transfer/delete, outage create/delete, AOtD selection, flag changes and enrollment.
+  '''
+  # Every trigger registers a callback (so a rolled back savepoint can never drop the recalculation), but they all share
+  # one pending recalculation that only runs for the first of them to fire
+  pending = getattr(_chance_recalc_local, 'pending', None)
+  if((pending is None) or pending.done):
+    pending = _ChanceRecalc()
+    _chance_recalc_local.pending = pending
+  transaction.on_commit(pending.run)
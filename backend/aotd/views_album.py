@@ -6,7 +6,9 @@ from .utils import (
   calculateUserReviewData,
   get_album_from_mb,
   retrieveAlbumSTD,
-  hasReviewedToday
+  hasReviewedToday,
+  ALBUM_CATALOG_CACHE_KEY,
+  ALBUM_CATALOG_CACHE_TIMEOUT
 )
 from users.utils import getUserObj
 from .models import (
@@ -15,7 +17,8 @@ from .models import (
   AlbumCommentHistory,
   AlbumOwnershipHistory,
   Review,
-  DailyAlbum
+  DailyAlbum,
+  AlbumTag
 )
 
 
@@ -27,7 +30,8 @@ import datetime
 import pytz
 import requests
 from datetime import timedelta
-from django.db.models import Count, Q, F
+from django.db.models import Count, Q, F, Prefetch, Exists, OuterRef
+from django.core.cache import cache
 from django.db.models.fields.json import KeyTransform
 
 # Declare logging
@@ -389,15 +393,10 @@ def replaceAlbum(request: HttpRequest, album_pk: str, new_mbid: str):
 
 
 ###
-# Get ALL Album from the album of the day pool.
+# Build the serialized album catalog used by getAllAlbums in a fixed number of queries:
+# latest DailyAlbum per album (DISTINCT ON), albums + submitters, and approved tags (vote counts are stored on the tag).
 ###
-def getAllAlbums(request: HttpRequest):
-  # Make sure request is a get request
-  if(request.method != "GET"):
-    logger.warning(f"getAllAlbums called with a non-GET method, returning 405.", extra={'crid': request.crid})
-    res = HttpResponse("Method not allowed")
-    res.status_code = 405
-    return res
+def buildAlbumCatalog() -> list:
   now = datetime.datetime.now(tz=pytz.timezone('America/Chicago'))
   # Single DISTINCT ON query: latest DailyAlbum per album — replaced 3 correlated subqueries
   latest_daily = {
@@ -408,12 +407,13 @@ def getAllAlbums(request: HttpRequest):
       .distinct('album_id')
       .values('album_id', 'date', 'rating', 'standard_deviation')
   }
-  # Add filters to list
+  # Add filters to list, approved tags are prefetched in a single query
   albums = list(
     Album.objects
     .select_related('submitted_by')
     .defer('raw_data')
     .annotate(genres=KeyTransform('genres', KeyTransform('release-group', 'raw_data')))
+    .prefetch_related(Prefetch('tags', queryset=AlbumTag.objects.filter(is_approved=True), to_attr='approved_tags'))
   )
   albumList = []
   for album in albums:
@@ -441,7 +441,6 @@ def getAllAlbums(request: HttpRequest):
       },
       'submitter': user.discord_id if user else None,
       'submitter_avatar_url': user.get_avatar_url() if user else None,
-      'submitter_active': AotdUserData.objects.get(user=user).active if user else None,
       'submitter_nickname': user.nickname if user else None,
       'submitter_comment': album.user_comment,
       'submission_date': album.submission_date.strftime("%m/%d/%Y, %H:%M:%S"),
@@ -452,11 +451,36 @@ def getAllAlbums(request: HttpRequest):
       'standard_deviation': effective_stddev,
       'genre_list': genre_list,
       # Get user generated tags for the album
-      'tags': [tag.toJSON(short=True) for tag in album.tags.filter(is_approved=True)],
+      'tags': [tag.toJSON(short=True) for tag in album.approved_tags],
       # Add track list (legacy albums may store a plain list instead of {"tracks": [...]})
       'track_list': [trackObj['title'] for trackObj in (album.track_list.get('tracks', []) if isinstance(album.track_list, dict) else (album.track_list or []))]
     })
+  return albumList
+
 
+###
+# Get ALL Album from the album of the day pool.
+###
+def getAllAlbums(request: HttpRequest):
+  # Make sure request is a get request
+  if(request.method != "GET"):
+    logger.warning(f"getAllAlbums called with a non-GET method, returning 405.", extra={'crid': request.crid})
+    res = HttpResponse("Method not allowed")
+    res.status_code = 405
+    return res
+  # Serve the catalog from cache when possible (invalidated by signals on Album/AlbumTag/DailyAlbum writes)
+  albumList = cache.get(ALBUM_CATALOG_CACHE_KEY)
+  if(albumList is None):
+    albumList = buildAlbumCatalog()
+    cache.set(ALBUM_CATALOG_CACHE_KEY, albumList, ALBUM_CATALOG_CACHE_TIMEOUT)
+  else:
+    logger.debug(f"Serving album catalog from cache ({len(albumList)} albums)...", extra={'crid': request.crid})
+  # Submitter activity changes far more often than the catalog itself, so merge it in with one bulk query per request
+  active_map = dict(AotdUserData.objects.values_list('user__discord_id', 'active'))
+  albumList = [
+    {**album, 'submitter_active': active_map.get(album['submitter']) if album['submitter'] else None}
+    for album in albumList
+  ]
   return JsonResponse({"timestamp": datetime.datetime.now(), "albums_list": albumList})
 
 
@@ -504,19 +528,29 @@ def getLastXSubOrRescueAlbums(request: HttpRequest, count: int):
   '''
   Return the last X submitted or rescued albums for use with the "Recent Album Submissions" UI
   '''
-  from users.models import UserAction
+  from users.models import UserAction, User
   # Make sure request is a get request
   if(request.method != "GET"):
     logger.warning(f"getLastXSubOrRescueAlbums called with a non-GET method, returning 405.", extra={'crid': request.crid})
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Get last X count of albums, excluding any that have since been deleted
-  existing_album_ids = Album.objects.values_list('id', flat=True)
-  last_X_submissions_or_rescues = UserAction.objects.filter(
-    (Q(action_type='CREATE', entity_type='ALBUM') | Q(action_type='UPDATE', entity_type='ALBUM_OWNER')),
-    entity_id__in=existing_album_ids
-  ).order_by('-timestamp')[:count]
+  # Get last X submissions/rescues (newest first on the (entity_type, action_type, id) index), excluding any albums that have since been deleted
+  last_X_submissions_or_rescues = list(
+    UserAction.objects
+      .filter(Q(action_type='CREATE', entity_type='ALBUM') | Q(action_type='UPDATE', entity_type='ALBUM_OWNER'))
+      .filter(Exists(Album.objects.filter(id=OuterRef('entity_id'))))
+      .order_by('-id')[:count]
+  )
+  # Load every referenced album (with ownership history for toJSON) and owner nickname in bulk
+  albums = Album.objects.select_related('submitted_by').defer('raw_data', 'track_list').prefetch_related(
+    Prefetch('ownership_history', queryset=AlbumOwnershipHistory.objects.select_related('previous_owner'))
+  ).in_bulk([album_action.entity_id for album_action in last_X_submissions_or_rescues])
+  owner_ids = set()
+  for album_action in last_X_submissions_or_rescues:
+    if(album_action.action_type == "UPDATE"):
+      owner_ids.update([album_action.details.get('new_owner_id'), album_action.details.get('previous_owner_id')])
+  nicknames = dict(User.objects.filter(discord_id__in=[owner_id for owner_id in owner_ids if owner_id]).values_list('discord_id', 'nickname')) if owner_ids else {}
   # Build list of custom Album Objects
   action_list = []
   for album_action in last_X_submissions_or_rescues:
@@ -524,12 +558,12 @@ def getLastXSubOrRescueAlbums(request: HttpRequest, count: int):
     obj['action'] = album_action.action_type
     obj['entity'] = album_action.entity_type
     obj['entity_id'] = album_action.entity_id
-    obj['album'] = Album.objects.get(id=album_action.entity_id).toJSON(include_raw=False)
+    obj['album'] = albums[album_action.entity_id].toJSON(include_raw=False)
     obj['action_details'] = album_action.details
     if(album_action.action_type == "UPDATE"):
       # Dynamically append user data if it appears in action details (TODO: Make this more dynamic than just hardcoded stuff)
-      obj['action_details']['new_owner_nick'] = AotdUserData.objects.get(user__discord_id=obj['action_details']['new_owner_id']).user.nickname
-      obj['action_details']['previous_owner_nick'] = AotdUserData.objects.get(user__discord_id=obj['action_details']['previous_owner_id']).user.nickname
+      obj['action_details']['new_owner_nick'] = nicknames.get(obj['action_details'].get('new_owner_id'))
+      obj['action_details']['previous_owner_nick'] = nicknames.get(obj['action_details'].get('previous_owner_id'))
     # Append to List
     action_list.append(obj)
   return JsonResponse({ "action_list": action_list, "timestamp" : datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")})
@@ -1,15 +1,19 @@
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.forms.models import model_to_dict
-from django.db.models import Count, Q
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.core import management
 
 from .utils import (
-  checkSelectionFlag,
+  evaluateSelectionFlags,
+  calculateAllAOTDChances,
   getAotdUserObj,
   getAlbumRating,
   generateDayRatingTimeline,
-  retrieveAlbumSTD
+  retrieveAlbumSTD,
+  getEligibleAlbumPool,
+  drawAlbumFromPool,
+  resolveDayRatings
 )
 from .models import (
   Album,
@@ -17,15 +21,16 @@ from .models import (
   AotdUserData,
   Review,
   UserAlbumOutage,
-  UserChanceCache
+  UserChanceCache,
+  AlbumTag
 )
+from discordapi.avatars import scheduleAvatarSweep
 
 import logging
 from dotenv import load_dotenv
 import os
 import datetime
 import pytz
-import random
 import traceback
 import json
 
@@ -90,9 +95,9 @@ def setAlbumOfDay(request: HttpRequest):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Check and set selection flags for all users
-  for spot_user in AotdUserData.objects.all():
-    checkSelectionFlag(spot_user)
+  # Check and set selection flags for all users (one reviewer query, one outage query, one bulk update)
+  # Chances are recalculated once the new DailyAlbum is created, so flag changes do not schedule their own recalculation here
+  evaluateSelectionFlags(schedule_recalc=False)
   # Get current date
   day = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
   # Calculate yesterday's data
@@ -113,41 +118,33 @@ def setAlbumOfDay(request: HttpRequest):
     return HttpResponse(f"WARN: Album of the day already selected: {currDayAlbum}", status=425)
   except DailyAlbum.DoesNotExist:
     logger.info(f"{request.crid} - Today does not yet have an album, selecting one...", extra={'crid': request.crid})
-  # Get Date a two years ago to filter by
-  two_year_ago = day - datetime.timedelta(days=730)
-  # Define a boolean for selecting the right album
-  selected = False
-  # Define Album Object
-  albumOfTheDay = None
   # Get all users currently in an outage
   outage_users = list(UserAlbumOutage.objects.filter(start_date__lte=day, end_date__gte=day).values_list('user__discord_id', flat=True))
   logger.warning(f"Outage Users: {outage_users}", extra={'crid': request.crid})
   # Get list of all users who are currently AOtD selection blocked
   blocked_users = list(AotdUserData.objects.filter(selection_blocked_flag=True).values_list('user__discord_id', flat=True))
   logger.warning(f"Blocked Users: {blocked_users}", extra={'crid': request.crid})
-  # Get set of all eligible albums
-  albumPool = Album.objects.all().exclude(submitted_by__discord_id__in=blocked_users).exclude(submitted_by__discord_id__in=outage_users)
-  while(not selected):
-    # If no eligible albums, error out..
-    if(len(albumPool) == 0):
-      logger.error(f"WARNING! NO ELIGIBLE ALBUMS FOR SELECTION! NO ALBUM WILL BE SELECTED", extra={'crid': request.crid})
-      return HttpResponse(f'No albums eligible for selection!', status=404)
-    # Filter out blocked users albums
-    tempAlbum = random.choice(albumPool)
-    logger.info(f"Temp album selected: {tempAlbum.title}", extra={'crid': request.crid})
-    albumCheck = DailyAlbum.objects.filter(date__gte=two_year_ago).filter(album=tempAlbum).count()
-    if(albumCheck != 0):
-      albumPool = albumPool.exclude(mbid=tempAlbum.mbid)
-    else:
-      albumOfTheDay = tempAlbum
-      selected = True
+  # Get set of all eligible albums (excludes blocked/outage users and anything picked in the last two years)
+  albumPool = getEligibleAlbumPool(day, blocked_users, outage_users)
+  # Draw a single album, the seed is stored on the DailyAlbum so the draw can be audited and replayed
+  albumPk, selectionSeed = drawAlbumFromPool(albumPool)
+  # If no eligible albums, error out..
+  if(albumPk is None):
+    logger.error(f"WARNING! NO ELIGIBLE ALBUMS FOR SELECTION! NO ALBUM WILL BE SELECTED", extra={'crid': request.crid})
+    return HttpResponse(f'No albums eligible for selection!', status=404)
+  albumOfTheDay = Album.objects.select_related('submitted_by').get(pk=albumPk)
+  logger.info(f"Album selected: {albumOfTheDay.title} (seed: {selectionSeed}, pool size: {len(albumPool)})", extra={'crid': request.crid})
   # Create an album of the day object
   albumOfTheDayObj = DailyAlbum(
     album=albumOfTheDay,
-    date=day
+    date=day,
+    selection_seed=selectionSeed,
+    selection_pool_size=len(albumPool)
   )
   # Save object
   albumOfTheDayObj.save()
+  # Kick off the daily discord avatar sweep (runs in the background, once per selected album of the day)
+  scheduleAvatarSweep()
   # Print success
   logger.info(f'{request.crid} - Successfully selected album of the day: \"{albumOfTheDayObj}\" submitted by: \"{albumOfTheDay.submitted_by.nickname}\"', extra={'crid': request.crid})
   return HttpResponse(f'Successfully selected album of the day: \"{albumOfTheDayObj}\" submitted by: \"{albumOfTheDay.submitted_by.nickname}\"')
@@ -215,7 +212,7 @@ def getAotdDates(request: HttpRequest, mbid: str):
 
 
 ###
-# Calculate all user's percentage of being picked given current conditions (will run on a cron)
+# Calculate all user's percentage of being picked given current conditions (kept for manual/cron refreshes, chances are recalculated on change)
 ###
 def calculateAOTDChances(request: HttpRequest):
   # Make sure request is a post request
@@ -224,87 +221,8 @@ def calculateAOTDChances(request: HttpRequest):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Get current date
-  day = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
-  tomorrow = day + datetime.timedelta(days=1)
-  # Get Date a two years ago to filter by
-  two_year_ago = day - datetime.timedelta(days=730)
-  # Get a map of all outages currently in effect
-  user_outage_map = set(
-    UserAlbumOutage.objects
-      .filter(start_date__lte=tomorrow, end_date__gte=tomorrow)
-      .values_list('user_id', flat=True)
-  )
-  # Pre-compute recent reviewers once — passed to checkSelectionFlag to avoid N repeated queries
-  # Cutoff is today - 2 days: a user is blocked if midnight tonight would be 3+ days since their last review
-  selection_cutoff = day - datetime.timedelta(days=2)
-  recent_review_users = list(Review.objects.filter(review_date__date__gte=selection_cutoff).values_list('user__discord_id', flat=True).distinct())
-  # Single fetch of all users with annotations, forced to list so it can be reused in-memory
-  user_list = list(AotdUserData.objects.select_related('user').annotate(
-    total_album_submissions=Count('user__submitted_albums', distinct=True),
-    recent_picks=Count(
-      'user__submitted_albums__dailyalbum',
-      filter=Q(user__submitted_albums__dailyalbum__date__gte=two_year_ago),
-      distinct=True
-    )
-  ))
-  # Update selection blocked flags — pre-computed data avoids per-user DB queries in checkSelectionFlag
-  for aotdUser in user_list:
-    checkSelectionFlag(aotdUser, recent_review_users, user_outage_map)
-  # Build eligible set in Python from in-memory objects (no additional DB call)
-  eligible_users = [u for u in user_list if not u.selection_blocked_flag and u.user_id not in user_outage_map]
-  # Calculate total eligible albums from in-memory annotations (no additional DB call)
-  total_eligible_count = max(0, sum(
-    max(0, eu.total_album_submissions - eu.recent_picks) for eu in eligible_users
-  ))
-  # Iterate all aotd users and calculate aotd chances
-  for aotdUser in user_list:
-    logger.info(f"Calculating chance percentage for user {aotdUser.user.nickname}", extra={'crid': request.crid})
-    # Retrieve user from aotd data
-    user = aotdUser.user
-    # Get the user's chance object
-    userChanceObj: UserChanceCache = UserChanceCache.objects.update_or_create(
-      aotd_user=aotdUser,
-      defaults={
-        'chance_percentage': 0.00,
-        'block_type': None,
-        'outage': None,
-        'reason': None,
-      }
-    )[0]
-    # Check if user is currently under an outage
-    if(user.pk in user_outage_map):
-      logger.info(f"\t{aotdUser.user.nickname} is under an outage!", extra={'crid': request.crid})
-      outage = UserAlbumOutage.objects.filter(start_date__lte=tomorrow, end_date__gte=tomorrow).get(user=user)
-      logger.info(f"User {user.nickname} is currently under an outage, lasts until {outage.end_date.strftime('%Y-%m-%d')}!", extra={'crid': request.crid})
-      # Create outage return json
-      userChanceObj.chance_percentage = 0.00
-      userChanceObj.block_type = "OUTAGE"
-      userChanceObj.outage = outage
-      userChanceObj.reason = f"{outage.reason}"
-    elif(aotdUser.selection_blocked_flag):
-      # Get user's last review
-      lastReview = Review.objects.filter(user=aotdUser.user).order_by('-aotd_date').first()
-      days_since = day - (lastReview.aotd_date if (lastReview != None) else day)
-      # Store data
-      userChanceObj.chance_percentage = 0.00
-      userChanceObj.block_type = "INACTIVITY"
-      userChanceObj.reason = f"Inactivity, user has not reviewed in over two days. Last review was {days_since.days} days ago."
-      logger.info(f"\t{aotdUser.user.nickname} is blocked from selection!", extra={'crid': request.crid})
-    else:
-      # Use in-memory annotations instead of per-user DB queries
-      user_eligible_count = max(0, aotdUser.total_album_submissions - aotdUser.recent_picks)
-      # Do math for percentage
-      try:
-        chance = round((float(user_eligible_count)/float(total_eligible_count)) * 100.00, 3)
-      except:
-        chance = round(0, 3)
-      # Update with correct data
-      userChanceObj.chance_percentage = chance
-      userChanceObj.block_type = None
-      userChanceObj.reason = None
-    # Save user chance object
-    userChanceObj.save()
+  # Recalculate every user's chance in one batch (chances are also recalculated on the events that change them, see signals.py)
+  calculateAllAOTDChances()
   # Return a 200 for successful calculation
   return HttpResponse(status=200)
 
@@ -339,22 +257,32 @@ def getAOtDByMonth(request: HttpRequest, year: str, month: str):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Get all AOtD Objects for this year and month
-  month_AOtD = DailyAlbum.objects.filter(date__year=year, date__month=month).filter(date__lte=datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date())
+  # Get all AOtD Objects for this year and month (albums, submitters and approved tags in one joined query + one prefetch)
+  month_AOtD = list(
+    DailyAlbum.objects
+      .filter(date__year=year, date__month=month)
+      .filter(date__lte=datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date())
+      .select_related('album__submitted_by')
+      .defer('rating_timeline', 'album__raw_data', 'album__track_list')
+      .prefetch_related(Prefetch('album__tags', queryset=AlbumTag.objects.filter(is_approved=True), to_attr='approved_tags'))
+      .order_by('pk')
+  )
+  # Resolve every day's rating at once (stored for finalized days, live only for the in progress day)
+  month_ratings = resolveDayRatings(month_AOtD, rounded=False)
   # Create out object
   out = {}
   if(len(month_AOtD) != 0):
     # Track highest and lowest album scores of the month
-    highest_aotd: DailyAlbum = month_AOtD.first()
-    highest_aotd_rating = getAlbumRating(highest_aotd.album.mbid, rounded=False, date=highest_aotd.date)
-    lowest_aotd: DailyAlbum = month_AOtD.first()
-    lowest_aotd_rating = getAlbumRating(lowest_aotd.album.mbid, rounded=False, date=lowest_aotd.date)
+    highest_aotd: DailyAlbum = month_AOtD[0]
+    highest_aotd_rating = month_ratings[highest_aotd.pk]
+    lowest_aotd: DailyAlbum = month_AOtD[0]
+    lowest_aotd_rating = month_ratings[lowest_aotd.pk]
     # Track counts of submitters selected
     selection_counts = {}
     for aotd in month_AOtD:
       albumObj = aotd.album
       # Get album Rating
-      rating = getAlbumRating(aotd.album.mbid, rounded=False, date=aotd.date)
+      rating = month_ratings[aotd.pk]
       # Check highest and lowest ratings if rating is not null
       if(rating):
         if((highest_aotd_rating == None) or (rating > highest_aotd_rating)):
@@ -385,7 +313,7 @@ def getAOtDByMonth(request: HttpRequest, year: str, month: str):
       # Attach rating of album
       temp['rating'] = rating
       # Retrieve album tags
-      temp['tags'] = [tag.toJSON(short=True) for tag in albumObj.tags.filter(is_approved=True)]
+      temp['tags'] = [tag.toJSON(short=True) for tag in albumObj.approved_tags]
       # Append out object to output
       out[aotd.dateToCalString()] = temp
     # Convert submission numbers to array
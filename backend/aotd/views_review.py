@@ -1,6 +1,6 @@
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Sum
+from django.db.models import Count
 
 from users.utils import getUserObj
 
@@ -10,21 +10,26 @@ from .models import (
   DailyAlbum,
   AotdUserData,
   User,
-  ReviewHistory
+  ReviewHistory,
+  MonthlyReviewStats
 )
 
 from .utils import (
-  checkSelectionFlag,
+  applyReviewToSelectionFlag,
   calculateUserReviewData,
-  update_user_streak
+  calculateAllUserReviewData,
+  applyReviewToUserData,
+  update_user_streak,
+  generateDayRatingTimeline,
+  serializeReviews
 )
+from .events import publishAlbumEvent
 from reactions.utils import (
   createReaction
 )
 
 import logging
 from dotenv import load_dotenv
-import redis as redis_module
 import os, json, datetime
 from datetime import timedelta
 import pytz
@@ -36,14 +41,6 @@ logger = logging.getLogger()
 APP_ENV = os.getenv('APP_ENV') or 'DEV'
 load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
 
-# Declare redis module
-redis_connection = redis_module.Redis(
-  host=os.environ.get('REDIS_CONNECTION_HOST', '192.168.1.200'),
-  port=int(os.environ.get('REDIS_CONNECTION_PORT', 6379)),
-  decode_responses=True
-)
-# Get PUBSUB namespace
-REDIS_CONNECTION_PUBSUB_NAMESPACE = os.getenv("REDIS_CONNECTION_PUBSUB_NAMESPACE", "NONPROD")
 
 
 ## =========================================================================================================================================================================================
@@ -74,6 +71,10 @@ def submitReview(request: HttpRequest):
   try:
     try:
       reviewObj = Review.objects.get(album=albumObj, user=userObj, aotd_date=date)
+      # Keep the previous values so user stats can be updated in place
+      previousScore = reviewObj.score
+      previousFirstListen = reviewObj.first_listen
+      reviewCreated = False
       reviewObj.score = float(reqBody['score'])
       reviewObj.review_text = reqBody['comment']
       reviewObj.first_listen = reqBody['first_listen']
@@ -83,6 +84,7 @@ def submitReview(request: HttpRequest):
       reviewObj.version = 2
       # Save/Update Object
       reviewObj.save()
+      savedReview = reviewObj
     except Review.DoesNotExist:
       # Declare new Review object
       newReview = Review(
@@ -98,20 +100,28 @@ def submitReview(request: HttpRequest):
       )
       # Save new Review data
       newReview.save()
+      savedReview = newReview
+      previousScore = None
+      previousFirstListen = None
+      reviewCreated = True
       # Update user's streak data
       update_user_streak(userObj)
     finally:
-      # Publish update to redis channel to propt rerender on frontend
-      redis_stream_name = f"{REDIS_CONNECTION_PUBSUB_NAMESPACE}-aotd_review:{reqBody['album_id']}"
-      logger.info(f"Publishing review event to Redis stream: {redis_stream_name}")
-      redis_connection.publish(redis_stream_name, json.dumps({'album_id': reqBody['album_id']}))
+      # Queue update for the redis channel to propt rerender on frontend (published in the background)
+      publishAlbumEvent(reqBody['album_id'], "review")
   except:
     logger.error(f"ERROR: Failed to save review for user \"{userObj.nickname}\" ({userObj.discord_id}) targeting album {albumObj.mbid} for date {date}!", extra={'crid': request.crid})
     return HttpResponse(500)
-  # Update user selection_blocked and activity flag status
-  checkSelectionFlag(AotdUserData.objects.get(user=userObj))
-  # Update review stats
-  calculateUserReviewData(AotdUserData.objects.get(user=userObj))
+  # Append this submission to today's rating timeline (full rebuild still happens when the next AOtD is selected)
+  try:
+    generateDayRatingTimeline(DailyAlbum.objects.get(date=date), incremental_review=savedReview)
+  except Exception as e:
+    logger.error(f"Failed to append review {savedReview.pk} to timeline for date {date}: {e}", extra={'crid': request.crid})
+  # Update user selection_blocked and activity flag status (incremental, this review always counts as recent activity)
+  aotdUserObj = AotdUserData.objects.get(user=userObj)
+  applyReviewToSelectionFlag(aotdUserObj)
+  # Update review stats (in place from this review, falls back to a full recalculation when needed)
+  applyReviewToUserData(aotdUserObj, savedReview, reviewCreated, previousScore, previousFirstListen)
   # Log success
   logger.info(f"Successfully saved review submission from user {userObj.nickname} for album {albumObj.title}...", extra={'crid': request.crid})
   return HttpResponse(200)
@@ -143,28 +153,8 @@ def getReviewsForAlbum(request: HttpRequest, mbid: str, date: str = None):
     out['review_list'] = []
     logger.warning(f'Album {mbid} not found...', extra={'crid': request.crid})
     return JsonResponse(out)
-  # Get all reivews for album
-  try:
-    reviewsObj = Review.objects.filter(album=albumObj).filter(aotd_date=aotd_date)
-  except Review.DoesNotExist:
-    out = {}
-    out['review_list'] = []
-    logger.warning(f'No reviews found for album {mbid}...', extra={'crid': request.crid})
-    return JsonResponse(out)
-  # Declare outlist and populate
-  outList = []
-  for review in reviewsObj:
-    outObj = review.toJSON()
-    userAotdData: AotdUserData = review.user.aotd_data
-    streakData = {
-      "current_streak": userAotdData.current_streak,
-      "longest_streak": userAotdData.longest_streak,
-      "last_review_date": userAotdData.last_review_date,
-      "streak_at_risk": userAotdData.isStreakAtRisk()
-    }
-    outObj['user_streak_data'] = streakData
-    # Append to list
-    outList.append(outObj)
+  # Get all reivews for album, serialized in a fixed number of queries (users, streak data and reactions are batched)
+  outList = serializeReviews(Review.objects.filter(album=albumObj).filter(aotd_date=aotd_date), include_streak=True)
   # Return list of reviews
   return JsonResponse({"review_list": outList})
 
@@ -193,12 +183,11 @@ def getUserReviewForAlbum(request: HttpRequest, mbid: str, date: str = None):
   except ObjectDoesNotExist:
     return JsonResponse({"review": None})
   # Get reivew for album
-  try: 
-    review = user.aotd_reviews.all().get(aotd_date=aotd_date)
-  except ObjectDoesNotExist:
+  reviewList = serializeReviews(user.aotd_reviews.filter(aotd_date=aotd_date))
+  if(len(reviewList) == 0):
     return JsonResponse({"review": None})
   # Declare out object and populate
-  outObj = review.toJSON()
+  outObj = reviewList[0]
   # Return user review
   return JsonResponse({"review": outObj})
 
@@ -215,14 +204,15 @@ def getAllUserReviewStats(request: HttpRequest):
     res.status_code = 405
     return res
   # Get all user reviews
-  all_users = AotdUserData.objects.all()
+  all_users = list(AotdUserData.objects.select_related('user'))
   # Declare reviewData object and populate
   reviewData = {}
   totalReviews = Review.objects.all().count()
+  # If any users have not had their data calculated, calculate them all in one batch
+  stale_users = [aotdUser for aotdUser in all_users if (aotdUser.total_reviews == None or aotdUser.total_selected == None or aotdUser.review_ratio == 0)]
+  if(stale_users):
+    calculateAllUserReviewData(stale_users)
   for aotdUser in all_users:
-    # If this user has not had their data calculated, calculate it
-    if(aotdUser.total_reviews == None or aotdUser.total_selected == None or aotdUser.review_ratio == 0):
-      calculateUserReviewData(aotdUser)
     # Create a new object for the user
     reviewData[aotdUser.user.discord_id] = {
       "discord_id": aotdUser.user.discord_id,
@@ -382,16 +372,9 @@ def getAllUserReviews(request: HttpRequest, user_discord_id: str = None):
     return res
   # Retrieve user from session cookie
   user = getUserObj(request.session.get('discord_id') if (user_discord_id == None) else user_discord_id)
-  # Get all reviews
-  reviewsObj = user.aotd_reviews.all()
-  # Declare outlist and populate
+  # Get all reviews (albums, ownership history and reactions are batched rather than loaded per review)
   out = {}
-  out['reviews'] = []
-  review: Review
-  for review in reviewsObj:
-    outObj = review.toJSON(full = True)
-    # Append to list
-    out['reviews'].append(outObj)
+  out['reviews'] = serializeReviews(user.aotd_reviews.all(), full=True)
   # Attach timestamp
   out['metadata'] = {}
   out['metadata']['timestamp'] = datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
@@ -409,62 +392,104 @@ def getReviewStatsByMonth(request: HttpRequest, year: str, month: str):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
+  # Closed months never change, serve the materialized snapshot if one exists
+  today = datetime.datetime.now(tz=pytz.timezone('America/Chicago')).date()
+  month_closed = (int(year), int(month)) < (today.year, today.month)
+  if(month_closed):
+    snapshot = MonthlyReviewStats.objects.filter(year=int(year), month=int(month)).first()
+    if(snapshot):
+      out = dict(snapshot.payload)
+      out['metadata'] = {'timestamp': datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")}
+      return JsonResponse(out)
+  out = generateReviewStatsForMonth(year, month)
+  # Materialize closed months so they are only ever computed once
+  if(month_closed):
+    MonthlyReviewStats.objects.get_or_create(year=int(year), month=int(month), defaults={'payload': out})
+  # Attach timestamp
+  out['metadata'] = {}
+  out['metadata']['timestamp'] = datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+  # Return data 
+  return JsonResponse(out)
+
+
+def generateReviewStatsForMonth(year: str, month: str) -> dict:
+  '''Build the getReviewStatsByMonth payload from one grouped (user, score, first_listen) aggregation plus a distinct album count.'''
   # Retrieve all reviews for the passed in month
   monthReviews = Review.objects.filter(review_date__year=year, review_date__month=month)
-  # Get overall review data
-  stat_reviewTotal = monthReviews.count()
-  stat_reviewScoreSum = monthReviews.aggregate(Sum('score'))['score__sum']
+  # Single grouped pass, every figure below is derived from these rows in memory
+  grouped = list(
+    monthReviews
+      .values('user__discord_id', 'score', 'first_listen')
+      .annotate(count=Count('id'))
+      .order_by('user__discord_id', 'score')
+  )
+  albumCount = monthReviews.values_list('album').distinct().count()
+  # Score buckets run from 0.0 to 10.0 in steps of 0.5
+  buckets = [step / 2 for step in range(21)]
+  # Accumulate overall and per user data
+  stat_reviewTotal = 0
+  stat_reviewScoreSum = None
+  stat_totalFirstListens = 0
+  scoreCounts = {}
+  stat_userStats = {}
+  userScoreCounts = {}
+  for row in grouped:
+    user_id = row['user__discord_id']
+    count = row['count']
+    if(user_id not in stat_userStats):
+      stat_userStats[user_id] = {
+        "discord_id": user_id,
+        "review_count": 0,
+        "review_sum": 0.0,
+        "review_average": 0,
+        "first_listen_count": 0,
+        "first_listen_percentage": 0,
+        "score_breakdown": []
+      }
+      userScoreCounts[user_id] = {}
+    userStats = stat_userStats[user_id]
+    userStats['review_count'] += count
+    userStats['review_sum'] += row['score'] * count
+    stat_reviewTotal += count
+    stat_reviewScoreSum = (stat_reviewScoreSum or 0.0) + (row['score'] * count)
+    if(row['first_listen'] == True):
+      userStats['first_listen_count'] += count
+      stat_totalFirstListens += count
+    scoreCounts[row['score']] = scoreCounts.get(row['score'], 0) + count
+    userScoreCounts[user_id][row['score']] = userScoreCounts[user_id].get(row['score'], 0) + count
   stat_reviewAverage = (stat_reviewScoreSum/float(stat_reviewTotal)) if (stat_reviewTotal != 0) else 0
-  stat_totalFirstListens = monthReviews.filter(first_listen=True).count()
   stat_firstListenPercentage = (stat_totalFirstListens/float(stat_reviewTotal) * 100) if (stat_reviewTotal != 0) else 0
-  # Get stats related to user
-  users = monthReviews.values_list('user__discord_id', flat=True).distinct()
-  # Track user's total review count and sum of reviews, get user averages
-  stat_userStats = {}
+  # Track user's averages, biggest lover and hater
   stat_biggestHater = (None, None)
   stat_biggestLover = (None, None)
-  for user_id in users:
-    userReviews = monthReviews.filter(user__discord_id=user_id)
-    reviewCount = userReviews.count()
-    reviewSum = userReviews.aggregate(Sum('score'))['score__sum']
-    averageScore = (reviewSum/float(reviewCount)) if (reviewCount != 0) else 0
-    firstListenCount = userReviews.filter(first_listen=True).count()
+  for user_id, userStats in stat_userStats.items():
+    reviewCount = userStats['review_count']
+    averageScore = (userStats['review_sum']/float(reviewCount)) if (reviewCount != 0) else 0
+    userStats['review_average'] = averageScore
+    userStats['first_listen_percentage'] = ((userStats['first_listen_count']/float(reviewCount) * 100) if (reviewCount != 0) else 0)
     # Only check biggest lover and hater if the user has a review count of at least a third of the overall album count
-    if(reviewCount > (monthReviews.values_list('album').distinct().count() / 3)):
+    if(reviewCount > (albumCount / 3)):
       if((stat_biggestLover[0] == None) or (stat_biggestLover[1] < averageScore)):
         stat_biggestLover = (user_id, averageScore)
       if((stat_biggestHater[0] == None) or (stat_biggestHater[1] > averageScore)):
         stat_biggestHater = (user_id, averageScore)
-    # Add user data to userStats
-    stat_userStats[user_id] = {
-      "discord_id": user_id,
-      "review_count": reviewCount,
-      "review_sum": reviewSum,
-      "review_average": averageScore,
-      "first_listen_count": firstListenCount,
-      "first_listen_percentage": ((firstListenCount/float(reviewCount) * 100) if (reviewCount != 0) else 0),
-      "score_breakdown": []
-    }
+    # Add count of reviews for individual user breakdown
+    for score in buckets:
+      scoreCount = userScoreCounts[user_id].get(score, 0)
+      userStats['score_breakdown'].append({
+        "score": f"{score + 0.0}",
+        "count": scoreCount,
+        "percent": ((scoreCount/float(reviewCount) * 100) if (reviewCount != 0) else 0)
+      })
   # Get breakdown of all scores by count and data
   stat_reviewScoreBreakdown = []
-  score = 0.0
-  while score <= 10.0:
-    # Query all reviews of this score
-    reviews = monthReviews.filter(score=score)
+  for score in buckets:
+    scoreCount = scoreCounts.get(score, 0)
     stat_reviewScoreBreakdown.append({
       "score": f"{score + 0.0}",
-      "count": reviews.count(),
-      "percent": (reviews.filter(score=score).count()/float(stat_reviewTotal) * 100) if (stat_reviewTotal != 0) else 0
+      "count": scoreCount,
+      "percent": (scoreCount/float(stat_reviewTotal) * 100) if (stat_reviewTotal != 0) else 0
     })
-    # Add count of reviews for individual user breakdown
-    for user_id in users:
-      stat_userStats[user_id]['score_breakdown'].append({
-        "score": f"{score + 0.0}",
-        "count": reviews.filter(user__discord_id=user_id).count(),
-        "percent": ((reviews.filter(score=score).filter(user__discord_id=user_id).count()/float(stat_userStats[user_id]['review_count']) * 100) if (stat_userStats[user_id]['review_count'] != 0) else 0)
-      })
-    # Increment score
-    score += 0.5
   # Create and populate out object
   out = {}
   # Attach stats
@@ -477,11 +502,7 @@ def getReviewStatsByMonth(request: HttpRequest, year: str, month: str):
   out['all_first_listen_percentage'] = stat_firstListenPercentage
   out['user_stats'] = stat_userStats
   out['score_stats'] = stat_reviewScoreBreakdown
-  # Attach timestamp
-  out['metadata'] = {}
-  out['metadata']['timestamp'] = datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
-  # Return data 
-  return JsonResponse(out)
+  return out
 
 
 ###
@@ -517,10 +538,8 @@ def submitReviewReaction(request: HttpRequest):
       # Create a new reaction
       createReaction(review, user, reqBody['emoji'], reqBody['custom'])
     finally:
-      # Publish update to redis channel to propt rerender on frontend
-      redis_stream_name = f"{REDIS_CONNECTION_PUBSUB_NAMESPACE}-aotd_review:{review.album.mbid}"
-      logger.info(f"Publishing review event to Redis stream: {redis_stream_name}")
-      redis_connection.publish(redis_stream_name, json.dumps({'album_id': review.album.mbid}))
+      # Queue update for the redis channel to propt rerender on frontend (published in the background)
+      publishAlbumEvent(review.album.mbid, "reaction")
     # Return success object 
     return HttpResponse(status=200)
   except Exception as e:
@@ -553,6 +572,8 @@ def deleteReviewReaction(request: HttpRequest):
       reaction: Reaction = review.reactions.get(pk=react_id)
       # Delete reaction
       reaction.delete(deleter=user)
+      # Queue update for the redis channel to propt rerender on frontend
+      publishAlbumEvent(review.album.mbid, "reaction")
     except Reaction.DoesNotExist as e:
       logger.error(f"Could not delete, no reaction found!", extra={'crid': request.crid})
       raise e
@@ -574,9 +595,11 @@ def getReviewByID(request: HttpRequest, id: int):
     res.status_code = 405
     return res
   # Get review by passed in ID
-  review = Review.objects.get(pk=id)
+  reviewList = serializeReviews(Review.objects.filter(pk=id))
+  if(len(reviewList) == 0):
+    raise Review.DoesNotExist(f"Review {id} does not exist")
   # Return
-  return JsonResponse(review.toJSON())
+  return JsonResponse(reviewList[0])
 
 
 ###
@@ -590,16 +613,18 @@ def getReviewHistoricalByID(request: HttpRequest, id: int):
     res.status_code = 405
     return res
   # Get review by passed in ID
-  review = Review.objects.get(pk=id)
+  reviewList = serializeReviews(Review.objects.filter(pk=id))
+  if(len(reviewList) == 0):
+    raise Review.DoesNotExist(f"Review {id} does not exist")
   # Decalare Out Object
-  out = review.toJSON()
+  out = reviewList[0]
   # Get all historical edits of review and attach to out object
-  historical = ReviewHistory.objects.filter(review=review).order_by("recorded_at").reverse()
+  historical = ReviewHistory.objects.filter(review_id=id).order_by("recorded_at").reverse()
   out['historical'] = []
   for rev in historical:
     out['historical'].append(rev.toJSON())
-  # Attach current version of review to history
-  tempCurr = review.toJSON()
+  # Attach current version of review to history (copy of the serialized review, without the history itself)
+  tempCurr = {key: value for key, value in out.items() if key != 'historical'}
   tempCurr['recorded_at'] = tempCurr['last_updated']
   out['historical'].insert(0, tempCurr)
   # Return
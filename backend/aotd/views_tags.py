@@ -1,7 +1,8 @@
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count
+from django.db.models import Count, OuterRef, Subquery
+from django.db import transaction
 
 import json
 import logging
@@ -9,10 +10,11 @@ import logging
 from users.utils import getUserObj
 from votes.models import Vote
 from .models import Album, AlbumTag, GlobalTag
+from .events import publishAlbumEvent
 
 logger = logging.getLogger(__name__)
 
-APPROVAL_THRESHOLD = 3
+APPROVAL_THRESHOLD = AlbumTag.APPROVAL_THRESHOLD
 SUGGESTION_MIN_ALBUMS = 3
 
 
@@ -39,7 +41,12 @@ def getTagsForAlbum(request: HttpRequest, mbid: str):
     return JsonResponse({'error': 'Album not found'}, status=404)
   # Get Tags for the album including if the user has cast a vote on the tag
   user = getUserObj(request.session.get('discord_id'))
-  tags = AlbumTag.objects.filter(album=album).order_by('-is_approved', '-submitted_at')
+  tags = AlbumTag.objects.filter(album=album).select_related('submitted_by').order_by('-is_approved', '-submitted_at')
+  if user:
+    # Attach the user's vote in the same query (vote counts are stored on the tag)
+    ct = ContentType.objects.get_for_model(AlbumTag)
+    user_votes = Vote.objects.filter(user=user, content_type=ct, object_id=OuterRef('pk')).values('vote_type')[:1]
+    tags = tags.annotate(user_vote_type=Subquery(user_votes))
   return JsonResponse({'tags': [t.toJSON(user=user) for t in tags]})
 
 
@@ -89,14 +96,14 @@ def submitTag(request: HttpRequest):
   # Enforce case-insensitive uniqueness per album
   if AlbumTag.objects.filter(album=album, tag_text__iexact=tag_text).exists():
     return JsonResponse({'error': 'This tag already exists on this album'}, status=409)
-  # Create Tag object
-  tag = AlbumTag.objects.create(album=album, tag_text=tag_text, submitted_by=user, global_tag=global_tag, emoji=emoji)
-  # Auto-upvote from submitter
+  # Create Tag object and auto-upvote from submitter (vote row and tag counters are written together)
   ct = ContentType.objects.get_for_model(AlbumTag)
-  Vote.objects.create(user=user, content_type=ct, object_id=tag.pk, vote_type=Vote.UPVOTE)
+  with transaction.atomic():
+    tag = AlbumTag.objects.create(album=album, tag_text=tag_text, submitted_by=user, global_tag=global_tag, emoji=emoji)
+    Vote.objects.create(user=user, content_type=ct, object_id=tag.pk, vote_type=Vote.UPVOTE)
+    tag.apply_vote_delta(upvote_delta=1)
   tag.log_vote(user, Vote.UPVOTE)
-  # Recalculate tag approval status and return response
-  tag.recalculate_approval()
+  publishAlbumEvent(album.mbid, "tag")
   return JsonResponse({'success': True, 'tag': tag.toJSON(user=user)}, status=201)
 
 
@@ -129,19 +136,23 @@ def voteOnTag(request: HttpRequest):
     tag = AlbumTag.objects.get(pk=tag_id)
   except ObjectDoesNotExist:
     return JsonResponse({'error': 'Tag not found'}, status=404)
-  # Handle retrieval and creation of vote on tag
+  # Handle retrieval and creation of vote on tag, the tag counters (and approval) are updated in the same transaction
   ct = ContentType.objects.get_for_model(AlbumTag)
-  existing = Vote.objects.filter(user=user, content_type=ct, object_id=tag.pk).first()
-  if existing:
-    if existing.vote_type == vote_type:
-      return JsonResponse({'error': 'You have already voted this way'}, status=409)
-    existing.vote_type = vote_type
-    existing.save()
-  else:
-    Vote.objects.create(user=user, content_type=ct, object_id=tag.pk, vote_type=vote_type)
-  # Log vote and recalculate tag approval status and return response
+  with transaction.atomic():
+    existing = Vote.objects.select_for_update().filter(user=user, content_type=ct, object_id=tag.pk).first()
+    if existing:
+      if existing.vote_type == vote_type:
+        return JsonResponse({'error': 'You have already voted this way'}, status=409)
+      existing.vote_type = vote_type
+      existing.save()
+      # Flipped vote: one side loses a vote, the other gains one
+      tag.apply_vote_delta(upvote_delta=vote_type, downvote_delta=-vote_type)
+    else:
+      Vote.objects.create(user=user, content_type=ct, object_id=tag.pk, vote_type=vote_type)
+      tag.apply_vote_delta(upvote_delta=int(vote_type == Vote.UPVOTE), downvote_delta=int(vote_type == Vote.DOWNVOTE))
+  # Log vote and return response
   tag.log_vote(user, vote_type)
-  tag.recalculate_approval()
+  publishAlbumEvent(tag.album.mbid, "tag")
   return JsonResponse({'success': True, 'tag': tag.toJSON(user=user)})
 
 
@@ -168,21 +179,25 @@ def removeVoteFromTag(request: HttpRequest):
     return JsonResponse({'error': 'Tag not found'}, status=404)
   # Handle retrieval and vote deletion
   ct = ContentType.objects.get_for_model(AlbumTag)
-  deleted, _ = Vote.objects.filter(user=user, content_type=ct, object_id=tag.pk).delete()
-  if not deleted:
-    logger.error("No vote found to remove", extra={'crid': request.crid})
-    return JsonResponse({'error': 'No vote found to remove'}, status=404)
+  with transaction.atomic():
+    existing = Vote.objects.select_for_update().filter(user=user, content_type=ct, object_id=tag.pk).first()
+    if not existing:
+      logger.error("No vote found to remove", extra={'crid': request.crid})
+      return JsonResponse({'error': 'No vote found to remove'}, status=404)
+    removed_type = existing.vote_type
+    existing.delete()
+    tag.apply_vote_delta(upvote_delta=-int(removed_type == Vote.UPVOTE), downvote_delta=-int(removed_type == Vote.DOWNVOTE))
   # Log vote removal
-  from users.models import UserAction
-  UserAction.objects.create(
+  from users.audit import recordUserAction
+  recordUserAction(
     user=user,
     action_type="DELETE",
     entity_type="ALBUM_TAG_VOTE",
     entity_id=tag.pk,
     details={"tag_text": tag.tag_text, "album_mbid": tag.album.mbid}
   )
-  # Recalculate tag approval status and return response
-  tag.recalculate_approval()
+  # Return response
+  publishAlbumEvent(tag.album.mbid, "tag")
   return JsonResponse({'success': True, 'tag': tag.toJSON(user=user)})
 
 
@@ -216,6 +231,7 @@ def deleteTag(request: HttpRequest):
     tag.delete(deleter=user, admin_delete=False)
   else:
     return JsonResponse({'error': 'You do not have permission to delete this tag'}, status=403)
+  publishAlbumEvent(tag.album.mbid, "tag")
   # Return Response
   return JsonResponse({'success': True})
 
@@ -0,0 +1,195 @@
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+
+import hashlib
+import logging
+import os
+import re
+
+# Declare logging
+logger = logging.getLogger()
+
+# How uploaded media is handed to the client:
+#   "DIRECT"     - Django streams the file itself (default)
+#   "X_ACCEL"    - Return an X-Accel-Redirect header for nginx (requires an internal location per media root, see serveMediaFile)
+#   "X_SENDFILE" - Return an X-Sendfile header for Apache/lighttpd
+MEDIA_DELIVERY_MODE = os.getenv("MEDIA_DELIVERY_MODE", "DIRECT").upper()
+# How long (seconds) file metadata (path, type, size, hash) is cached, so conditional requests never touch the DB
+MEDIA_META_CACHE_TIMEOUT = int(os.getenv("MEDIA_META_CACHE_TIMEOUT", 86400))
+# Media is auth gated and addressed by id (and can be deleted or deactivated), so only the browser may cache it,
+# and only briefly before revalidating with the ETag
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", 300))
+MEDIA_CACHE_CONTROL = f"private, max-age={MEDIA_CACHE_MAX_AGE}, must-revalidate"
+# Chunk size used when streaming files and hashing them
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+## =========================================================================================================================================================================================
+## Shared media delivery for uploaded files (photos, emojis). Adds content-hash ETags, Last-Modified, private caching,
+## If-None-Match/If-Modified-Since 304s, single byte-range requests and optional web-server offload.
+## =========================================================================================================================================================================================
+
+def mediaCacheKey(kind: str, object_id) -> str:
+  return f"media_meta:{kind}:{object_id}"
+
+
+def invalidateMediaMeta(kind: str, object_id):
+  '''Drop cached metadata for a media object (call when it is deleted, hidden or replaced).'''
+  cache.delete(mediaCacheKey(kind, object_id))
+
+
+def hashFile(path: str) -> str:
+  '''Return the sha256 hex digest of a file, read in chunks.'''
+  digest = hashlib.sha256()
+  with open(path, "rb") as file:
+    for chunk in iter(lambda: file.read(MEDIA_CHUNK_SIZE), b""):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+def getMediaMeta(kind: str, object_id, loader) -> dict | None:
+  '''
+  Return cached delivery metadata for a media object, building it on a miss.
+  loader() is only called on a miss and must return (root, filename, content_type) or None if the object does not exist (or should not be served).
+  Returned dict: root, filename, path, content_type, size, mtime, etag. Returns None if the object or its file is missing.
+  '''
+  key = mediaCacheKey(kind, object_id)
+  meta = cache.get(key)
+  if(meta is not None):
+    return meta
+  found = loader()
+  if(found is None):
+    return None
+  root, filename, content_type = found
+  path = os.path.join(root or "", filename)
+  try:
+    stat = os.stat(path)
+    etag = f'"{hashFile(path)}"'
+  except FileNotFoundError:
+    logger.error(f"Media file not found on disk for {kind} {object_id}: {path}")
+    return None
+  meta = {
+    "root": root,
+    "filename": filename,
+    "path": path,
+    "content_type": content_type or "application/octet-stream",
+    "size": stat.st_size,
+    "mtime": int(stat.st_mtime),
+    "etag": etag,
+  }
+  cache.set(key, meta, MEDIA_META_CACHE_TIMEOUT)
+  return meta
+
+
+def _etagMatches(header: str, etag: str) -> bool:
+  if(header.strip() == "*"):
+    return True
+  # Weak comparison, as required for If-None-Match
+  candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+  return etag in candidates
+
+
+def _notModified(request: HttpRequest, meta: dict) -> bool:
+  if_none_match = request.headers.get("If-None-Match")
+  if(if_none_match is not None):
+    return _etagMatches(if_none_match, meta["etag"])
+  if_modified_since = request.headers.get("If-Modified-Since")
+  if(if_modified_since is not None):
+    since = parse_http_date_safe(if_modified_since)
+    return (since is not None) and (meta["mtime"] <= since)
+  return False
+
+
+def _parseRange(header: str, size: int):
+  '''
+  Parse a single "bytes=start-end" range. Returns (start, end) inclusive, None to ignore the header (serve the full file),
+  or False if the range cannot be satisfied. Multi-range requests are ignored and served in full.
+  '''
+  match = RANGE_RE.match(header.strip())
+  if(match is None):
+    return None
+  start_str, end_str = match.groups()
+  if(start_str == "" and end_str == ""):
+    return None
+  if(start_str == ""):
+    # Suffix range: last N bytes
+    length = int(end_str)
+    if(length == 0):
+      return False
+    return max(0, size - length), size - 1
+  start = int(start_str)
+  end = min(int(end_str), size - 1) if (end_str != "") else size - 1
+  if(start >= size or start > end):
+    return False
+  return start, end
+
+
+def _streamFile(path: str, start: int, length: int):
+  with open(path, "rb") as file:
+    file.seek(start)
+    remaining = length
+    while(remaining > 0):
+      chunk = file.read(min(MEDIA_CHUNK_SIZE, remaining))
+      if(not chunk):
+        break
+      remaining -= len(chunk)
+      yield chunk
+
+
+def _setCachingHeaders(response: HttpResponse, meta: dict, cache_control: str):
+  response["ETag"] = meta["etag"]
+  response["Last-Modified"] = http_date(meta["mtime"])
+  response["Cache-Control"] = cache_control
+  response["Accept-Ranges"] = "bytes"
+
+
+def serveMediaFile(request: HttpRequest, meta: dict, accel_prefix: str = None, cache_control: str = None) -> HttpResponse:
+  '''
+  Build the response for a media file described by getMediaMeta.
+  - Cache-Control is private and short lived (revalidated with the ETag), or cache_control when passed in (e.g. "private, no-cache" for a stand-in file)
+  - 304 when If-None-Match/If-Modified-Since match (no file access)
+  - 206 for a satisfiable single byte range, 416 for an unsatisfiable one
+  - In X_ACCEL mode accel_prefix is the internal nginx location mapped to the media root (e.g. "/protected/photos/"),
+    if it is not set the file is streamed directly.
+  '''
+  cache_control = cache_control or MEDIA_CACHE_CONTROL
+  # Conditional request, nothing to send
+  if(_notModified(request, meta)):
+    response = HttpResponse(status=304)
+    _setCachingHeaders(response, meta, cache_control)
+    return response
+  # Hand the transfer to the web server (it handles ranges itself)
+  if(MEDIA_DELIVERY_MODE == "X_ACCEL" and accel_prefix):
+    response = HttpResponse(content_type=meta["content_type"])
+    response["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{meta['filename']}"
+    _setCachingHeaders(response, meta, cache_control)
+    return response
+  if(MEDIA_DELIVERY_MODE == "X_SENDFILE"):
+    response = HttpResponse(content_type=meta["content_type"])
+    response["X-Sendfile"] = meta["path"]
+    _setCachingHeaders(response, meta, cache_control)
+    return response
+  # Stream the file (or the requested range) ourselves
+  size = meta["size"]
+  byte_range = _parseRange(request.headers["Range"], size) if ("Range" in request.headers) else None
+  # Only honour If-Range when it still matches the current representation
+  if(byte_range and ("If-Range" in request.headers) and (request.headers["If-Range"].strip() != meta["etag"])):
+    byte_range = None
+  if(byte_range is False):
+    response = HttpResponse(status=416)
+    response["Content-Range"] = f"bytes */{size}"
+    _setCachingHeaders(response, meta, cache_control)
+    return response
+  if(byte_range):
+    start, end = byte_range
+    response = StreamingHttpResponse(_streamFile(meta["path"], start, end - start + 1), status=206, content_type=meta["content_type"])
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+  else:
+    response = StreamingHttpResponse(_streamFile(meta["path"], 0, size), content_type=meta["content_type"])
+    response["Content-Length"] = str(size)
+  _setCachingHeaders(response, meta, cache_control)
+  return response
@@ -27,14 +27,13 @@ class metadataMiddleware:
     response = self.get_response(request)
     # Code after this line is executed after the view is called
 
-    # If the response is a JsonResponse, attach or override the response metadata timestamp
+    # If the response is a JsonResponse, attach the response metadata. The meta block is spliced onto the end of the
+    # already serialized object, so large bodies are never parsed and re-serialized.
     if isinstance(response, JsonResponse):
-      data = json.loads(response.content)
-      data['meta'] = { 
+      response.content = attachResponseMeta(response.content, {
         'timestamp': timezone.now().strftime("%d/%m/%Y, %H:%M:%S"),
         'crid': request.crid
-      }
-      response.content = json.dumps(data)
+      })
     # Attach a header to show that this was not a cache hit
     response['X-Generated-At'] = timezone.now().strftime("%d/%m/%Y, %H:%M:%S") + " UTC"
     response["Access-Control-Expose-Headers"] = "X-Generated-At"
@@ -42,4 +41,19 @@ class metadataMiddleware:
     response['X-CRID'] = request.crid
     
     # Returning the response
-    return response
\ No newline at end of file
+    return response
+
+
+def attachResponseMeta(content: bytes, meta: dict) -> bytes:
+  """
+  Append a "meta" key to a serialized JSON object without parsing it. Views never set "meta" themselves, so appending
+  the key is equivalent to the old loads/assign/dumps round trip. Non-object payloads are returned untouched.
+  """
+  body = content.rstrip()
+  if((not body.startswith(b'{')) or (not body.endswith(b'}'))):
+    return content
+  meta_bytes = b'"meta": ' + json.dumps(meta).encode()
+  # Empty object, nothing to separate with a comma
+  if(body[1:-1].strip() == b''):
+    return b'{' + meta_bytes + b'}'
+  return body[:-1] + b', ' + meta_bytes + b'}'
@@ -0,0 +1,40 @@
+import threading
+import os
+from dotenv import load_dotenv
+
+# Determine runtime enviornment (modules that import from here can read their env settings right after)
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
+
+REDIS_CONNECTION_HOST = os.environ.get('REDIS_CONNECTION_HOST', '192.168.1.200')
+REDIS_CONNECTION_PORT = int(os.environ.get('REDIS_CONNECTION_PORT', 6379))
+# Prefix for every key and pubsub channel, so environments sharing a Redis server stay apart
+REDIS_CONNECTION_PUBSUB_NAMESPACE = os.getenv("REDIS_CONNECTION_PUBSUB_NAMESPACE", "NONPROD")
+
+
+## =========================================================================================================================================================================================
+## Shared Redis access. Every component (presence, emoji counters, review events, the MusicBrainz limiter) gets its client
+## from getRedisClient, so each process keeps one connection pool per set of client options instead of one per component.
+## =========================================================================================================================================================================================
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def getRedisClient(decode_responses: bool = True, socket_timeout: float = None):
+  '''Return a Redis client backed by the process wide connection pool for these options (raises ImportError if redis is not installed).'''
+  import redis as redis_module
+  options = (decode_responses, socket_timeout)
+  with _pools_lock:
+    if(options not in _pools):
+      _pools[options] = redis_module.ConnectionPool(
+        host=REDIS_CONNECTION_HOST,
+        port=REDIS_CONNECTION_PORT,
+        decode_responses=decode_responses,
+        socket_timeout=socket_timeout
+      )
+    return redis_module.Redis(connection_pool=_pools[options])
+
+
+def redisKey(name: str) -> str:
+  '''Namespace a key or channel name for this environment, e.g. "PROD-presence".'''
+  return f"{REDIS_CONNECTION_PUBSUB_NAMESPACE}-{name}"
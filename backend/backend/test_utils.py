@@ -0,0 +1,48 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import json
+
+
+## =========================================================================================================================================================================================
+## Helpers shared by the app test suites.
+## =========================================================================================================================================================================================
+
+class StubHTTPServer:
+  """
+  Local stand-in for a JSON web API, served under base_path on a free port. Responses are queued as (status, headers, body)
+  and served in order (the last one repeats), every request is recorded as (path, headers).
+  """
+
+  def __init__(self, base_path: str = ""):
+    self.responses = []
+    self.requests = []
+    stub = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if(length):
+          self.rfile.read(length)
+        stub.requests.append((self.path, dict(self.headers)))
+        status, headers, body = stub.responses.pop(0) if (len(stub.responses) > 1) else stub.responses[0]
+        payload = json.dumps(body).encode() if (body is not None) else b""
+        self.send_response(status)
+        for name, value in headers.items():
+          self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+      do_POST = do_GET
+
+      def log_message(self, format, *args):
+        pass
+
+    self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}{base_path}"
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+  def close(self):
+    self.server.shutdown()
+    self.server.server_close()
@@ -0,0 +1,62 @@
+from django.db import close_old_connections
+
+import logging
+import threading
+import time
+
+# Loads the env file, so components built on these helpers can read their settings at import
+from . import redis_client  # noqa: F401
+
+# Declare logging
+logger = logging.getLogger()
+
+
+## =========================================================================================================================================================================================
+## Building blocks shared by the write-behind components (presence, emoji use counts, user action audit rows, review events):
+## picking a Redis or per-process store, and the lazily started daemon thread that writes pending data back.
+## =========================================================================================================================================================================================
+
+def selectStore(backend: str, redis_factory, memory_factory, description: str):
+  '''Build the store for a "REDIS"/"MEMORY" backend setting, falling back to the memory store if Redis cannot be set up.'''
+  if(backend == "REDIS"):
+    try:
+      return redis_factory()
+    except Exception as e:
+      logger.error(f"Failed to create redis {description} store, falling back to memory store: {e}")
+  return memory_factory()
+
+
+class BackgroundWorker:
+  """Owns one daemon thread running _run(), started on first use (call _ensureThread whenever work is added)."""
+
+  thread_name = "background-worker"
+
+  def __init__(self):
+    self._thread = None
+    self._thread_lock = threading.Lock()
+
+  def _ensureThread(self):
+    if((self._thread is not None) and self._thread.is_alive()):
+      return
+    with self._thread_lock:
+      if((self._thread is None) or (not self._thread.is_alive())):
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+  def _run(self):
+    raise NotImplementedError
+
+
+class PeriodicFlusher(BackgroundWorker):
+  """Background thread that calls flush() every flush_interval seconds, so pending data is written even when no more is recorded."""
+
+  flush_interval = 30
+
+  def _run(self):
+    while(True):
+      time.sleep(self.flush_interval)
+      close_old_connections()
+      self.flush()
+
+  def flush(self):
+    raise NotImplementedError
@@ -0,0 +1,111 @@
+from django.db import transaction, close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import datetime
+import logging
+import os
+import requests
+from requests.adapters import HTTPAdapter
+
+from users.models import User
+from .client import discord_client
+
+# Declare logging
+logger = logging.getLogger()
+
+# How often each user's avatar URL is verified against Discord's CDN
+AVATAR_CHECK_INTERVAL = datetime.timedelta(hours=24)
+# Concurrent CDN HEAD requests per sweep, and the timeout (seconds) for each
+AVATAR_SWEEP_WORKERS = int(os.getenv("AVATAR_SWEEP_WORKERS", 8))
+AVATAR_CHECK_TIMEOUT = 5
+
+# Only one sweep per process at a time
+_sweep_lock = threading.Lock()
+
+
+## =========================================================================================================================================================================================
+## Periodic avatar verification. Avatar hashes go stale when users change their Discord avatar (the old CDN URL starts
+## returning 404). Instead of checking on the auth path, a sweep HEADs every due user's avatar URL through a bounded thread
+## pool, looks up new hashes for the missing ones with the bot token, and writes everything back in bulk.
+## Runs daily from setAlbumOfDay (see scheduleAvatarSweep) and on demand with the verify_discord_avatars command.
+## =========================================================================================================================================================================================
+
+def _headAvatar(session: requests.Session, user: User) -> int | None:
+  '''HEAD a user's avatar URL, returning the status code (None if the request failed).'''
+  try:
+    return session.head(user.get_avatar_url(), timeout=AVATAR_CHECK_TIMEOUT, allow_redirects=True).status_code
+  except Exception as e:
+    logger.warning(f"Avatar check failed for user {user.discord_id}: {e}")
+    return None
+
+
+def sweepDiscordAvatars(force: bool = False, workers: int = AVATAR_SWEEP_WORKERS) -> dict:
+  '''
+  Verify the avatar URL of every user not checked within AVATAR_CHECK_INTERVAL (every user if force is set).
+  Missing avatars get their current hash from the Discord API. Users that could not be checked are left due for the next sweep.
+  Returns counts: checked, refreshed, failed.
+  '''
+  now = timezone.now()
+  users = User.objects.only('pk', 'discord_id', 'discord_avatar', 'discord_discriminator')
+  if(not force):
+    users = users.filter(Q(last_avatar_check__isnull=True) | Q(last_avatar_check__lt=now - AVATAR_CHECK_INTERVAL))
+  users = list(users)
+  if(not users):
+    return {'checked': 0, 'refreshed': 0, 'failed': 0}
+  # Check every avatar concurrently over one pooled session
+  session = requests.Session()
+  adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+  session.mount("https://", adapter)
+  with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="avatar-sweep") as executor:
+    statuses = list(executor.map(lambda user: _headAvatar(session, user), users))
+  session.close()
+  checked_pks = []
+  refreshed = []
+  failed = 0
+  for user, status in zip(users, statuses):
+    if(status == 404):
+      # Avatar changed, look up the current hash (rate limited by the shared Discord client)
+      try:
+        discordRes = discord_client.getUser(user.discord_id)
+        discordRes.raise_for_status()
+      except Exception as e:
+        logger.warning(f"Failed to refresh discord avatar for user {user.discord_id}: {e}")
+        failed += 1
+        continue
+      user.discord_avatar = discordRes.json().get('avatar')
+      user.last_updated_timestamp = now
+      refreshed.append(user)
+      checked_pks.append(user.pk)
+    elif(status is not None and status < 400):
+      checked_pks.append(user.pk)
+    else:
+      failed += 1
+  # Write new hashes and stamp every verified user in bulk
+  with transaction.atomic():
+    if(refreshed):
+      User.objects.bulk_update(refreshed, ['discord_avatar', 'last_updated_timestamp'])
+    User.objects.filter(pk__in=checked_pks).update(last_avatar_check=now)
+  logger.info(f"Avatar sweep complete: {len(checked_pks)} checked, {len(refreshed)} refreshed, {failed} failed")
+  return {'checked': len(checked_pks), 'refreshed': len(refreshed), 'failed': failed}
+
+
+def _runAvatarSweep():
+  close_old_connections()
+  try:
+    sweepDiscordAvatars()
+  except Exception as e:
+    logger.error(f"Avatar sweep failed: {e}")
+  finally:
+    _sweep_lock.release()
+    close_old_connections()
+
+
+def scheduleAvatarSweep() -> bool:
+  '''Start an avatar sweep in a background thread, unless one is already running. Returns True if a sweep was started.'''
+  if(not _sweep_lock.acquire(blocking=False)):
+    return False
+  threading.Thread(target=_runAvatarSweep, name="avatar-sweep", daemon=True).start()
+  return True
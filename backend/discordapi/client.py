@@ -0,0 +1,222 @@
+from django.core.cache import cache
+
+import logging
+import threading
+import hashlib
+import random
+import time
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Declare logging
+logger = logging.getLogger()
+
+# Determine runtime enviornment
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
+
+# Per-request timeout (seconds) and how many times a rate limited/failed request is attempted
+DISCORD_HTTP_TIMEOUT = float(os.getenv("DISCORD_HTTP_TIMEOUT", 5))
+DISCORD_MAX_ATTEMPTS = int(os.getenv("DISCORD_MAX_ATTEMPTS", 3))
+# Longest (seconds) a request will wait for an exhausted rate limit bucket to reset, anything longer fails fast instead of hanging the request
+DISCORD_MAX_RATE_LIMIT_WAIT = float(os.getenv("DISCORD_MAX_RATE_LIMIT_WAIT", 5))
+
+
+## =========================================================================================================================================================================================
+## Shared Discord API client. One pooled keep-alive session for every Discord call, with per-route rate limit bucket
+## tracking from the X-RateLimit-* headers (requests wait for an exhausted bucket to reset instead of eating a 429),
+## retry with jitter for 429s, 5xx and connection errors, and short TTL caching of idempotent reads.
+## DISCORD_API_ENDPOINT can point at a local stub of the Discord API for testing.
+## =========================================================================================================================================================================================
+
+class DiscordAPIError(Exception):
+  """Raised when a Discord API request fails (status is the HTTP status, or None for connection errors)."""
+
+  def __init__(self, message: str, status: int = None, data=None):
+    super().__init__(message)
+    self.status = status
+    self.data = data
+
+
+class DiscordResponse:
+  """Decoded Discord API response (mirrors the parts of requests.Response the callers use, and can be cached)."""
+
+  def __init__(self, status_code: int, data, reason: str = ""):
+    self.status_code = status_code
+    self.data = data
+    self.reason = reason
+
+  def json(self):
+    return self.data
+
+  @property
+  def ok(self) -> bool:
+    return 200 <= self.status_code < 300
+
+  def raise_for_status(self):
+    if(not self.ok):
+      raise DiscordAPIError(f"Discord API returned {self.status_code} {self.reason}: {self.data}", status=self.status_code, data=self.data)
+
+
+class RateLimitBuckets:
+  """
+  Tracks Discord rate limit buckets from response headers. Routes are mapped to the bucket hash Discord reports,
+  and bucket state is kept per (bucket, credential) since limits are applied per token.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._route_buckets = {}
+    self._buckets = {}
+    self._global_reset_at = 0.0
+
+  def _bucketKey(self, route: str, credential: str) -> tuple:
+    return (self._route_buckets.get(route, route), credential)
+
+  def wait_time(self, route: str, credential: str) -> float:
+    """Seconds to wait before sending on this route (0 if the bucket has requests left or has reset)."""
+    with self._lock:
+      now = time.monotonic()
+      wait = max(0.0, self._global_reset_at - now)
+      bucket = self._buckets.get(self._bucketKey(route, credential))
+      if(bucket and bucket['remaining'] <= 0):
+        wait = max(wait, bucket['reset_at'] - now)
+      return wait
+
+  def consume(self, route: str, credential: str):
+    """Count a request against the bucket before sending, so concurrent callers do not overrun it."""
+    with self._lock:
+      bucket = self._buckets.get(self._bucketKey(route, credential))
+      if(bucket and bucket['reset_at'] > time.monotonic()):
+        bucket['remaining'] -= 1
+
+  def update(self, route: str, credential: str, headers, status_code: int):
+    with self._lock:
+      now = time.monotonic()
+      if(headers.get("X-RateLimit-Bucket")):
+        self._route_buckets[route] = headers["X-RateLimit-Bucket"]
+      if(status_code == 429 and headers.get("X-RateLimit-Global")):
+        self._global_reset_at = now + float(headers.get("Retry-After", 1))
+      if(headers.get("X-RateLimit-Remaining") is not None and headers.get("X-RateLimit-Reset-After") is not None):
+        self._buckets[self._bucketKey(route, credential)] = {
+          'remaining': int(headers["X-RateLimit-Remaining"]),
+          'reset_at': now + float(headers["X-RateLimit-Reset-After"]),
+        }
+
+
+class DiscordClient:
+  """Pooled, rate limit aware Discord API client (safe to share between threads)."""
+
+  def __init__(self, base_url: str = None, pool_size: int = 10):
+    self._base_url = base_url
+    self.buckets = RateLimitBuckets()
+    self.session = requests.Session()
+    self.session.headers.update({'User-Agent': "DiscordBot (https://www.cordpal.app, 1.0) CordPal"})
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    self.session.mount("http://", adapter)
+    self.session.mount("https://", adapter)
+
+  @property
+  def base_url(self) -> str:
+    # Read lazily so the endpoint from the loaded env file (or a test stub) is used
+    return (self._base_url or os.getenv('DISCORD_API_ENDPOINT', "https://discord.com/api/v10")).rstrip("/")
+
+  @staticmethod
+  def _credential(authorization: str | None, basic_auth) -> str:
+    raw = authorization or (basic_auth[0] if basic_auth else "") or ""
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+  @staticmethod
+  def _backoff(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(8.0, 0.5 * (2 ** attempt)))
+
+  def request(self, method: str, path: str, route: str = None, authorization: str = None, basic_auth=None, data: dict = None, cache_ttl: int = 0, retry: bool = True) -> DiscordResponse:
+    """
+    Send a request to the Discord API and return the decoded response (error responses are returned, not raised).
+
+    :param path: API path, e.g. "/users/@me"
+    :param route: Rate limit route (method + path with only major parameters), defaults to method + path
+    :param authorization: Authorization header value ("Bearer ..." or "Bot ...")
+    :param basic_auth: (client_id, client_secret) for OAuth2 token endpoints
+    :param data: Form body
+    :param cache_ttl: Seconds to cache the response of an idempotent GET (per credential), 0 disables caching
+    :param retry: Retry 5xx responses and connection errors. Pass False for non-idempotent calls (e.g. OAuth2 token exchanges,
+                  codes are single use and refresh tokens rotate), those are only retried when Discord provably did not process
+                  them (429, or the connection could not be established)
+    """
+    route = route or f"{method} {path}"
+    credential = self._credential(authorization, basic_auth)
+    cache_key = f"discord_api:{credential}:{path}"
+    cacheable = (method == "GET") and (cache_ttl > 0)
+    if(cacheable):
+      cached = cache.get(cache_key)
+      if(cached is not None):
+        return DiscordResponse(*cached)
+    headers = {'Authorization': authorization} if authorization else {}
+    for attempt in range(1, DISCORD_MAX_ATTEMPTS + 1):
+      # Pre-emptively wait out an exhausted bucket instead of sending a request that will be rejected
+      wait = self.buckets.wait_time(route, credential)
+      if(wait > DISCORD_MAX_RATE_LIMIT_WAIT):
+        raise DiscordAPIError(f"Discord rate limit for {route} resets in {wait:.1f}s, not waiting", status=429)
+      if(wait > 0):
+        time.sleep(wait)
+      self.buckets.consume(route, credential)
+      try:
+        res = self.session.request(method, f"{self.base_url}{path}", headers=headers, data=data, auth=basic_auth, timeout=DISCORD_HTTP_TIMEOUT)
+      except requests.RequestException as e:
+        if((attempt == DISCORD_MAX_ATTEMPTS) or (not retry and not isinstance(e, requests.ConnectTimeout))):
+          raise DiscordAPIError(f"Discord request {route} failed: {e}")
+        time.sleep(self._backoff(attempt))
+        continue
+      self.buckets.update(route, credential, res.headers, res.status_code)
+      if(res.status_code == 429 and attempt < DISCORD_MAX_ATTEMPTS):
+        retry_after = float(res.headers.get("Retry-After", 1))
+        if(retry_after > DISCORD_MAX_RATE_LIMIT_WAIT):
+          break
+        logger.warning(f"Discord rate limited {route} (attempt {attempt}/{DISCORD_MAX_ATTEMPTS}), retrying in {retry_after}s")
+        time.sleep(retry_after + random.uniform(0, 0.25))
+        continue
+      if(res.status_code >= 500 and retry and attempt < DISCORD_MAX_ATTEMPTS):
+        time.sleep(self._backoff(attempt))
+        continue
+      try:
+        body = res.json()
+      except ValueError:
+        body = {'message': res.text}
+      response = DiscordResponse(res.status_code, body, res.reason)
+      # Cache definitive answers only (not throttling or server errors)
+      if(cacheable and (res.status_code < 500) and (res.status_code != 429)):
+        cache.set(cache_key, (response.status_code, response.data, response.reason), cache_ttl)
+      return response
+    return DiscordResponse(res.status_code, {'message': "Rate limited"}, res.reason)
+
+  def invalidate(self, path: str, authorization: str = None):
+    """Drop a cached GET response."""
+    cache.delete(f"discord_api:{self._credential(authorization, None)}:{path}")
+
+  ## Endpoint helpers
+
+  def getCurrentUser(self, authorization: str, cache_ttl: int = 0) -> DiscordResponse:
+    return self.request("GET", "/users/@me", authorization=authorization, cache_ttl=cache_ttl)
+
+  def getCurrentUserGuildMember(self, authorization: str, guild_id: str, cache_ttl: int = 0) -> DiscordResponse:
+    return self.request("GET", f"/users/@me/guilds/{guild_id}/member", route=f"GET /users/@me/guilds/{guild_id}/member", authorization=authorization, cache_ttl=cache_ttl)
+
+  def getUser(self, user_id: str, cache_ttl: int = 0) -> DiscordResponse:
+    return self.request("GET", f"/users/{user_id}", route="GET /users/{user_id}", authorization=f"Bot {os.getenv('DISCORD_BOT_TOKEN')}", cache_ttl=cache_ttl)
+
+  def getGuildEmojis(self, guild_id: str, cache_ttl: int = 0) -> DiscordResponse:
+    return self.request("GET", f"/guilds/{guild_id}/emojis", route=f"GET /guilds/{guild_id}/emojis", authorization=f"Bot {os.getenv('DISCORD_BOT_TOKEN')}", cache_ttl=cache_ttl)
+
+  def oauthToken(self, data: dict) -> DiscordResponse:
+    return self.request("POST", "/oauth2/token", data=data, basic_auth=(os.getenv('DISCORD_CLIENT_ID'), os.getenv('DISCORD_CLIENT_SECRET')), retry=False)
+
+  def revokeToken(self, data: dict) -> DiscordResponse:
+    return self.request("POST", "/oauth2/token/revoke", data=data, retry=False)
+
+
+# Process wide client
+discord_client = DiscordClient()
@@ -0,0 +1,42 @@
+"""
+Management command to verify users' Discord avatar URLs and refresh stale
+avatar hashes, using the same sweep setAlbumOfDay starts every day.
+
+Every due user's avatar URL is checked with a HEAD request (concurrently,
+through a bounded thread pool). Users whose avatar 404s get their current
+hash from the Discord API, and last_avatar_check is stamped in one update.
+
+Usage:
+  python manage.py verify_discord_avatars
+
+Flags:
+  --all         Check every user, not just those not checked in the last day
+  --workers N   Concurrent CDN requests (default: AVATAR_SWEEP_WORKERS, 8)
+"""
+
+import os
+
+from dotenv import load_dotenv
+from django.core.management.base import BaseCommand
+
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV == "PROD" else ".env.local")
+
+from discordapi.avatars import AVATAR_SWEEP_WORKERS, sweepDiscordAvatars
+
+
+class Command(BaseCommand):
+    help = "Verify users' Discord avatar URLs and refresh stale avatar hashes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Check every user, not just those due for a check.')
+        parser.add_argument('--workers', type=int, default=AVATAR_SWEEP_WORKERS, help='Concurrent CDN requests.')
+
+    def handle(self, *args, **options):
+        result = sweepDiscordAvatars(force=options['all'], workers=options['workers'])
+
+        summary = f"{result['checked']} checked, {result['refreshed']} refreshed, {result['failed']} failed"
+        if result['failed']:
+            self.stdout.write(self.style.WARNING(f'{summary} (failed users stay due for the next sweep).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,116 @@
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import logging
+import os
+from dotenv import load_dotenv
+
+from users.models import User
+from .models import DiscordTokens, GuildMembership
+from .client import discord_client
+from .utils import isDiscordTokenExpired, refreshDiscordToken
+
+# Declare logging
+logger = logging.getLogger()
+
+# Determine runtime enviornment
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
+
+# How long (seconds) a membership answer is served without revalidating
+GUILD_MEMBERSHIP_FRESH_TTL = int(os.getenv("GUILD_MEMBERSHIP_FRESH_TTL", 300))
+# How long (seconds) a positive answer may still be served (while it is revalidated in the background) before the gate waits on Discord again
+GUILD_MEMBERSHIP_MAX_STALE = int(os.getenv("GUILD_MEMBERSHIP_MAX_STALE", 86400))
+
+# Background revalidation workers (shared by every request in this process)
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="guild-membership-refresh")
+
+
+## =========================================================================================================================================================================================
+## Guild membership cache shared by every session of a user. validateServerMember reads the last known answer from the
+## GuildMembership table: fresh answers are served as is, stale positive answers are served immediately while they are
+## revalidated in the background (stale-while-revalidate), and only unknown, negative or very old answers wait on Discord.
+## =========================================================================================================================================================================================
+
+class TokenRefreshError(Exception):
+  """Raised when the user's discord token is expired and could not be refreshed (they need to log in again)."""
+
+
+def checkGuildMembership(discord_id: str, crid: str = None) -> GuildMembership:
+  '''
+  Ask Discord whether the user is a member of the guild (and has the required role), refreshing their token first if needed,
+  and store the answer. Raises DiscordTokens.DoesNotExist if the user has no tokens, TokenRefreshError if their token could
+  not be refreshed, and DiscordAPIError if Discord could not answer.
+  Does not need the request, so it can run in a background thread (crid is the id of the request that triggered it, for logging).
+  '''
+  tokenData = DiscordTokens.objects.select_related('user').get(user__discord_id=discord_id)
+  if(isDiscordTokenExpired(token=tokenData, discord_user_id=discord_id, crid=crid)):
+    try:
+      refreshDiscordToken(discord_user_id=discord_id, crid=crid)
+    except Exception as e:
+      raise TokenRefreshError(f"Failed to refresh discord token for {discord_id}: {e}") from e
+    tokenData.refresh_from_db()
+  discordRes = discord_client.getCurrentUserGuildMember(f"{tokenData.token_type} {tokenData.access_token}", os.getenv('CORD_SERVER_ID'))
+  # Throttling and server errors say nothing about membership, keep the last known answer
+  if(discordRes.status_code == 429 or discordRes.status_code >= 500):
+    discordRes.raise_for_status()
+  memberData: dict = discordRes.json()
+  # An error response (e.g. Unknown Guild) means they are not a member of the guild
+  member = discordRes.ok and not('message' in memberData.keys())
+  if(not member):
+    logger.debug(memberData, extra={'crid': crid})
+  hasRole = member and (os.getenv('CORD_ROLE_ID') in memberData.get('roles', []))
+  membership, _ = GuildMembership.objects.update_or_create(
+    user=tokenData.user,
+    defaults={'member': member, 'has_role': hasRole, 'checked_at': timezone.now()}
+  )
+  return membership
+
+
+def _revalidate(discord_id: str, crid: str):
+  close_old_connections()
+  try:
+    checkGuildMembership(discord_id, crid)
+    logger.debug(f"Revalidated guild membership for {discord_id} in the background", extra={'crid': crid})
+  except (TokenRefreshError, DiscordTokens.DoesNotExist) as e:
+    # Token could not be refreshed (or is gone), drop the cached answer so the next request goes through the full check
+    logger.warning(f"Background guild membership check failed for {discord_id}, clearing cached answer: {e}", extra={'crid': crid})
+    GuildMembership.objects.filter(user__discord_id=discord_id).delete()
+  except Exception as e:
+    logger.warning(f"Background guild membership check failed for {discord_id}, keeping last known answer: {e}", extra={'crid': crid})
+  finally:
+    cache.delete(f"guild_membership_refresh:{discord_id}")
+    close_old_connections()
+
+
+def scheduleMembershipRevalidation(discord_id: str, crid: str = None):
+  '''Revalidate a user's membership in the background, at most one refresh per user in flight.'''
+  if(not cache.add(f"guild_membership_refresh:{discord_id}", True, 60)):
+    return
+  # Only plain values go to the worker, the request object must not outlive the request
+  _refresh_executor.submit(_revalidate, discord_id, crid)
+
+
+def getGuildMembership(discord_id: str, crid: str = None) -> GuildMembership:
+  '''
+  Return the user's guild membership, from the shared cache when possible (see module header).
+  Raises the same errors as checkGuildMembership when Discord has to be asked synchronously.
+  '''
+  membership = GuildMembership.objects.filter(user__discord_id=discord_id).first()
+  if(membership is not None):
+    age = timezone.now() - membership.checked_at
+    if(age < datetime.timedelta(seconds=GUILD_MEMBERSHIP_FRESH_TTL)):
+      return membership
+    # Only positive answers are served stale, someone who just joined should not be turned away again
+    if(membership.member and membership.has_role and age < datetime.timedelta(seconds=GUILD_MEMBERSHIP_MAX_STALE)):
+      scheduleMembershipRevalidation(discord_id, crid)
+      return membership
+  return checkGuildMembership(discord_id, crid)
+
+
+def clearGuildMembership(user: User):
+  '''Forget a user's cached membership (on logout).'''
+  GuildMembership.objects.filter(user=user).delete()
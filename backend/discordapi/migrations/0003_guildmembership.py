@@ -0,0 +1,24 @@
+# Generated by Django 5.2.12 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discordapi', '0002_rename_discord_access_token_discordtokens_access_token_and_more'),
+        ('users', '0014_useraction_type_action_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuildMembership',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='guild_membership', serialize=False, to='users.user')),
+                ('member', models.BooleanField(default=False)),
+                ('has_role', models.BooleanField(default=False)),
+                ('checked_at', models.DateTimeField()),
+            ],
+        ),
+    ]
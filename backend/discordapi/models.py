@@ -27,4 +27,17 @@ class DiscordTokens(models.Model):
     self.expiry_date = None
     self.refresh_token = None
     self.scope = None
-    self.save()
\ No newline at end of file
+    self.save()
+
+# Last known guild membership for a user, shared by all of their sessions (see discordapi/membership.py)
+class GuildMembership(models.Model):
+  # One to One Connection with User Model
+  user = models.OneToOneField(
+    User,
+    on_delete=models.CASCADE,
+    primary_key=True,
+    related_name="guild_membership",
+  )
+  member = models.BooleanField(default=False) # User is a member of the guild
+  has_role = models.BooleanField(default=False) # User has the required role in the guild
+  checked_at = models.DateTimeField() # When membership was last confirmed with Discord
@@ -1,3 +1,100 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+from django.core.cache import cache
 
-# Create your tests here.
+from unittest import mock
+
+from backend.test_utils import StubHTTPServer
+from .client import DiscordClient, DiscordAPIError, RateLimitBuckets, DISCORD_MAX_RATE_LIMIT_WAIT
+
+
+class RateLimitBucketsTests(SimpleTestCase):
+  def test_exhausted_bucket_waits_for_reset(self):
+    buckets = RateLimitBuckets()
+    self.assertEqual(buckets.wait_time("GET /users/@me", "token"), 0)
+    buckets.update("GET /users/@me", "token", {'X-RateLimit-Bucket': "abc", 'X-RateLimit-Remaining': "0", 'X-RateLimit-Reset-After': "2"}, 200)
+    self.assertAlmostEqual(buckets.wait_time("GET /users/@me", "token"), 2, delta=0.1)
+    # Buckets are tracked per credential
+    self.assertEqual(buckets.wait_time("GET /users/@me", "other-token"), 0)
+
+  def test_global_rate_limit_applies_to_every_route(self):
+    buckets = RateLimitBuckets()
+    buckets.update("GET /users/@me", "token", {'X-RateLimit-Global': "true", 'Retry-After': "3"}, 429)
+    self.assertAlmostEqual(buckets.wait_time("GET /guilds/1/emojis", "other-token"), 3, delta=0.1)
+
+
+class DiscordClientTests(SimpleTestCase):
+  def setUp(self):
+    cache.clear()
+    self.stub = StubHTTPServer("/api/v10")
+    self.client = DiscordClient(base_url=self.stub.base_url)
+
+  def tearDown(self):
+    self.client.session.close()
+    self.stub.close()
+    cache.clear()
+
+  @mock.patch("discordapi.client.time.sleep")
+  def test_waits_for_exhausted_bucket_before_sending(self, sleep):
+    self.stub.responses = [(200, {'X-RateLimit-Remaining': "0", 'X-RateLimit-Reset-After': "1.5"}, {'id': "1"})]
+    self.client.getCurrentUser("Bearer a")
+    self.client.getCurrentUser("Bearer a")
+    self.assertEqual(len(self.stub.requests), 2)
+    sleep.assert_called_once()
+    self.assertAlmostEqual(sleep.call_args.args[0], 1.5, delta=0.1)
+
+  def test_fails_fast_when_bucket_resets_too_late(self):
+    self.stub.responses = [(200, {'X-RateLimit-Remaining': "0", 'X-RateLimit-Reset-After': str(DISCORD_MAX_RATE_LIMIT_WAIT + 60)}, {'id': "1"})]
+    self.client.getCurrentUser("Bearer a")
+    with self.assertRaises(DiscordAPIError) as error:
+      self.client.getCurrentUser("Bearer a")
+    self.assertEqual(error.exception.status, 429)
+    # The second request was never sent
+    self.assertEqual(len(self.stub.requests), 1)
+
+  @mock.patch("discordapi.client.time.sleep")
+  def test_retries_rate_limited_request(self, sleep):
+    self.stub.responses = [(429, {'Retry-After': "0.5"}, {'message': "You are being rate limited."}), (200, {}, {'id': "1"})]
+    res = self.client.getCurrentUser("Bearer a")
+    self.assertEqual(res.status_code, 200)
+    self.assertEqual(res.json(), {'id': "1"})
+    self.assertEqual(len(self.stub.requests), 2)
+    # Retry-After is honoured (plus a little jitter)
+    self.assertTrue(0.5 <= sleep.call_args.args[0] <= 0.75)
+
+  @mock.patch("discordapi.client.time.sleep")
+  def test_does_not_retry_past_max_wait(self, sleep):
+    self.stub.responses = [(429, {'Retry-After': str(DISCORD_MAX_RATE_LIMIT_WAIT + 60)}, {'message': "You are being rate limited."})]
+    res = self.client.getCurrentUser("Bearer a")
+    self.assertEqual(res.status_code, 429)
+    self.assertEqual(len(self.stub.requests), 1)
+    sleep.assert_not_called()
+
+  @mock.patch("discordapi.client.time.sleep")
+  def test_retries_server_errors_on_reads(self, sleep):
+    self.stub.responses = [(502, {}, {'message': "Bad Gateway"}), (200, {}, {'id': "1"})]
+    self.assertEqual(self.client.getCurrentUser("Bearer a").status_code, 200)
+    self.assertEqual(len(self.stub.requests), 2)
+
+  @mock.patch("discordapi.client.time.sleep")
+  def test_token_exchange_is_not_retried_on_server_error(self, sleep):
+    # The first exchange may have been processed (and the code used up), a retry would fail with invalid_grant
+    self.stub.responses = [(502, {}, {'message': "Bad Gateway"}), (200, {}, {'access_token': "token"})]
+    self.assertEqual(self.client.oauthToken({'grant_type': "refresh_token", 'refresh_token': "refresh"}).status_code, 502)
+    self.assertEqual(len(self.stub.requests), 1)
+
+  def test_cache_is_keyed_per_credential(self):
+    self.stub.responses = [(200, {}, {'id': "1"}), (200, {}, {'id': "2"})]
+    first = self.client.getCurrentUser("Bearer a", cache_ttl=60)
+    self.assertEqual(self.client.getCurrentUser("Bearer a", cache_ttl=60).json(), first.json())
+    self.assertEqual(len(self.stub.requests), 1)
+    # Another user's token must never be served the first user's response
+    other = self.client.getCurrentUser("Bearer b", cache_ttl=60)
+    self.assertEqual(other.json(), {'id': "2"})
+    self.assertEqual(len(self.stub.requests), 2)
+    self.assertEqual(self.stub.requests[1][1].get('Authorization'), "Bearer b")
+
+  def test_rate_limited_response_is_not_cached(self):
+    self.stub.responses = [(429, {'Retry-After': str(DISCORD_MAX_RATE_LIMIT_WAIT + 60)}, {'message': "You are being rate limited."}), (200, {}, {'id': "1"})]
+    self.client.getCurrentUser("Bearer a", cache_ttl=60)
+    self.assertEqual(self.client.getCurrentUser("Bearer a", cache_ttl=60).status_code, 200)
+    self.assertEqual(len(self.stub.requests), 2)
@@ -14,11 +14,10 @@ from .utils import (
   checkPreviousAuthorization,
 )
 from .models import DiscordTokens
+from .client import discord_client
+from .membership import getGuildMembership, clearGuildMembership, TokenRefreshError
 
 import logging
-import requests
-from datetime import datetime
-from datetime import timedelta
 from dotenv import load_dotenv
 import os
 import json
@@ -31,6 +30,9 @@ logger = logging.getLogger()
 APP_ENV = os.getenv('APP_ENV') or 'DEV'
 load_dotenv(".env.production" if APP_ENV=="PROD" else ".env.local")
 
+# How long (seconds) Discord responses are reused for the guild emoji list
+EMOJI_LIST_CACHE_TTL = 300
+
 ###
 # Exchange discord auth code for discord api token (part of the login flow)
 ###
@@ -46,10 +48,7 @@ def getDiscordToken(request: HttpRequest):
   # Retrieve code from request
   discordCode = reqBody['code']
   discordRedirectURI = reqBody['redirect_uri']
-  # Prep request data and headers to discord api
-  reqHeaders = { 
-    'Content-Type': 'application/x-www-form-urlencoded',
-  }
+  # Prep request data to discord api
   reqData = {
     'grant_type': 'authorization_code',
     'code': discordCode,
@@ -59,7 +58,7 @@ def getDiscordToken(request: HttpRequest):
   }
   # Make request to discord api
   logger.debug("Making request to discord api...", extra={'crid': request.crid})
-  discordRes = requests.post(f"{os.getenv('DISCORD_API_ENDPOINT')}/oauth2/token", headers=reqHeaders, data=reqData, auth=(os.getenv('DISCORD_CLIENT_ID'), os.getenv('DISCORD_CLIENT_SECRET')))
+  discordRes = discord_client.oauthToken(reqData)
   if(discordRes.status_code != 200):
     logger.error("Error in request:\n" + str(discordRes.json()), extra={'crid': request.crid})
     discordRes.raise_for_status()
@@ -67,13 +66,9 @@ def getDiscordToken(request: HttpRequest):
   logger.debug("Discord api returned, converting to json...", extra={'crid': request.crid})
   discordResJSON = discordRes.json()
   # Retrieving discord data to create a user account
-  reqHeaders = { 
-    'Authorization': f"{discordResJSON['token_type']} {discordResJSON['access_token']}"
-  }
-  # Send Request to API
   logger.debug("Making request to discord api...", extra={'crid': request.crid})
   try:
-    discordRes = requests.get(f"{os.getenv('DISCORD_API_ENDPOINT')}/users/@me", headers=reqHeaders)
+    discordRes = discord_client.getCurrentUser(f"{discordResJSON['token_type']} {discordResJSON['access_token']}")
     if(discordRes.status_code != 200):
       logger.error("Error in request:\n" + str(discordRes.json()), extra={'crid': request.crid})
       discordRes.raise_for_status()
@@ -114,14 +109,10 @@ def getDiscordUserData(request: HttpRequest):
     except Exception as e:
       logger.error(f"Filed to refresh discord token! Returning redirect call. Error: {e}", extra={'crid': request.crid})
       return HttpResponse("/", status=302)
-  # Prep request data and headers to discord api
-  reqHeaders = { 
-    'Authorization': f"{tokenData.token_type} {tokenData.access_token}"
-  }
   # Send Request to API
   logger.info("Making request to discord api...", extra={'crid': request.crid})
   try:
-    discordRes = requests.get(f"{os.getenv('DISCORD_API_ENDPOINT')}/users/@me", headers=reqHeaders)
+    discordRes = discord_client.getCurrentUser(f"{tokenData.token_type} {tokenData.access_token}")
     if(discordRes.status_code != 200):
       logger.error("Error in request:\n" + str(discordRes.json()), extra={'crid': request.crid})
       discordRes.raise_for_status()
@@ -148,8 +139,6 @@ def validateServerMember(request: HttpRequest):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Cookie datetime format
-  cookie_time_fmt = "%d/%m/%y %H:%M:%S"
   # Retrieve user token data
   try:
     tokenData = DiscordTokens.objects.get(user__discord_id = request.session.get("discord_id"))
@@ -161,7 +150,7 @@ def validateServerMember(request: HttpRequest):
     return JsonResponse(out)
   # Ensure user is logged in
   try:
-    if(isDiscordTokenExpired(request)):
+    if(isDiscordTokenExpired(request, token=tokenData)):
       refreshDiscordToken(request)
   except Exception as e:
     logger.error(f"Filed to refresh discord token! Returning redirect call. Error: {e}", extra={'crid': request.crid})
@@ -178,45 +167,29 @@ def validateServerMember(request: HttpRequest):
   # response = JsonResponse(out)
   # return response
   ### END EMERGENCY OVERRIDE 
-  # Check if member status already exists in session store
-  if(("server_member" in request.session) and (request.session.get("server_member_expiry") != None) and (datetime.strptime(request.session.get("server_member_expiry"), cookie_time_fmt) > datetime.now()) ):
-    status = request.session.get("server_member")
-    logger.debug(f"Session has cached membership value of: {status}", extra={'crid': request.crid})
-    member = status
-    hasRole = status
-  else:
-    # Prep headers to discord api
-    reqHeaders = { 
-      'Authorization': f"{tokenData.token_type} {tokenData.access_token}"
-    }
-    # Send Request to API
-    logger.debug("Making request to discord api for server member object to check member and role...", extra={'crid': request.crid})
-    try:
-      discordRes = requests.get(f"{os.getenv('DISCORD_API_ENDPOINT')}/users/@me/guilds/{os.getenv('CORD_SERVER_ID')}/member", headers=reqHeaders)
-      # NOTE: Not handling error code response here due to the nature of how im handling validation
-    except:
-      return HttpResponse(status=500)
-    # Convert response to List
-    discordResList: dict = discordRes.json()
-    # Determine if user has been given an error response, meaning they are not a member of the guild
-    logger.debug("Checking if user is in server...", extra={'crid': request.crid})
-    member = not('message' in discordResList.keys())
-    # print message
-    if(not member):
-      logger.debug(discordResList, extra={'crid': request.crid})
-    # If user IS a member of the server, check that they have the required role
-    hasRole = False
-    if(member):
-      hasRole = os.getenv('CORD_ROLE_ID') in discordResList['roles']
-    # Store member status in session to skip this process for 5 mins
-    logger.debug(f"Setting session storage to avoid discordapi calls for 5 mins...", extra={'crid': request.crid})
-    request.session['server_member'] = (member and hasRole)
-    request.session['server_member_expiry'] = (datetime.now() + timedelta(minutes=5)).strftime(cookie_time_fmt) 
+  # Get membership from the cache shared by all of the user's sessions (revalidated in the background once stale)
+  try:
+    membership = getGuildMembership(request.session.get("discord_id"), request.crid)
+  except DiscordTokens.DoesNotExist as e:
+    logger.error("Discord token does not exist for this user, will need to revalidate.", extra={'crid': request.crid})
+    out = {}
+    out['member'] = False
+    out['role'] = False
+    return JsonResponse(out)
+  except TokenRefreshError as e:
+    logger.error(f"Filed to refresh discord token! Returning redirect call. Error: {e}", extra={'crid': request.crid})
+    # Clear session cookie on fail
+    response = HttpResponse("/", status=302)
+    response.delete_cookie("sessionid")
+    return response
+  except Exception as e:
+    logger.error(f"Failed to check guild membership with discord api! Error: {e}", extra={'crid': request.crid})
+    return HttpResponse(status=500)
   # Return JsonResponse containing true or false in body
   logger.debug("Returning member status...", extra={'crid': request.crid})
   out = {}
-  out['member'] = member
-  out['role'] = hasRole
+  out['member'] = membership.member
+  out['role'] = membership.has_role
   # Return response
   response = JsonResponse(out)
   return response
@@ -282,10 +255,7 @@ def logout(request: HttpRequest):
       return HttpResponse("/", status=302)
   # Get token data from session
   tokenData = DiscordTokens.objects.get(user__discord_id = request.session.get('discord_id'))
-  # Prep request data and headers to discord api
-  reqHeaders = { 
-    'Content-Type': 'application/x-www-form-urlencoded',
-  }
+  # Prep request data to discord api
   reqData = {
     'client_id': os.getenv('DISCORD_CLIENT_ID'),
     'client_secret': os.getenv('DISCORD_CLIENT_SECRET'),
@@ -294,7 +264,7 @@ def logout(request: HttpRequest):
   # Make API request to discord to revoke user token
   logger.info("Making token revoke request to discord api...", extra={'crid': request.crid})
   try:
-    discordRes = requests.post(f"{os.getenv('DISCORD_API_ENDPOINT')}/oauth2/token/revoke", headers=reqHeaders, data=reqData)
+    discordRes = discord_client.revokeToken(reqData)
     if(discordRes.status_code != 200):
       logger.error("Error in request:\n" + str(discordRes.json()), extra={'crid': request.crid})
       discordRes.raise_for_status()
@@ -302,6 +272,7 @@ def logout(request: HttpRequest):
     return HttpResponse(status=500)
   # Delete key data from database
   tokenData.clearTokens()
+  clearGuildMembership(tokenData.user)
   # Clear session data
   logger.debug("Flushing session...", extra={'crid': request.crid})
   request.session.flush()
@@ -323,10 +294,18 @@ def logout(request: HttpRequest):
 # NOTE: This should be done by the bot, it would seem
 ###
 def getEmojiList(request: HttpRequest):
-  headers = {
-    "Authorization": f"Bot {os.getenv('DISCORD_BOT_TOKEN')}"
-  }
-  # Send Request to API
-  discordRes = requests.get(f"{os.getenv('DISCORD_API_ENDPOINT')}/guilds/{os.getenv('CORD_SERVER_ID')}/emojis", headers=headers)
-  discordResObj: dict = discordRes.json()
-  print(discordResObj)
\ No newline at end of file
+  # Make sure request is a get request
+  if(request.method != "GET"):
+    logger.warning("getEmojiList called with a non-GET method, returning 405.", extra={'crid': request.crid})
+    res = HttpResponse("Method not allowed")
+    res.status_code = 405
+    return res
+  # Send Request to API (guild emojis rarely change, so responses are cached briefly)
+  try:
+    discordRes = discord_client.getGuildEmojis(os.getenv('CORD_SERVER_ID'), cache_ttl=EMOJI_LIST_CACHE_TTL)
+    discordRes.raise_for_status()
+  except Exception as e:
+    logger.error(f"Failed to retrieve guild emoji list: {e}", extra={'crid': request.crid})
+    return HttpResponse(status=502)
+  # Return emoji list
+  return JsonResponse({'emojis': discordRes.json()})
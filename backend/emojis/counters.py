@@ -0,0 +1,148 @@
+from django.db.models import Case, When, Value, F, IntegerField
+
+import logging
+import threading
+import atexit
+import uuid
+import os
+
+from backend.redis_client import getRedisClient, redisKey
+from backend.write_behind import selectStore, PeriodicFlusher
+
+# Declare logging
+logger = logging.getLogger()
+
+# Where pending emoji use increments are kept ("MEMORY" is per-process, "REDIS" is shared between workers)
+EMOJI_USE_STORE_BACKEND = os.getenv("EMOJI_USE_STORE_BACKEND", "MEMORY").upper()
+# How often (in seconds) pending increments are written back to CustomEmoji.use_count
+EMOJI_USE_FLUSH_INTERVAL = int(os.getenv("EMOJI_USE_FLUSH_INTERVAL", 30))
+
+
+## =========================================================================================================================================================================================
+## Buffered emoji use counting. recordEmojiUse adds to a pending counter instead of updating the row on every click, and pending
+## increments are written back in one batched UPDATE every EMOJI_USE_FLUSH_INTERVAL seconds by a background thread (and on shutdown).
+## listEmojis merges the pending counts with the stored use_count so popularity ordering is never behind.
+## =========================================================================================================================================================================================
+
+class MemoryUseCountStore:
+  """Per-process pending increments, keyed by emoji_id. Each worker flushes its own increments, so no coordination is needed."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._pending = {}
+
+  def increment(self, emoji_id: int, amount: int = 1):
+    with self._lock:
+      self._pending[emoji_id] = self._pending.get(emoji_id, 0) + amount
+
+  def pending(self) -> dict:
+    with self._lock:
+      return dict(self._pending)
+
+  def take(self) -> dict:
+    with self._lock:
+      taken = self._pending
+      self._pending = {}
+      return taken
+
+  def restore(self, counts: dict):
+    for emoji_id, amount in counts.items():
+      self.increment(emoji_id, amount)
+
+
+class RedisUseCountStore:
+  """
+  Pending increments shared by every worker in a single Redis hash. Flushing renames the hash to a key unique to that flush first,
+  so each increment is taken exactly once even when several workers flush at the same time.
+  """
+
+  def __init__(self):
+    self._redis = getRedisClient()
+    self._hash_key = redisKey("emoji_use_counts")
+    self._flush_key_prefix = redisKey("emoji_use_counts:flushing")
+
+  def increment(self, emoji_id: int, amount: int = 1):
+    self._redis.hincrby(self._hash_key, emoji_id, amount)
+
+  def pending(self) -> dict:
+    return {int(emoji_id): int(amount) for emoji_id, amount in self._redis.hgetall(self._hash_key).items()}
+
+  def take(self) -> dict:
+    import redis as redis_module
+    # RENAME is atomic: increments that arrive afterwards land in a fresh hash. The target key is unique per flush,
+    # so a concurrent flush from another worker can never overwrite (and lose) this batch
+    flush_key = f"{self._flush_key_prefix}:{uuid.uuid4().hex}"
+    try:
+      self._redis.rename(self._hash_key, flush_key)
+    except redis_module.ResponseError:
+      # Nothing pending (hash does not exist)
+      return {}
+    pipe = self._redis.pipeline()
+    pipe.hgetall(flush_key)
+    pipe.delete(flush_key)
+    taken, _ = pipe.execute()
+    return {int(emoji_id): int(amount) for emoji_id, amount in taken.items()}
+
+  def restore(self, counts: dict):
+    pipe = self._redis.pipeline()
+    for emoji_id, amount in counts.items():
+      pipe.hincrby(self._hash_key, emoji_id, amount)
+    pipe.execute()
+
+
+class EmojiUseCounter(PeriodicFlusher):
+  """Front for the configured store, a background thread flushes pending increments every EMOJI_USE_FLUSH_INTERVAL seconds."""
+
+  thread_name = "emoji-use-flusher"
+  flush_interval = EMOJI_USE_FLUSH_INTERVAL
+
+  def __init__(self):
+    super().__init__()
+    self.store = selectStore(EMOJI_USE_STORE_BACKEND, RedisUseCountStore, MemoryUseCountStore, "emoji use")
+    self._flush_lock = threading.Lock()
+
+  def record(self, emoji_id: int):
+    """Count a single use, never touches the database."""
+    self.store.increment(emoji_id)
+    self._ensureThread()
+
+  def pending(self) -> dict:
+    """Increments recorded but not yet written to the database, keyed by emoji_id."""
+    return self.store.pending()
+
+  def flush(self) -> int:
+    """Write every pending increment back in a single batched UPDATE. Returns the number of emojis written."""
+    from emojis.models import CustomEmoji
+    # Avoid concurrent flushes from multiple threads in this process
+    if(not self._flush_lock.acquire(blocking=False)):
+      return 0
+    counts = {}
+    try:
+      counts = self.store.take()
+      if(not counts):
+        return 0
+      # Inactive or unknown emojis are not counted (same as the old per-click update)
+      written = CustomEmoji.objects.filter(emoji_id__in=list(counts.keys()), is_active=True).update(
+        use_count=F('use_count') + Case(
+          *[When(emoji_id=emoji_id, then=Value(amount)) for emoji_id, amount in counts.items()],
+          default=Value(0), output_field=IntegerField()
+        )
+      )
+      logger.debug(f"Flushed {sum(counts.values())} emoji uses across {written} emojis")
+      return written
+    except Exception as e:
+      logger.error(f"Failed to flush emoji use counts, keeping them pending: {e}")
+      # Put the increments back so they are retried on the next flush
+      try:
+        self.store.restore(counts)
+      except Exception as restore_error:
+        logger.error(f"Failed to restore pending emoji use counts, {sum(counts.values())} uses lost: {restore_error}")
+      return 0
+    finally:
+      self._flush_lock.release()
+
+
+# Process wide emoji use counter
+emoji_use_counter = EmojiUseCounter()
+# Make sure pending uses are written on shutdown
+atexit.register(emoji_use_counter.flush)
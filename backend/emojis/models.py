@@ -67,11 +67,11 @@ class CustomEmoji(models.Model):
     unless skip_action_log=True (used by the seed_legacy_emojis management
     command to avoid polluting the audit log with bulk historical imports).
     """
-    from users.models import UserAction
+    from users.audit import recordUserAction
     is_new = self.pk is None
     super().save(*args, **kwargs)
     if is_new and self.submitted_by and not skip_action_log:
-      UserAction.objects.create(
+      recordUserAction(
         user=self.submitted_by,
         action_type='CREATE',
         entity_type='CUSTOM_EMOJI',
@@ -88,14 +88,14 @@ class CustomEmoji(models.Model):
     critical error if called without one (prevents silent, unattributed deletes).
     Logs a DELETE UserAction before removing the record.
     """
-    from users.models import UserAction
+    from users.audit import recordUserAction
     if deleter is None:
       logger.critical(
         f'ATTEMPTED DELETE OF CUSTOM_EMOJI (ID: {self.pk}, name: {self.name}) '
         f'WITH NO DELETER PASSED IN! KEEPING EMOJI.'
       )
       return
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter,
       action_type='DELETE',
       entity_type='CUSTOM_EMOJI',
@@ -1,7 +1,6 @@
-from django.http import HttpRequest, HttpResponse, FileResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.files.storage import FileSystemStorage
-from django.db.models import F
 
 import json
 import logging
@@ -13,6 +12,8 @@ import pytz
 from dotenv import load_dotenv
 
 from .models import CustomEmoji
+from .counters import emoji_use_counter
+from backend.media import getMediaMeta, serveMediaFile, invalidateMediaMeta
 from users.utils import getUserObj
 
 # Declare logging
@@ -41,8 +42,12 @@ def listEmojis(request: HttpRequest):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Retrieve all active emojis ordered by name
-  emojis = CustomEmoji.objects.filter(is_active=True)
+  # Retrieve all active emojis, ordered by popularity (stored use_count plus uses not yet flushed) then name
+  pending_uses = emoji_use_counter.pending()
+  emojis = sorted(
+    CustomEmoji.objects.filter(is_active=True).select_related('submitted_by'),
+    key=lambda emoji: (-(emoji.use_count + pending_uses.get(emoji.emoji_id, 0)), emoji.name)
+  )
   # Build base URL once outside the loop
   backend_base = (os.getenv('BACKEND_BASE_URL') or '').rstrip('/')
   # Build emoji-mart compatible emoji list
@@ -53,6 +58,7 @@ def listEmojis(request: HttpRequest):
       'emoji_id': emoji.emoji_id,
       'name': emoji.display_name or emoji.name,
       'keywords': emoji.keywords,
+      'use_count': emoji.use_count + pending_uses.get(emoji.emoji_id, 0),
       'skins': [{'src': f'{backend_base}/emojis/serve/{emoji.emoji_id}/'}],
       'submitted_by': emoji.submitted_by.nickname if emoji.submitted_by else "UNKNOWN",
       'submitted_at': emoji.submitted_at.strftime('%m/%d/%Y, %H:%M:%S') if emoji.submitted_at else "ERR DATE"
@@ -71,24 +77,23 @@ def serveEmoji(request: HttpRequest, emoji_id: int):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Retrieve the emoji record
-  try:
-    emoji = CustomEmoji.objects.get(emoji_id=emoji_id, is_active=True)
-  except ObjectDoesNotExist:
-    logger.warning(f"serveEmoji could not find active emoji with id={emoji_id}.", extra={'crid': request.crid})
+  # Retrieve the emoji file metadata (cached, so conditional requests cost no DB query)
+  meta = getMediaMeta("emoji", emoji_id, lambda: loadEmojiMedia(emoji_id))
+  if meta is None:
+    logger.warning(f"serveEmoji could not find active emoji (or its file) with id={emoji_id}.", extra={'crid': request.crid})
     res = HttpResponse("Emoji not found")
     res.status_code = 404
     return res
-  # Build path and stream file
-  file_path = os.path.join(os.getenv('EMOJI_PATH'), emoji.filename)
-  logger.info(f"Serving emoji file: {file_path}", extra={'crid': request.crid})
-  try:
-    return FileResponse(open(file_path, 'rb'), content_type=emoji.filetype)
-  except FileNotFoundError:
-    logger.error(f"serveEmoji file not found on disk for emoji_id={emoji_id}: {file_path}", extra={'crid': request.crid})
-    res = HttpResponse("Emoji file not found")
-    res.status_code = 404
-    return res
+  # Serve with ETag/304, private revalidated caching and range support
+  return serveMediaFile(request, meta, accel_prefix=os.getenv('EMOJI_ACCEL_PREFIX'))
+
+
+# Loader for getMediaMeta, returns (root, filename, content_type) or None for missing/inactive emojis
+def loadEmojiMedia(emoji_id: int):
+  emoji = CustomEmoji.objects.filter(emoji_id=emoji_id, is_active=True).values('filename', 'filetype').first()
+  if emoji is None:
+    return None
+  return (os.getenv('EMOJI_PATH'), emoji['filename'], emoji['filetype'])
 
 
 ###
@@ -198,13 +203,9 @@ def recordEmojiUse(request: HttpRequest, emoji_id: int):
   user = getUserObj(request.session.get('discord_id'))
   if not user:
     return JsonResponse({'error': 'Not authenticated'}, status=401)
-  # Atomically increment use count — F() expression prevents race conditions
-  updated = CustomEmoji.objects.filter(emoji_id=emoji_id, is_active=True).update(
-    use_count=F('use_count') + 1
-  )
-  if not updated:
-    # Silently succeed even if the emoji doesn't exist — this is fire-and-forget
-    logger.warning(f"recordEmojiUse found no active emoji with id={emoji_id}.", extra={'crid': request.crid})
+  # Buffer the increment — pending uses are written back in one batched update per flush interval by the counter's flush thread
+  # (unknown or inactive emojis are skipped at flush time, this stays fire-and-forget)
+  emoji_use_counter.record(emoji_id)
   return JsonResponse({'success': True})
 
 
@@ -245,6 +246,7 @@ def deleteEmoji(request: HttpRequest, emoji_id: int):
   # Delete the record — model logs the UserAction
   logger.info(f"Admin {user.nickname} deleting emoji '{emoji.name}' (emoji_id={emoji_id}).", extra={'crid': request.crid})
   emoji.delete(deleter=user, reason=reason)
+  invalidateMediaMeta("emoji", emoji_id)
   return JsonResponse({'success': True})
 
 
@@ -264,8 +266,15 @@ def adminListEmojis(request: HttpRequest):
   if not user or not user.is_staff:
     return JsonResponse({'error': 'Admin access required'}, status=403)
   # Retrieve all emojis — no is_active filter, admins see everything
-  emojis = CustomEmoji.objects.all()
-  return JsonResponse({'emojis': [e.toJSON(admin=True) for e in emojis]})
+  emojis = CustomEmoji.objects.select_related('submitted_by')
+  # Include uses that have not been flushed yet
+  pending_uses = emoji_use_counter.pending()
+  out = []
+  for e in emojis:
+    emojiJSON = e.toJSON(admin=True)
+    emojiJSON['use_count'] += pending_uses.get(e.emoji_id, 0)
+    out.append(emojiJSON)
+  return JsonResponse({'emojis': out})
 
 
 ###
@@ -307,5 +316,7 @@ def updateEmojiMeta(request: HttpRequest, emoji_id: int):
     return JsonResponse({'error': 'No valid fields provided to update'}, status=400)
   # Save only the changed fields — skip_action_log since meta updates are not user-facing actions
   emoji.save(update_fields=update_fields, skip_action_log=True)
+  # Deactivated emojis must stop being served
+  invalidateMediaMeta("emoji", emoji_id)
   logger.info(f"Admin {user.nickname} updated emoji '{emoji.name}' (emoji_id={emoji_id}): {update_fields}.", extra={'crid': request.crid})
   return JsonResponse({'success': True, 'emoji': emoji.toJSON(admin=True)})
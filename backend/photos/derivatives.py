@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import threading
+import logging
+import os
+import atexit
+
+# Declare logging
+logger = logging.getLogger()
+
+# Pillow is needed to build derivatives, without it the original upload is always served
+try:
+  from PIL import Image as PILImage
+  from PIL import ImageOps
+except ImportError:
+  PILImage = None
+
+# Derivative sizes served by getImage (?size=<name>), each is a WebP scaled down to the given max width
+DERIVATIVE_WIDTHS = {
+  "thumb": 320,
+  "small": 640,
+  "medium": 1280,
+}
+DERIVATIVE_QUALITY = int(os.getenv("PHOTO_DERIVATIVE_QUALITY", 80))
+# Background workers used to build derivatives after an upload
+PHOTO_DERIVATIVE_WORKERS = int(os.getenv("PHOTO_DERIVATIVE_WORKERS", 2))
+
+
+## =========================================================================================================================================================================================
+## Photo derivatives. Every upload gets WebP variants at DERIVATIVE_WIDTHS stored next to the original under PHOTOSHOP_PATH as
+## "{original name without extension}_{size}.webp". Animated images are left alone (their original is served for every size),
+## they get an empty "{original name without extension}.noderivatives" marker instead so they are not queued again.
+## =========================================================================================================================================================================================
+
+def derivativeFilename(filename: str, size: str) -> str:
+  return f"{os.path.splitext(filename)[0]}_{size}.webp"
+
+
+def noDerivativesMarker(filename: str) -> str:
+  return f"{os.path.splitext(filename)[0]}.noderivatives"
+
+
+def generateDerivatives(root: str, filename: str, force: bool = False) -> list:
+  '''
+  Build every missing derivative for an original file (all of them when force is set). Returns the list of derivative filenames written.
+  Kept free of DB access so it can run in a process pool (see the generate_photo_derivatives command).
+  '''
+  if(PILImage is None):
+    logger.warning("Pillow is not installed, skipping photo derivative generation")
+    return []
+  source_path = os.path.join(root, filename)
+  written = []
+  with PILImage.open(source_path) as source:
+    if(getattr(source, "is_animated", False)):
+      logger.debug(f"Skipping derivatives for animated image {filename}")
+      # Record that this image never gets derivatives, so sized requests stop queueing it
+      open(os.path.join(root, noDerivativesMarker(filename)), "w").close()
+      return []
+    # Apply the EXIF orientation to the pixels, WebP output drops the tag (phone photos would come out rotated)
+    oriented = ImageOps.exif_transpose(source)
+    # Flatten palette/alpha modes into something WebP handles
+    image = oriented.convert("RGBA" if ("A" in oriented.getbands() or oriented.mode == "P") else "RGB")
+    for size, width in DERIVATIVE_WIDTHS.items():
+      target_name = derivativeFilename(filename, size)
+      target_path = os.path.join(root, target_name)
+      if(os.path.exists(target_path) and not force):
+        continue
+      resized = image.copy()
+      resized.thumbnail((width, width * 10), PILImage.LANCZOS)
+      # Write to a temp file first so a half-written derivative is never served
+      temp_path = f"{target_path}.tmp"
+      resized.save(temp_path, "WEBP", quality=DERIVATIVE_QUALITY, method=4)
+      os.replace(temp_path, target_path)
+      written.append(target_name)
+  return written
+
+
+# Background pool used on upload, created lazily
+_derivative_executor = None
+# Images already queued by this process, each is queued at most once (a failed build is retried by the generate_photo_derivatives command or after a restart)
+_queued_images = set()
+_queued_lock = threading.Lock()
+
+def queueDerivatives(image_id: int, root: str, filename: str):
+  '''
+  Build derivatives for an image in the background, cached getImage metadata is dropped for each size that was written.
+  Does nothing if the image was already queued by this process or is marked as never getting derivatives.
+  '''
+  global _derivative_executor
+  if(PILImage is None):
+    return None
+  if(os.path.exists(os.path.join(root, noDerivativesMarker(filename)))):
+    return None
+  with _queued_lock:
+    if(image_id in _queued_images):
+      return None
+    _queued_images.add(image_id)
+  if(_derivative_executor is None):
+    _derivative_executor = ThreadPoolExecutor(max_workers=PHOTO_DERIVATIVE_WORKERS, thread_name_prefix="photo-derivatives")
+    atexit.register(_derivative_executor.shutdown, wait=True)
+
+  def run():
+    from backend.media import invalidateMediaMeta
+    try:
+      written = generateDerivatives(root, filename)
+      logger.info(f"Generated {len(written)} derivatives for image {image_id}")
+    except Exception as e:
+      logger.error(f"Failed to generate derivatives for image {image_id} ({filename}): {e}")
+      return
+    # Sizes served from the original while their derivative was missing must be looked up again
+    for size in DERIVATIVE_WIDTHS:
+      if(derivativeFilename(filename, size) in written):
+        invalidateMediaMeta(f"photo_{size}", image_id)
+
+  return _derivative_executor.submit(run)
@@ -0,0 +1,107 @@
+"""
+Management command to backfill photo derivatives (thumbnails and web sized
+WebP variants) for existing Image rows.
+
+New uploads get their derivatives from a background pool in photos.views;
+this command covers images uploaded before derivatives existed, building
+them in parallel across worker processes. Running web workers pick up the
+new files on the next request for each size, no restart is needed.
+
+Usage:
+  python manage.py generate_photo_derivatives --workers 4
+
+Flags:
+  --workers   Number of worker processes (default: CPU count)
+  --force     Rebuild derivatives that already exist (and retry images marked as never getting derivatives)
+  --dry-run   List the images that would be processed without writing anything
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+from django.core.management.base import BaseCommand, CommandError
+
+APP_ENV = os.getenv('APP_ENV') or 'DEV'
+load_dotenv(".env.production" if APP_ENV == "PROD" else ".env.local")
+
+from photos.derivatives import PILImage, DERIVATIVE_WIDTHS, derivativeFilename, noDerivativesMarker, generateDerivatives
+from photos.models import Image
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails and WebP variants for existing photos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: CPU count).',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild derivatives that already exist.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the images that would be processed without writing anything.',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        force = options['force']
+        dry_run = options['dry_run']
+
+        if PILImage is None:
+            raise CommandError('Pillow is not installed — cannot generate derivatives.')
+
+        root = os.getenv('PHOTOSHOP_PATH')
+        if not root or not os.path.isdir(root):
+            raise CommandError(f'PHOTOSHOP_PATH is not set or is not a directory: {root}')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN — no changes will be written.\n'))
+
+        # Only images with at least one missing derivative that are not marked as never getting any (or all of them with --force)
+        pending = [
+            (image_id, filename)
+            for image_id, filename in Image.objects.order_by('image_id').values_list('image_id', 'filename')
+            if force or (
+                not os.path.exists(os.path.join(root, noDerivativesMarker(filename)))
+                and any(
+                    not os.path.exists(os.path.join(root, derivativeFilename(filename, size)))
+                    for size in DERIVATIVE_WIDTHS
+                )
+            )
+        ]
+        self.stdout.write(f'{len(pending)} image(s) need derivatives, using {workers} worker(s).\n')
+
+        if dry_run:
+            for image_id, filename in pending:
+                self.stdout.write(f'  [dry-run] would process image {image_id} ({filename})')
+            return
+
+        written_total = 0
+        failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(generateDerivatives, root, filename, force): (image_id, filename)
+                for image_id, filename in pending
+            }
+            for future in as_completed(futures):
+                image_id, filename = futures[future]
+                try:
+                    written = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  FAIL  image {image_id} ({filename}) — {exc}'))
+                    continue
+                written_total += len(written)
+                self.stdout.write(f'  OK    image {image_id} — {len(written)} derivative(s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nDone. {written_total} derivative(s) written, {failed} image(s) failed.'
+        ))
@@ -1,13 +1,16 @@
-from django.http import HttpRequest, HttpResponse, FileResponse, JsonResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.core.files.storage import FileSystemStorage
 
 import logging
 import os
 import uuid
+import mimetypes
 import json
 
 
 from .models import Image
+from .derivatives import DERIVATIVE_WIDTHS, derivativeFilename, queueDerivatives
+from backend.media import getMediaMeta, invalidateMediaMeta, serveMediaFile
 from users.models import User
 
 # Declare logging
@@ -98,6 +101,8 @@ def uploadImage(request: HttpRequest):
   image_obj.tagged_users.add(*img_tagged_users_list)
   # Save Image
   image_obj.save()
+  # Build thumbnails and web sized variants in the background
+  queueDerivatives(image_obj.image_id, os.getenv('PHOTOSHOP_PATH'), img_filename)
   # Return 200
   return HttpResponse(200)
 
@@ -154,9 +159,48 @@ def getImage(request: HttpRequest, imageID: int):
     res = HttpResponse("Missing Image ID")
     res.status_code = 422 
     return res
-  # Retrieve filename from database
-  fileName = Image.objects.get(image_id=imageID).filename
-  return FileResponse(open(f"{os.getenv('PHOTOSHOP_PATH')}{fileName}", "rb"))
+  # Optional derivative size (?size=thumb|small|medium), original when not provided
+  size = request.GET.get('size')
+  if(size is not None and size not in DERIVATIVE_WIDTHS):
+    logger.warning(f"getImage called with an unknown size: {size}.", extra={'crid': request.crid})
+    res = HttpResponse(f"Unknown size, expected one of: {', '.join(DERIVATIVE_WIDTHS.keys())}")
+    res.status_code = 400
+    return res
+  # Retrieve file metadata (cached, so conditional requests cost no DB query) and serve with caching/range support
+  if(size is None):
+    meta = getMediaMeta("photo", imageID, lambda: loadImageMedia(imageID))
+  else:
+    meta = getMediaMeta(f"photo_{size}", imageID, lambda: loadImageMedia(imageID, size))
+    # Cached metadata still points at the original, pick up a derivative written since (possibly by another process,
+    # e.g. the generate_photo_derivatives command) with a single stat instead of waiting for the metadata to expire
+    if((meta is not None) and (not meta['filename'].endswith(f"_{size}.webp")) and os.path.exists(os.path.join(meta['root'] or "", derivativeFilename(meta['filename'], size)))):
+      invalidateMediaMeta(f"photo_{size}", imageID)
+      meta = getMediaMeta(f"photo_{size}", imageID, lambda: loadImageMedia(imageID, size))
+  if(meta is None):
+    logger.warning(f"getImage could not find image (or its file) with id={imageID}.", extra={'crid': request.crid})
+    res = HttpResponse("Image not found")
+    res.status_code = 404
+    return res
+  # The original stands in for a derivative that is not ready (or never built, for animated images). Make the browser revalidate
+  # on every use, the ETag changes once the derivative exists so it is fetched then (and unchanged originals cost a 304)
+  if((size is not None) and (not meta['filename'].endswith(f"_{size}.webp"))):
+    return serveMediaFile(request, meta, accel_prefix=os.getenv('PHOTOSHOP_ACCEL_PREFIX'), cache_control="private, no-cache")
+  return serveMediaFile(request, meta, accel_prefix=os.getenv('PHOTOSHOP_ACCEL_PREFIX'))
+
+
+# Loader for getMediaMeta, returns (root, filename, content_type) or None
+# When a size is requested the derivative is used if it exists, otherwise the original is served (and the derivative is queued, once per process)
+def loadImageMedia(imageID: int, size: str = None):
+  image = Image.objects.filter(image_id=imageID).values('filename', 'filetype').first()
+  if(image is None):
+    return None
+  root = os.getenv('PHOTOSHOP_PATH')
+  if(size is not None):
+    derivative = derivativeFilename(image['filename'], size)
+    if(os.path.exists(os.path.join(root, derivative))):
+      return (root, derivative, "image/webp")
+    queueDerivatives(imageID, root, image['filename'])
+  return (root, image['filename'], image['filetype'] or mimetypes.guess_type(image['filename'])[0])
 
 
 ###
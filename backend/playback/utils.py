@@ -1,6 +1,15 @@
 from django.db.models import QuerySet, Count, Avg, StdDev, Q, F
+from django.contrib.contenttypes.models import ContentType
 
 import datetime
+import logging
+import time
+import numpy
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# Declare logging
+logger = logging.getLogger()
 
 # Model imports from other apps
 from photos.models import Image
@@ -14,25 +23,26 @@ from aotd.models import (
   DailyAlbum,
   AotdUserData
 )
+from aotd.utils import serializeReviews
 from .models import (
   GlobalPlayback,
   UserPlayback
 )
 
-def calculateLongestUserReviewStreak(reviews: QuerySet[Review]) -> tuple[datetime.date, int, datetime.date]:
+def calculateLongestUserReviewStreak(reviews: QuerySet[Review] | list) -> tuple[datetime.date, int, datetime.date]:
   '''
-  Iterate over the passed in reviews QuerySet, after ordering by date, return longest streak dates and count.
+  Iterate over the passed in reviews (QuerySet or list), after ordering by date, return longest streak dates and count.
   
-  :param reviews: Queryset containing reviews
-  :type reviews: QuerySet[Review]
+  :param reviews: Queryset or list containing reviews (anything with an aotd_date attribute)
+  :type reviews: QuerySet[Review] | list
   :return: Tuple containing the following (Start Date, Streak Length, End Date)
   :rtype: tuple[date, int, date]
   '''
+  # Order review by date (ascending), works for both querysets and in-memory lists
+  reviews = sorted(reviews, key=lambda review: review.aotd_date)
   # Return default tuple value if list is empty
   if(len(reviews) == 0):
     return (datetime.date(2000,1,1), 0, datetime.date(2000,1,1))
-  # Order review by date (ascending)
-  reviews = reviews.order_by("aotd_date")
   # Get first date of review and set tracking vars
   current_streak = (reviews[0].aotd_date, 1, reviews[0].aotd_date)
   longest_streak = current_streak
@@ -279,4 +289,222 @@ def generateUserPlayback(year: int, userId: str):
   )
   userPlaybackObj.save()
   # Return updated data
-  return userPlaybackObj.toJSON()
\ No newline at end of file
+  return userPlaybackObj.toJSON()
+
+
+## =========================================================================================================================================================================================
+## Batch user playback generation. The year's dataset is loaded once into compact per-user structures, each user's payload is
+## computed from those (optionally in worker processes, the structures are plain python so they pickle cheaply), the few
+## objects that are embedded in payloads are serialized in bulk and every UserPlayback row is written with one bulk_create.
+## =========================================================================================================================================================================================
+
+# Compact review row used by the batch pipeline (has aotd_date so it can be passed to calculateLongestUserReviewStreak)
+PlaybackReview = namedtuple("PlaybackReview", ["pk", "aotd_date", "score", "first_listen", "react_count", "submitter_pk", "submitter_nickname"])
+
+
+def loadYearPlaybackDataset(year: int, user_pks: list) -> dict:
+  '''
+  Load every piece of data needed for user playback in a fixed number of queries, keyed by user pk.
+  '''
+  start_datetime = datetime.datetime(year, 1, 1)
+  end_datetime = datetime.datetime(year, 12, 31, 23, 59, 59)
+  date_range = (start_datetime.date(), end_datetime.date())
+  dataset = {
+    user_pk: {
+      "reviews": [],
+      "reactions": Counter(),
+      "selections": [],
+      "fan_reviews": [],
+      "total_submitted": 0,
+      "photos_submitted": 0,
+      "photos_artist_of": 0,
+      "photos_tagged_in": 0,
+      "quotes_submitted": 0,
+      "quotes_quoted": 0,
+    }
+    for user_pk in user_pks
+  }
+  # Reviews for the year (one query) plus reaction counts on those reviews (one query)
+  year_reviews = list(
+    Review.objects
+      .filter(aotd_date__range=date_range)
+      .values_list('pk', 'user_id', 'user__nickname', 'aotd_date', 'score', 'first_listen', 'album__submitted_by_id', 'album__submitted_by__nickname')
+  )
+  # Matched on the aotd Review content type, not the model name, spotifyapi.Review reactions share the name and can collide on object_id
+  react_counts = dict(
+    Reaction.objects
+      .filter(content_type=ContentType.objects.get_for_model(Review), object_id__in=[row[0] for row in year_reviews])
+      .values('object_id')
+      .annotate(total=Count('pk'))
+      .values_list('object_id', 'total')
+  )
+  for pk, user_pk, nickname, aotd_date, score, first_listen, submitter_pk, submitter_nickname in year_reviews:
+    if(user_pk in dataset):
+      dataset[user_pk]["reviews"].append(PlaybackReview(pk, aotd_date, score, first_listen, react_counts.get(pk, 0), submitter_pk, submitter_nickname))
+    # Reviews of albums submitted by someone else feed that submitter's biggest fan list
+    if((submitter_pk in dataset) and (submitter_pk != user_pk)):
+      dataset[submitter_pk]["fan_reviews"].append((user_pk, nickname, score))
+  # Reactions given by each user this year
+  for user_pk, emoji, custom_emoji, total in (
+    Reaction.objects
+      .filter(content_type__model="review", user_id__in=user_pks, creation_timestamp__range=(start_datetime, end_datetime))
+      .values('user_id', 'emoji', 'custom_emoji')
+      .annotate(total=Count('id'))
+      .values_list('user_id', 'emoji', 'custom_emoji', 'total')
+  ):
+    dataset[user_pk]["reactions"][(emoji, custom_emoji)] += total
+  # AOtD selections this year
+  for daily_pk, submitter_pk, rating, standard_deviation, date in (
+    DailyAlbum.objects
+      .filter(date__range=date_range, album__submitted_by_id__in=user_pks)
+      .values_list('pk', 'album__submitted_by_id', 'rating', 'standard_deviation', 'date')
+  ):
+    dataset[submitter_pk]["selections"].append((daily_pk, rating, standard_deviation, date))
+  # Simple per-user counts
+  count_sources = [
+    ("total_submitted", Album.objects.filter(submission_date__range=(start_datetime, end_datetime)), 'submitted_by_id'),
+    ("photos_submitted", Image.objects.filter(upload_timestamp__range=(start_datetime, end_datetime)), 'uploader_id'),
+    ("photos_artist_of", Image.objects.filter(upload_timestamp__range=(start_datetime, end_datetime)), 'artist_id'),
+    ("photos_tagged_in", Image.objects.filter(upload_timestamp__range=(start_datetime, end_datetime)), 'tagged_users'),
+    ("quotes_submitted", Quote.objects.filter(timestamp__range=(start_datetime, end_datetime)), 'submitter_id'),
+    ("quotes_quoted", Quote.objects.filter(timestamp__range=(start_datetime, end_datetime)), 'speaker_id'),
+  ]
+  for key, queryset, field in count_sources:
+    for user_pk, total in queryset.filter(**{f"{field}__in": user_pks}).values(field).annotate(total=Count('pk')).values_list(field, 'total'):
+      dataset[user_pk][key] = total
+  return dataset
+
+
+def computeUserPlaybackPayload(data: dict) -> dict:
+  '''
+  Compute a single user's playback payload from their compact dataset (no database access, safe to run in a worker process).
+  Embedded objects are returned as "__review__"/"__aotd__" pk placeholders and serialized afterwards in bulk.
+  '''
+  reviews: list[PlaybackReview] = data["reviews"]
+  playbackData = {}
+  ###
+  # Review Stats
+  ###
+  reviewStats = {}
+  scores = [review.score for review in reviews]
+  reviewStats['total_reviews'] = len(reviews) # Total count of reviews
+  reviewStats['avg_review_score'] = float(numpy.mean(scores)) if scores else 0 # User's average review score
+  reviewStats['stddev_review_score'] = float(numpy.std(scores)) if scores else 0 # User's standard deviation review score
+  longest_streak = calculateLongestUserReviewStreak(reviews)
+  reviewStats['longest_review_streak'] = { # Longest Review Streak
+    "start_date": longest_streak[0].strftime("%d/%m/%Y"),
+    "length": longest_streak[1],
+    "end_date": longest_streak[2].strftime("%d/%m/%Y")
+  }
+  reviewStats['total_first_time_listens'] = sum(1 for review in reviews if review.first_listen == True)
+  reviewStats['most_reacted_review'] = {"__review__": max(reviews, key=lambda review: review.react_count).pk} # Review with the most reactions
+  if(len(data["reactions"]) > 0):
+    (emoji, custom_emoji), total = data["reactions"].most_common(1)[0]
+    reviewStats['most_used_reaction'] = {"emoji": emoji, "custom_emoji": custom_emoji, "total": total} # User's most used reaction
+  # Place review stats into overall stat tracking
+  playbackData['reviews'] = reviewStats
+  ###
+  # AOTD Stats
+  ###
+  albumStats = {}
+  albumStats['total_submitted'] = data["total_submitted"] # Total album submissions
+  albumStats['total_selected'] = len(data["selections"]) # Total album selections
+  # Get this user's personal celeb list
+  celeb_scores = {}
+  for review in reviews:
+    celeb_scores.setdefault((review.submitter_pk, review.submitter_nickname), []).append(review.score)
+  albumStats['personal_celeb_list'] = sorted(
+    [{'album__submitted_by__pk': pk, 'album__submitted_by__nickname': nickname, 'avg_score': sum(values)/len(values)} for (pk, nickname), values in celeb_scores.items()],
+    key=lambda row: row['avg_score'], reverse=True
+  )[:4]
+  if(len(data["selections"]) > 0):
+    rated = [selection for selection in data["selections"] if selection[1] not in (11, None)]
+    if(rated):
+      albumStats['highest_rated_aotd'] = {"__aotd__": max(rated, key=lambda selection: (selection[1], selection[3]))[0]} # Highest Rated AOTD Selection
+      albumStats['lowest_rated_aotd'] = {"__aotd__": min(rated, key=lambda selection: selection[1])[0]} # Lowest Rated AOTD Selection
+    with_std = [selection for selection in data["selections"] if (selection[1] != 11) and (selection[2] is not None)]
+    if(with_std):
+      albumStats['highest_std'] = {"__aotd__": max(with_std, key=lambda selection: selection[2])[0]} # Most Controvertial AOTD Selection
+    # Get the user who rated your albums highest on average (not including themselves)
+    fan_scores = {}
+    for reviewer_pk, nickname, score in data["fan_reviews"]:
+      fan_scores.setdefault((reviewer_pk, nickname), []).append(score)
+    albumStats['biggest_fan_list'] = sorted(
+      [{'user__pk': pk, 'user__nickname': nickname, 'avg_score': sum(values)/len(values)} for (pk, nickname), values in fan_scores.items()],
+      key=lambda row: row['avg_score'], reverse=True
+    )[:4]
+  # Place aotd stats into overall stat tracking
+  playbackData['aotd'] = albumStats
+  ###
+  # Photo Stats
+  ###
+  playbackData['photos'] = {
+    'total_submitted': data["photos_submitted"],
+    'total_artist_of': data["photos_artist_of"],
+    'tagged_in': data["photos_tagged_in"],
+  }
+  ###
+  # Quote Stats
+  ###
+  playbackData['quotes'] = {
+    'total_submitted': data["quotes_submitted"],
+    'total_quoted': data["quotes_quoted"],
+  }
+  return playbackData
+
+
+def generateAllUserPlayback(year: int, aotd_users: list, workers: int = 0) -> dict:
+  '''
+  Generate and store "CordPal Playback" data for many users at once.
+
+  :param year: Playback year
+  :param aotd_users: AotdUserData objects to generate playback for (users without reviews in the year are skipped)
+  :param workers: Number of worker processes used to compute payloads (0 or 1 computes in process)
+  :return: Dict of per-stage timings (seconds) and counts
+  '''
+  timings = {}
+  stage_start = time.perf_counter()
+  user_pks = [aotd_user.user_id for aotd_user in aotd_users]
+  dataset = loadYearPlaybackDataset(year, user_pks)
+  timings['load'] = time.perf_counter() - stage_start
+  # Compute payloads (users with no reviews this year have nothing to play back)
+  stage_start = time.perf_counter()
+  eligible_pks = [user_pk for user_pk in user_pks if len(dataset[user_pk]["reviews"]) > 0]
+  user_data = [dataset[user_pk] for user_pk in eligible_pks]
+  if(workers > 1):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      payloads = list(executor.map(computeUserPlaybackPayload, user_data, chunksize=max(1, len(user_data) // (workers * 4))))
+  else:
+    payloads = [computeUserPlaybackPayload(data) for data in user_data]
+  timings['compute'] = time.perf_counter() - stage_start
+  # Serialize the embedded reviews and AOtD objects in bulk
+  stage_start = time.perf_counter()
+  review_pks = {payload['reviews']['most_reacted_review']['__review__'] for payload in payloads}
+  aotd_pks = {
+    payload['aotd'][key]['__aotd__']
+    for payload in payloads
+    for key in ('highest_rated_aotd', 'lowest_rated_aotd', 'highest_std')
+    if key in payload['aotd']
+  }
+  review_json = {review['id']: review for review in serializeReviews(Review.objects.filter(pk__in=review_pks))}
+  aotd_json = {
+    aotd.pk: aotd.toJSON(include_raw_album=False)
+    for aotd in DailyAlbum.objects.filter(pk__in=aotd_pks).select_related('album__submitted_by').defer('rating_timeline', 'album__raw_data')
+  }
+  for payload in payloads:
+    payload['reviews']['most_reacted_review'] = review_json[payload['reviews']['most_reacted_review']['__review__']]
+    for key in ('highest_rated_aotd', 'lowest_rated_aotd', 'highest_std'):
+      if key in payload['aotd']:
+        payload['aotd'][key] = aotd_json[payload['aotd'][key]['__aotd__']]
+  timings['serialize'] = time.perf_counter() - stage_start
+  # Write every row at once (rows that already exist for this year are left alone)
+  stage_start = time.perf_counter()
+  UserPlayback.objects.bulk_create(
+    [UserPlayback(aotd_user_id=user_pk, year=year, payload=payload) for user_pk, payload in zip(eligible_pks, payloads)],
+    ignore_conflicts=True
+  )
+  timings['write'] = time.perf_counter() - stage_start
+  timings['users_generated'] = len(payloads)
+  timings['users_skipped'] = len(user_pks) - len(payloads)
+  logger.info(f"Generated CordPal Playback {year} data for {len(payloads)} users", extra={'playback_year': year, 'timings': timings})
+  return timings
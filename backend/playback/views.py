@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 import datetime
 import pytz
 import json
+import time
 
 # Model imports from other apps
 from aotd.models import (
@@ -21,7 +22,8 @@ from aotd.utils import (
 )
 from .utils import (
   generateGlobalPlayback,
-  generateUserPlayback
+  generateUserPlayback,
+  generateAllUserPlayback
 )
 
 
@@ -62,30 +64,30 @@ def generateCordpalPlayback(request: HttpRequest):
       logger.debug(f"Sitewide dev data for {year} not found, continuing...")
   try:
     logger.info(f"Generating Cordpal Playback data for {year}", extra={'crid': request.crid, 'playback_year': year})
+    global_start = time.perf_counter()
     generateGlobalPlayback(year)
+    global_duration = time.perf_counter() - global_start
   except Exception as e:
     print(e)
     logger.critical(f"Failure Generating Sitewide playback data for {year}", extra={'crid': request.crid, 'playback_year': year, 'error': e})
     return HttpResponse(status=500)
   # Get all users who have reviewed in the past year
-  userList = AotdUserData.objects.exclude(user__is_active=False)
-  for user in userList:
-    # If we are in the dev ENV delete existing data and rerun
-    if(APP_ENV == "DEV"):
-      try:
-        userPlaybackObj = UserPlayback.objects.filter(year=year).get(aotd_user__user=user)
-        logger.info(f"Requiring deletion of Playback {year} data for {userPlaybackObj.aotd_user.pk}, deleting current playback data and generating...")
-        userPlaybackObj.delete()
-      except:
-        logger.debug(f"User {user.pk} dev playback data for {year} not found, continuing...")
-    try:
-      logger.info(f"Generating Cordpal Playback {year} data for user {user.pk}", extra={'crid': request.crid, 'playback_year': year, "user": user.pk})
-      generateUserPlayback(year, user.pk)
-    except Exception as e:
-      print(e)
-      logger.critical(f"Failure Generating Cordpal Playback {year} data for {user.pk}", extra={'crid': request.crid, 'playback_year': year, "user": user.pk, 'error': e})
-      return HttpResponse(status=500)
-  return HttpResponse(status=200)
+  userList = list(AotdUserData.objects.exclude(user__is_active=False))
+  # If we are in the dev ENV delete existing data and rerun
+  if(APP_ENV == "DEV"):
+    deleted, _ = UserPlayback.objects.filter(year=year, aotd_user__in=userList).delete()
+    logger.info(f"Requiring deletion of Playback {year} data for {deleted} users, deleting current playback data and generating...")
+  # Optional worker process count for payload computation
+  workers = int(body.get('workers', 0)) if (body) else 0
+  try:
+    logger.info(f"Generating Cordpal Playback {year} data for {len(userList)} users", extra={'crid': request.crid, 'playback_year': year})
+    timings = generateAllUserPlayback(year, userList, workers)
+    timings['global'] = global_duration
+  except Exception as e:
+    logger.critical(f"Failure Generating Cordpal Playback {year} user data", extra={'crid': request.crid, 'playback_year': year, 'error': e})
+    return HttpResponse(status=500)
+  logger.info(f"Cordpal Playback {year} stage timings: {timings}", extra={'crid': request.crid, 'playback_year': year})
+  return JsonResponse({"year": year, "timings": timings})
 
 
 
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+# Full text index over quote text, used by quotes.utils.filterQuotesByText. The expression must match the
+# SearchVector('text', config='english') Django generates for the planner to use it. Postgres only, local
+# SQLite databases fall back to icontains and need no index.
+INDEX_NAME = "quote_text_search_idx"
+
+
+def createSearchIndex(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON quotes_quote "
+        "USING GIN (to_tsvector('english'::regconfig, COALESCE(text, '')))"
+    )
+
+
+def dropSearchIndex(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0002_alter_quote_speaker_discord_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(createSearchIndex, dropSearchIndex),
+    ]
@@ -46,13 +46,13 @@ class Quote(models.Model):
   # Custom delete function to log the user action
   def delete(self, deleter=None, reason=None, *args, **kwargs):
     # Log the action before actually deleting
-    from users.models import UserAction  # Import inside to avoid circular import
+    from users.audit import recordUserAction  # Import inside to avoid circular import
     # If deleter is not provided, log critical log and do not delete album
     if(deleter == None):
       logger.critical(f"ATTEMPTED DELETE OF QUOTE (ID: {self.pk}) WITH NO USER PASSED IN! KEEPING QUOTE: {self.text}")
       return
     # Create user action log
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter, 
       action_type="DELETE",
       entity_type="QUOTE",
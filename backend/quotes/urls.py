@@ -8,4 +8,5 @@ urlpatterns = [
   path('getAllQuotesList/<str:sortMethod>', views.getAllQuotesList),
   path('getUserSpokenQuotes/<str:user_discord_id>', views.getUserSpokenQuotes),
   path('getAllQuotesLegacy', views.getAllQuotesLegacy),
+  path('searchQuotes', views.searchQuotes),
 ]
@@ -0,0 +1,88 @@
+from django.db import connection
+from django.db.models import QuerySet
+from django.db.models.functions import Coalesce
+
+import logging
+
+from .models import Quote
+from users.models import User
+
+# Declare logging
+logger = logging.getLogger()
+
+# User columns loaded alongside quotes (everything the quote UI needs, instead of full User.toJSON payloads)
+LEAN_USER_FIELDS = ('guid', 'discord_id', 'nickname', 'discord_avatar')
+# Text search configuration, must match the expression index created in quotes migration 0003
+QUOTE_SEARCH_CONFIG = "english"
+
+
+def leanUserJSON(user: User) -> dict | None:
+  '''Return the subset of User.toJSON used by quote listings.'''
+  if(user is None):
+    return None
+  return {field: getattr(user, field) for field in LEAN_USER_FIELDS}
+
+
+def leanQuoteQuerySet(quotes: QuerySet = None) -> QuerySet:
+  '''
+  Return quotes with speaker and submitter joined in (only their lean columns loaded) and the speaker's
+  discord id annotated as speaker_key, falling back to speaker_discord_id for speakers not on the site.
+  '''
+  quotes = Quote.objects.all() if (quotes is None) else quotes
+  return quotes \
+    .select_related('speaker', 'submitter') \
+    .only(
+      'submitter_nickname', 'submitter_discord_id', 'speaker_discord_id', 'text', 'timestamp',
+      *[f"speaker__{field}" for field in LEAN_USER_FIELDS],
+      *[f"submitter__{field}" for field in LEAN_USER_FIELDS],
+    ) \
+    .annotate(speaker_key=Coalesce('speaker__discord_id', 'speaker_discord_id'))
+
+
+def serializeQuote(quote: Quote) -> dict:
+  '''Return a quote loaded through leanQuoteQuerySet as a JSON (same keys as Quote.toJSON, plus id, with lean users).'''
+  out = {}
+  out['id'] = quote.pk
+  out['submitter'] = leanUserJSON(quote.submitter)
+  out['submitter_nickname'] = quote.submitter_nickname
+  out['submitter_discord_id'] = quote.submitter_discord_id
+  out['speaker'] = leanUserJSON(quote.speaker)
+  out['speaker_discord_id'] = quote.speaker_discord_id
+  out['text'] = quote.text
+  out['timestamp'] = quote.timestamp.strftime("%m/%d/%Y, %H:%M:%S")
+  return out
+
+
+def buildSpeakerSummary(quotes: list) -> list:
+  '''
+  Build the per speaker quote count summary from already loaded quotes (see leanQuoteQuerySet).
+  Speakers only known by discord id are looked up in a single query, in case they have joined the site since.
+  '''
+  summary = {}
+  for quote in quotes:
+    if(quote.speaker_key is None):
+      continue
+    entry = summary.setdefault(quote.speaker_key, {"count": 0, "nickname": None, "discord_id": quote.speaker_key})
+    entry['count'] += 1
+    if(quote.speaker is not None):
+      entry['nickname'] = quote.speaker.nickname
+  missing = [speaker_key for speaker_key, entry in summary.items() if entry['nickname'] is None]
+  if(missing):
+    for discord_id, nickname in User.objects.filter(discord_id__in=missing).values_list('discord_id', 'nickname'):
+      summary[discord_id]['nickname'] = nickname
+  for entry in summary.values():
+    entry['nickname'] = entry['nickname'] or entry['discord_id']
+  return list(summary.values())
+
+
+def filterQuotesByText(quotes: QuerySet, search_text: str) -> QuerySet:
+  '''
+  Filter quotes to those matching search_text. On Postgres this is a full text (websearch syntax) match served by the
+  GIN expression index on quote text, other databases (local SQLite) fall back to a case insensitive substring match.
+  '''
+  if(connection.vendor == "postgresql"):
+    from django.contrib.postgres.search import SearchQuery, SearchVector
+    return quotes \
+      .annotate(search=SearchVector('text', config=QUOTE_SEARCH_CONFIG)) \
+      .filter(search=SearchQuery(search_text, config=QUOTE_SEARCH_CONFIG, search_type="websearch"))
+  return quotes.filter(text__icontains=search_text)
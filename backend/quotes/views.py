@@ -3,6 +3,7 @@ from django.http import HttpRequest, HttpResponse, JsonResponse
 from .models import Quote
 from users.models import User
 import users.utils as userUtils
+from . import utils as quoteUtils
 
 import logging
 import json
@@ -103,21 +104,7 @@ def getAllQuotesList(request: HttpRequest, sortMethod: str = "timestamp_descendi
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Get all quotes, convert to list, and return
-  quotes = Quote.objects.all()
-  # Build out summaries of users with quotes
-  speakers = set(list(quotes.values_list('speaker_discord_id', flat=True)) + list(quotes.values_list('speaker__discord_id', flat=True)))
-  summaryObj = []
-  for speakID in speakers:
-    if(speakID != None):
-      # Retrieve user object from ID if possible
-      userObj = userUtils.getUserObj(speakID)
-      # Build Summary Object
-      summaryObj.append({
-        "count": (quotes.filter(speaker__discord_id=speakID).count() + quotes.filter(speaker_discord_id=speakID).count()),
-        "nickname": userObj.nickname if (userObj) else speakID,
-        "discord_id": speakID
-      })
+  quotes = quoteUtils.leanQuoteQuerySet()
   # Sort quotes based on passed in sorting method
   if(sortMethod == "timestamp_descending"):
     quotes = quotes.order_by("-timestamp")
@@ -125,10 +112,10 @@ def getAllQuotesList(request: HttpRequest, sortMethod: str = "timestamp_descendi
     quotes = quotes.order_by("timestamp")
   elif(sortMethod == "name"):
     quotes = quotes.order_by("speaker__nickname")
-  # Get list of quotes with correct sort method
-  out = []
-  for quote in quotes:
-    out.append(quote.toJSON())
+  # Load every quote (with speaker and submitter) in one query, then build the list and speaker summary from it
+  quotes = list(quotes)
+  out = [quoteUtils.serializeQuote(quote) for quote in quotes]
+  summaryObj = quoteUtils.buildSpeakerSummary(quotes)
   # Return
   return JsonResponse({'quotes': out, "summary": summaryObj})
 
@@ -141,19 +128,19 @@ def getAllQuotesLegacy(request: HttpRequest):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Get all Quotes
-  quotes = Quote.objects.all()
+  # Get all Quotes (with speaker and submitter) in one query
+  quotes = quoteUtils.leanQuoteQuerySet()
   # Format quotes list into a dict based on submitter key
   logger.info("Iterating all quotes in DB and attempting to return legacy dict")
   quoteDict = {}
   for quote in quotes:
-      speaker_id = quote.speaker.discord_id if quote.speaker else quote.speaker_discord_id
+      speaker_id = quote.speaker_key
       if(speaker_id in quoteDict.keys()):
-          quoteDict[speaker_id]['quoteList'].append(quote.toJSON())
+          quoteDict[speaker_id]['quoteList'].append(quoteUtils.serializeQuote(quote))
       else:
           quoteDict[speaker_id] = {
               "nickname": quote.speaker.nickname if quote.speaker else quote.speaker_discord_id,
-              "quoteList": [quote.toJSON()]
+              "quoteList": [quoteUtils.serializeQuote(quote)]
           }
   # Return json
   return JsonResponse(quoteDict)
@@ -167,4 +154,46 @@ def getQuoteStats(request: HttpRequest):
     res.status_code = 405
     return res
   # Get all Quotes
-  return HttpResponse("NOT YET IMPLEMENTED", status_code=500)
\ No newline at end of file
+  return HttpResponse("NOT YET IMPLEMENTED", status_code=500)
+
+
+def searchQuotes(request: HttpRequest):
+  '''
+  Search quote text, returning a page of matching quotes (most recent first).
+  Query params: q (search text, optional), speaker (speaker discord id, optional), limit, before (next_cursor from the previous page).
+  '''
+  # Make sure request is a GET request
+  if(request.method != "GET"):
+    logger.warning(f"searchQuotes called with a non-GET method, returning 405.", extra={'crid': request.crid})
+    res = HttpResponse("Method not allowed")
+    res.status_code = 405
+    return res
+  # Parse paging params
+  try:
+    limit = min(max(int(request.GET.get('limit', QUOTE_SEARCH_PAGE_SIZE)), 1), QUOTE_SEARCH_MAX_PAGE_SIZE)
+    before = int(request.GET['before']) if request.GET.get('before') else None
+  except ValueError:
+    logger.warning("searchQuotes called with a non-integer limit or cursor.", extra={'crid': request.crid})
+    return HttpResponse("limit and before must be integers", status=400)
+  quotes = quoteUtils.leanQuoteQuerySet()
+  search_text = request.GET.get('q', "").strip()
+  if(search_text):
+    quotes = quoteUtils.filterQuotesByText(quotes, search_text)
+  if(request.GET.get('speaker')):
+    quotes = quotes.filter(speaker_key=request.GET['speaker'])
+  # Keyset pagination: seek past the cursor on the primary key instead of using OFFSET
+  if(before is not None):
+    quotes = quotes.filter(id__lt=before)
+  # Fetch one extra row to know if there is another page
+  page = list(quotes.order_by('-id')[:limit + 1])
+  has_more = len(page) > limit
+  page = page[:limit]
+  # Return response
+  return JsonResponse({
+    'quotes': [quoteUtils.serializeQuote(quote) for quote in page],
+    'next_cursor': (page[-1].pk if (has_more and page) else None)
+  })
+
+
+QUOTE_SEARCH_PAGE_SIZE = 25
+QUOTE_SEARCH_MAX_PAGE_SIZE = 100
@@ -37,11 +37,11 @@ class Reaction(models.Model):
   
   def save(self, *args, **kwargs):
     """Save function override, to log user actions on update"""
-    from users.models import UserAction
+    from users.audit import recordUserAction
     # Create a history record before updating the review
     if self.pk:  # Only if this is an update, not a new review
       # Create UserAction for review update
-      UserAction.objects.create(
+      recordUserAction(
         user=self.user, 
         action_type="UPDATE",
         entity_type="REACTION",
@@ -54,10 +54,10 @@ class Reaction(models.Model):
   def delete(self, deleter=None, delete_reason=None, *args, **kwargs):
     """Custom delete function to log the user action"""
     # Log the action before actually deleting
-    from users.models import UserAction  # Import inside to avoid circular import
+    from users.audit import recordUserAction  # Import inside to avoid circular import
 
     # Create user action to log deletion
-    UserAction.objects.create(
+    recordUserAction(
       user=deleter, 
       action_type="DELETE",
       entity_type="REACTION",
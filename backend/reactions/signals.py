@@ -3,12 +3,12 @@ from django.dispatch import receiver
 from django.forms.models import model_to_dict
 
 from .models import Reaction
-from users.models import UserAction
+from users.audit import recordUserAction
 
 @receiver(post_save, sender=Reaction)
 def log_reaction_creation(sender, instance: Reaction, created, **kwargs):
   if created:  # Ensure it runs only on first creation
-    UserAction.objects.create(
+    recordUserAction(
       user=instance.user,
       action_type="CREATE",
       entity_type="REACTION",
@@ -0,0 +1,127 @@
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+
+import logging
+import threading
+import queue
+import atexit
+import os
+
+from backend.write_behind import BackgroundWorker
+
+# Declare logging
+logger = logging.getLogger()
+
+# How UserAction audit rows are written:
+#   "ASYNC" - Batched: rows recorded inside a transaction are bulk inserted when it commits, rows recorded outside one go to a background writer (default)
+#   "SYNC"  - Every row is inserted immediately (for tests and one-off scripts)
+USER_ACTION_WRITE_MODE = os.getenv("USER_ACTION_WRITE_MODE", "ASYNC").upper()
+# Max rows per bulk insert, and how long (seconds) the background writer waits to fill a batch
+USER_ACTION_BATCH_SIZE = int(os.getenv("USER_ACTION_BATCH_SIZE", 200))
+USER_ACTION_FLUSH_INTERVAL = float(os.getenv("USER_ACTION_FLUSH_INTERVAL", 1.0))
+
+
+## =========================================================================================================================================================================================
+## Batched UserAction audit writer. Model save/delete overrides and signal receivers call recordUserAction instead of
+## UserAction.objects.create, so audit inserts are taken off the request path and written together with bulk_create.
+## Ordering: timestamps are taken when the action is recorded and rows are inserted in the order they were recorded
+## (a single writer thread per process drains the queue FIFO), so actions on the same entity keep their order.
+## =========================================================================================================================================================================================
+
+class UserActionWriter(BackgroundWorker):
+  """Queues UserAction rows and writes them in batches, on transaction commit or from a background thread."""
+
+  thread_name = "user-action-writer"
+
+  def __init__(self):
+    super().__init__()
+    self._queue = queue.Queue()
+    self._local = threading.local()
+
+  def record(self, **fields):
+    """Queue a UserAction with the given model fields (timestamp defaults to now)."""
+    from users.models import UserAction
+    fields.setdefault('timestamp', timezone.now())
+    action = UserAction(**fields)
+    if(USER_ACTION_WRITE_MODE == "SYNC"):
+      action.save()
+      return
+    connection = transaction.get_connection()
+    if(connection.in_atomic_block):
+      # Buffer until the surrounding transaction commits (dropped with it on rollback)
+      self._transactionBuffer(connection).append(action)
+    else:
+      self._enqueue([action])
+
+  def _transactionBuffer(self, connection) -> list:
+    # Reuse this transaction's buffer while its commit callback is still registered, otherwise start a new one
+    pending = getattr(self._local, 'pending', None)
+    if((pending is not None) and any(callback[1] is pending[1] for callback in connection.run_on_commit)):
+      return pending[0]
+    buffer = []
+
+    def flush_buffer():
+      self._local.pending = None
+      self._enqueue(buffer)
+
+    self._local.pending = (buffer, flush_buffer)
+    transaction.on_commit(flush_buffer)
+    return buffer
+
+  def _enqueue(self, actions: list):
+    if(not actions):
+      return
+    self._queue.put(actions)
+    self._ensureThread()
+
+  def _drain(self, timeout: float) -> list:
+    """Collect queued rows (in order) up to USER_ACTION_BATCH_SIZE, waiting at most timeout for the first group."""
+    try:
+      batch = list(self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait())
+    except queue.Empty:
+      return []
+    while(len(batch) < USER_ACTION_BATCH_SIZE):
+      try:
+        batch.extend(self._queue.get_nowait())
+      except queue.Empty:
+        break
+    return batch
+
+  def _write(self, batch: list):
+    from users.models import UserAction
+    try:
+      UserAction.objects.bulk_create(batch, batch_size=USER_ACTION_BATCH_SIZE)
+    except Exception as e:
+      # One bad row (e.g. a user deleted in the meantime) should not lose the whole batch
+      logger.error(f"Bulk insert of {len(batch)} user actions failed, retrying individually: {e}")
+      for action in batch:
+        try:
+          action.save()
+        except Exception as row_error:
+          logger.error(f"Dropping user action {action.action_type} {action.entity_type} ({action.entity_id}): {row_error}")
+
+  def flush(self):
+    """Synchronously write everything currently queued (used on shutdown and in tests)."""
+    while(True):
+      batch = self._drain(timeout=0)
+      if(not batch):
+        return
+      self._write(batch)
+
+  def _run(self):
+    while(True):
+      batch = self._drain(timeout=USER_ACTION_FLUSH_INTERVAL)
+      if(batch):
+        close_old_connections()
+        self._write(batch)
+
+
+# Process wide writer
+user_action_writer = UserActionWriter()
+# Write anything still queued on shutdown
+atexit.register(user_action_writer.flush)
+
+
+def recordUserAction(**fields):
+  """Record a UserAction (same fields as UserAction.objects.create). Written in batches, see UserActionWriter."""
+  user_action_writer.record(**fields)
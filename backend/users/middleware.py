@@ -1,12 +1,8 @@
 from django.http import HttpRequest, HttpResponseRedirect
 
-from users.models import (
-  User
-)
+from users.presence import presence_tracker
 
 import logging
-import datetime
-import pytz
 import json
 import os
 import traceback
@@ -27,42 +23,36 @@ class LastSeenMiddleware:
     full_path = request.get_full_path()
     # Get session data from request
     try:
-      # Get user object 
-      user = User.objects.get(discord_id=request.session['discord_id'])
-      # Log method call (With username)
-      self.logger.debug(f"Incoming Request - User: {user.discord_id}/\"{user.nickname}\"", extra={'crid': request.crid})
-      # Get current timestamp
-      time = datetime.datetime.now(tz=pytz.timezone('America/Chicago'))
+      # Get user discord id (presence is recorded in the write-behind store, no DB access per request)
+      discord_id = request.session['discord_id']
+      # Log method call (With user id)
+      self.logger.debug(f"Incoming Request - User: {discord_id}", extra={'crid': request.crid})
       # Update only heartbeat timestamp if its a heartbeat call, otherwise update last_request_timestamp
       if(full_path in self.heartbeat_endpoint_paths):
+        timezone_string = None
         if(full_path == "/users/heartbeat"):
           # Update timezone if timezone is in request
-          user.timezone_string = json.loads(request.body)['heartbeat']['timezone']
-          self.logger.info(f"Setting timezone to {str(user.timezone_string)} for user {user.nickname}", extra={'crid': request.crid})
-        user.last_heartbeat_timestamp = time
-        self.logger.debug(f"Setting last_heartbeat_timestamp to {str(time)} for user {user.nickname}", extra={'crid': request.crid})
-        user.save()
+          timezone_string = json.loads(request.body)['heartbeat']['timezone']
+          self.logger.debug(f"Setting timezone to {str(timezone_string)} for user {discord_id}", extra={'crid': request.crid})
+        presence_tracker.record(discord_id, heartbeat_only=True, timezone_string=timezone_string)
+        self.logger.debug(f"Recorded heartbeat for user {discord_id}", extra={'crid': request.crid})
       else:
-        user.last_heartbeat_timestamp = time # Also update heartbeat, why not
-        user.last_request_timestamp = time
-        self.logger.debug(f"Setting last_request_timestamp to {str(time)} for user {user.nickname}", extra={'crid': request.crid})
-        user.save()
+        # Also update heartbeat, why not
+        presence_tracker.record(discord_id)
+        self.logger.debug(f"Recorded request for user {discord_id}", extra={'crid': request.crid})
     except Exception as e:
-      if(isinstance(e, User.DoesNotExist)):
-        # Log method call (With username)
-        self.logger.debug(f"Incoming Request from user \"UNKNOWN\": {full_path}", extra={'crid': request.crid})
+      if(full_path == "/metrics"):
+        self.logger.debug(f"Reporting metrics to prometheus", extra={'crid': request.crid})
+      elif(full_path in self.no_user_validation_paths):
+        self.logger.info(f"Incoming request without a discord_id in request... Possibly a cron?", extra={'crid': request.crid})
       else:
-        if(full_path == "/metrics"):
-          self.logger.debug(f"Reporting metrics to prometheus", extra={'crid': request.crid})
-        elif(full_path in self.no_user_validation_paths):
-          self.logger.info(f"Incoming request without a discord_id in request... Possibly a cron?", extra={'crid': request.crid})
-        else:
-          self.logger.error(f"ERROR IN USER MIDDLEWARE TRACEBACK: {e}", extra={'crid': request.crid})
+        self.logger.error(f"ERROR IN USER MIDDLEWARE TRACEBACK: {e}", extra={'crid': request.crid})
     
     # Code above this line is executed before the view is called
     # Retrieving the response 
     response = self.get_response(request)
     # Code after this line is executed after the view is called
+    # (pending presence is written back to the User table by the presence tracker's flush thread)
 
     # Returning the response
-    return response
\ No newline at end of file
+    return response
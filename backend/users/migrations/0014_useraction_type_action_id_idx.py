@@ -0,0 +1,17 @@
+# Generated by Django 5.2.12 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_add_last_avatar_check'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useraction',
+            index=models.Index(fields=['entity_type', 'action_type', '-id'], name='useraction_type_action_id_idx'),
+        ),
+    ]
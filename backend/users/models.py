@@ -40,8 +40,8 @@ class User(AbstractUser):
   # Track any and all API calls that come through with this user's session cookie
   last_request_timestamp = models.DateTimeField(null = True)
   last_heartbeat_timestamp = models.DateTimeField(null = True)
-  # Tracks when the avatar URL was last verified against Discord's CDN so we can
-  # skip the round-trip on every auth check (see refreshDiscordProfilePic).
+  # Tracks when the avatar URL was last verified against Discord's CDN, users are
+  # due for the periodic avatar sweep once this is older than a day (see discordapi/avatars.py).
   last_avatar_check = models.DateTimeField(null=True, blank=True)
   
   # Some Backend overhauls
@@ -53,26 +53,35 @@ class User(AbstractUser):
         return f"https://cdn.discordapp.com/avatars/{self.discord_id}/{self.discord_avatar}.png"
     return f"https://cdn.discordapp.com/embed/avatars/{int(self.discord_discriminator) % 5}.png"
 
-  def is_online(self):
+  def presence_timestamps(self, presence_entry: dict = None):
+    """Return (last_request_timestamp, last_heartbeat_timestamp), merging the write-behind presence store with the stored columns."""
+    from users.presence import presence_tracker, latestTimestamp
+    entry = presence_entry if (presence_entry is not None) else (presence_tracker.get(self.discord_id) or {})
+    return (
+      latestTimestamp(self.last_request_timestamp, entry.get("last_request_timestamp")),
+      latestTimestamp(self.last_heartbeat_timestamp, entry.get("last_heartbeat_timestamp"))
+    )
+
+  def is_online(self, presence_entry: dict = None):
     """Return true if the last_heartbeat_timestamp is within 3 min."""
     try:
-      return ((timezone.now() - self.last_heartbeat_timestamp) < timedelta(minutes=3))
+      return ((timezone.now() - self.presence_timestamps(presence_entry)[1]) < timedelta(minutes=3))
     except:
       return False
   
-  def online_status(self):
+  def online_status(self, presence_entry: dict = None):
     """Return one of three strings: ONLINE, AWAY, or OFFLINE"""
-    if(not self.is_online()):
+    if(not self.is_online(presence_entry)):
       return "Offline"
-    time_since_request = (timezone.now() - self.last_request_timestamp)
+    time_since_request = (timezone.now() - self.presence_timestamps(presence_entry)[0])
     if(time_since_request > timedelta(minutes=5)):
       return "Away"
     # If we reach this point, they have had a heartbeat and a request within the last two mins, meaning they are online
     return "Online"
   
-  def last_seen(self):
+  def last_seen(self, presence_entry: dict = None):
     """Return String stating how long its been since the user was last seen."""
-    time_since = (timezone.now() - self.last_request_timestamp)
+    time_since = (timezone.now() - self.presence_timestamps(presence_entry)[0])
     # Calculate minutes and remaining seconds
     minutes, seconds = divmod(int(time_since.total_seconds()), 60)
     # Calculate hours and remaining minutes
@@ -91,8 +100,9 @@ class User(AbstractUser):
       return "Just Now"
     return (out + " ago")
   
-  def toJSON(self):
+  def toJSON(self, presence_entry: dict = None):
     """Return this User as a JSON. (For HTTP JSON Responses)"""
+    last_request, last_heartbeat = self.presence_timestamps(presence_entry)
     out={}
     out['guid'] = self.guid
     out['username'] = self.username
@@ -108,8 +118,9 @@ class User(AbstractUser):
     out['aotd_enrolled'] = self.aotd_enrolled
     out['is_active'] = self.is_active
     out['is_staff'] = self.is_staff
-    out['last_request_timestamp'] = self.last_request_timestamp.strftime("%m/%d/%Y, %H:%M:%S")
-    out['last_heartbeat_timestamp'] = self.last_heartbeat_timestamp.strftime("%m/%d/%Y, %H:%M:%S")
+    # Presence may not have been written back yet (e.g. a new user), so these can still be empty
+    out['last_request_timestamp'] = last_request.strftime("%m/%d/%Y, %H:%M:%S") if last_request else None
+    out['last_heartbeat_timestamp'] = last_heartbeat.strftime("%m/%d/%Y, %H:%M:%S") if last_heartbeat else None
     return out
 
   # toString Method
@@ -134,11 +145,17 @@ class UserAction(models.Model):
   timestamp = models.DateTimeField(default=timezone.now, blank=True, null=True)
   details = models.JSONField(null=True, blank=True)  # Store extra details (e.g., old vs. new values)
 
+  class Meta:
+    indexes = [
+      # Activity feed: filter by entity/action type and page backwards by id (keyset pagination)
+      models.Index(fields=['entity_type', 'action_type', '-id'], name='useraction_type_action_id_idx'),
+    ]
+
   def toJSON(self):
     """Return this User Action as a JSON. (For HTTP JSON Responses)"""
     out={}
-    out['user'] = self.user.toJSON()
-    out['avatar_url'] = self.user.get_avatar_url()
+    out['user'] = self.user.toJSON() if self.user else None
+    out['avatar_url'] = self.user.get_avatar_url() if self.user else None
     out['action_type'] = self.action_type
     out['entity_type'] = self.entity_type
     out['entity_id'] = self.entity_id
@@ -0,0 +1,184 @@
+from django.db.models import Case, When, Value, DateTimeField, CharField
+from django.utils import timezone
+
+import logging
+import threading
+import datetime
+import atexit
+import json
+import os
+
+from backend.redis_client import getRedisClient, redisKey
+from backend.write_behind import selectStore, PeriodicFlusher
+
+# Declare logging
+logger = logging.getLogger()
+
+# Which store to keep presence in ("MEMORY" is per-process, "REDIS" is shared between workers)
+PRESENCE_STORE_BACKEND = os.getenv("PRESENCE_STORE_BACKEND", "MEMORY").upper()
+# How often (in seconds) pending presence updates are written back to the User table
+PRESENCE_FLUSH_INTERVAL = int(os.getenv("PRESENCE_FLUSH_INTERVAL", 30))
+
+
+## =========================================================================================================================================================================================
+## Write-behind presence tracking. LastSeenMiddleware records timestamps here instead of saving the User row on every
+## request, and pending entries are written back to User in a single batched UPDATE every PRESENCE_FLUSH_INTERVAL seconds
+## by a background thread (and on shutdown).
+## Presence reads (User.is_online, User.online_status, User.last_seen, getAllOnlineData) merge this store with the DB columns.
+## =========================================================================================================================================================================================
+
+class MemoryPresenceStore:
+  """Per-process presence store, entries are keyed by discord_id."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._entries = {}
+    self._dirty = set()
+
+  def record(self, discord_id: str, timestamp: datetime.datetime, heartbeat_only: bool = False, timezone_string: str = None):
+    with self._lock:
+      entry = self._entries.setdefault(discord_id, {"last_request_timestamp": None, "last_heartbeat_timestamp": None, "timezone_string": None})
+      entry["last_heartbeat_timestamp"] = timestamp
+      if(not heartbeat_only):
+        entry["last_request_timestamp"] = timestamp
+      if(timezone_string):
+        entry["timezone_string"] = timezone_string
+      self._dirty.add(discord_id)
+
+  def get(self, discord_id: str) -> dict | None:
+    with self._lock:
+      entry = self._entries.get(discord_id)
+      return dict(entry) if entry else None
+
+  def get_all(self) -> dict:
+    with self._lock:
+      return {discord_id: dict(entry) for discord_id, entry in self._entries.items()}
+
+  def pop_dirty(self) -> dict:
+    with self._lock:
+      dirty = {discord_id: dict(self._entries[discord_id]) for discord_id in self._dirty}
+      self._dirty = set()
+      return dirty
+
+  def acquire_flush(self) -> bool:
+    return True
+
+
+class RedisPresenceStore:
+  """Presence store shared by every worker, entries are kept in a single Redis hash as JSON."""
+
+  def __init__(self):
+    self._redis = getRedisClient()
+    self._hash_key = redisKey("presence")
+    self._dirty_key = redisKey("presence:dirty")
+    self._lock_key = redisKey("presence:flush_lock")
+
+  @staticmethod
+  def _decode(raw: str) -> dict:
+    entry = json.loads(raw)
+    for field in ("last_request_timestamp", "last_heartbeat_timestamp"):
+      entry[field] = datetime.datetime.fromisoformat(entry[field]) if entry.get(field) else None
+    return entry
+
+  def record(self, discord_id: str, timestamp: datetime.datetime, heartbeat_only: bool = False, timezone_string: str = None):
+    raw = self._redis.hget(self._hash_key, discord_id)
+    entry = json.loads(raw) if raw else {"last_request_timestamp": None, "last_heartbeat_timestamp": None, "timezone_string": None}
+    entry["last_heartbeat_timestamp"] = timestamp.isoformat()
+    if(not heartbeat_only):
+      entry["last_request_timestamp"] = timestamp.isoformat()
+    if(timezone_string):
+      entry["timezone_string"] = timezone_string
+    pipe = self._redis.pipeline()
+    pipe.hset(self._hash_key, discord_id, json.dumps(entry))
+    pipe.sadd(self._dirty_key, discord_id)
+    pipe.execute()
+
+  def get(self, discord_id: str) -> dict | None:
+    raw = self._redis.hget(self._hash_key, discord_id)
+    return self._decode(raw) if raw else None
+
+  def get_all(self) -> dict:
+    return {discord_id: self._decode(raw) for discord_id, raw in self._redis.hgetall(self._hash_key).items()}
+
+  def pop_dirty(self) -> dict:
+    pipe = self._redis.pipeline()
+    pipe.smembers(self._dirty_key)
+    pipe.delete(self._dirty_key)
+    dirty_ids, _ = pipe.execute()
+    if(not dirty_ids):
+      return {}
+    dirty_ids = list(dirty_ids)
+    raws = self._redis.hmget(self._hash_key, dirty_ids)
+    return {discord_id: self._decode(raw) for discord_id, raw in zip(dirty_ids, raws) if raw}
+
+  def acquire_flush(self) -> bool:
+    # Only one worker should flush per interval
+    return bool(self._redis.set(self._lock_key, "1", nx=True, ex=max(1, PRESENCE_FLUSH_INTERVAL - 1)))
+
+
+class PresenceTracker(PeriodicFlusher):
+  """Front for the configured store, a background thread flushes pending entries every PRESENCE_FLUSH_INTERVAL seconds."""
+
+  thread_name = "presence-flusher"
+  flush_interval = PRESENCE_FLUSH_INTERVAL
+
+  def __init__(self):
+    super().__init__()
+    self.store = selectStore(PRESENCE_STORE_BACKEND, RedisPresenceStore, MemoryPresenceStore, "presence")
+    self._flush_lock = threading.Lock()
+
+  def record(self, discord_id: str, heartbeat_only: bool = False, timezone_string: str = None):
+    """Record a request (or heartbeat) for a user, never touches the database."""
+    self.store.record(discord_id, timezone.now(), heartbeat_only, timezone_string)
+    self._ensureThread()
+
+  def get(self, discord_id: str) -> dict | None:
+    return self.store.get(discord_id)
+
+  def get_all(self) -> dict:
+    return self.store.get_all()
+
+  def flush(self) -> int:
+    """Write every pending entry back to the User table in a single batched UPDATE. Returns the number of users written."""
+    from users.models import User
+    # Avoid concurrent flushes from multiple threads in this process
+    if(not self._flush_lock.acquire(blocking=False)):
+      return 0
+    try:
+      if(not self.store.acquire_flush()):
+        return 0
+      dirty = self.store.pop_dirty()
+      if(not dirty):
+        return 0
+      updates = {
+        "last_heartbeat_timestamp": Case(
+          *[When(discord_id=discord_id, then=Value(entry["last_heartbeat_timestamp"])) for discord_id, entry in dirty.items() if entry["last_heartbeat_timestamp"]],
+          default="last_heartbeat_timestamp", output_field=DateTimeField()
+        ),
+      }
+      request_whens = [When(discord_id=discord_id, then=Value(entry["last_request_timestamp"])) for discord_id, entry in dirty.items() if entry["last_request_timestamp"]]
+      if(request_whens):
+        updates["last_request_timestamp"] = Case(*request_whens, default="last_request_timestamp", output_field=DateTimeField())
+      timezone_whens = [When(discord_id=discord_id, then=Value(entry["timezone_string"])) for discord_id, entry in dirty.items() if entry["timezone_string"]]
+      if(timezone_whens):
+        updates["timezone_string"] = Case(*timezone_whens, default="timezone_string", output_field=CharField())
+      written = User.objects.filter(discord_id__in=list(dirty.keys())).update(**updates)
+      logger.debug(f"Flushed presence data for {written} users")
+      return written
+    except Exception as e:
+      logger.error(f"Failed to flush presence data: {e}")
+      return 0
+    finally:
+      self._flush_lock.release()
+
+
+def latestTimestamp(*timestamps):
+  """Return the most recent non-null timestamp (or None)."""
+  timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+  return max(timestamps) if timestamps else None
+
+
+# Process wide presence tracker
+presence_tracker = PresenceTracker()
+# Make sure pending presence is written on shutdown
+atexit.register(presence_tracker.flush)
@@ -9,6 +9,7 @@ from .models import (
   UserAction
 )
 from discordapi.models import DiscordTokens
+from .presence import presence_tracker
 
 import logging
 import os
@@ -55,6 +56,8 @@ def getUserList(request: HttpRequest):
     return res
   # Iterate and retrieve User IDs
   userList = User.objects.all()
+  # Read every user's pending presence in one go from the write-behind store
+  presence = presence_tracker.get_all()
   # Declare and populate out dict
   out = {}
   out['users'] = {}
@@ -63,7 +66,7 @@ def getUserList(request: HttpRequest):
     tempDict['discord_id'] = user.discord_id
     tempDict['avatar_url'] = user.get_avatar_url()
     tempDict['nickname'] = user.nickname
-    tempDict['last_request_timestamp'] = user.last_request_timestamp
+    tempDict['last_request_timestamp'] = user.presence_timestamps(presence.get(user.discord_id, {}))[0]
     # Store tempDict in out json
     out['users'][user.guid] = tempDict
   # Return dict response
@@ -220,15 +223,19 @@ def getAllOnlineData(request: HttpRequest):
     return res
   # Get all users
   users = User.objects.all()
+  # Read every user's pending presence in one go from the write-behind store
+  presence = presence_tracker.get_all()
   # Iterate through and build return object
   out = {}
   for user in users:
+    entry = presence.get(user.discord_id, {})
+    last_request, last_heartbeat = user.presence_timestamps(entry)
     temp = {}
-    temp["online"] = user.is_online()
-    temp['last_seen'] = user.last_seen()
-    temp['status'] = user.online_status()
-    temp['last_request_timestamp'] = user.last_request_timestamp
-    temp['last_heartbeat_timestamp'] = user.last_heartbeat_timestamp
+    temp["online"] = user.is_online(entry)
+    temp['last_seen'] = user.last_seen(entry)
+    temp['status'] = user.online_status(entry)
+    temp['last_request_timestamp'] = last_request
+    temp['last_heartbeat_timestamp'] = last_heartbeat
     out[user.discord_id] = temp
   # Return users and timestamp
   out['timestamp'] = timezone.now()
@@ -478,7 +485,12 @@ def traditionalLogin(request: HttpRequest):
   
 
 ###
-# Get last 10 user actions
+# Activity feed of user actions, newest first, keyset paginated by id.
+# Query Params (all optional):
+# - limit: Page size (default 30, max 100)
+# - before: Cursor, only return actions with an id lower than this (use next_cursor from the previous page)
+# - entity_type: Comma separated list of entity types to include (e.g. "ALBUM,REVIEW")
+# - action_type: Comma separated list of action types to include (e.g. "CREATE,DELETE")
 ###
 def getRecentUserActions(request: HttpRequest):
   # Make sure request is a GET request
@@ -487,11 +499,51 @@ def getRecentUserActions(request: HttpRequest):
     res = HttpResponse("Method not allowed")
     res.status_code = 405
     return res
-  # Retrieve last 30 user actions
-  user_actions = UserAction.objects.all().order_by('-id')[:30]
-  # Iterate User Action objects and convert to JSON
+  # Parse paging and filter params
+  try:
+    limit = min(max(int(request.GET.get('limit', USER_ACTION_PAGE_SIZE)), 1), USER_ACTION_MAX_PAGE_SIZE)
+    before = int(request.GET['before']) if request.GET.get('before') else None
+  except ValueError:
+    logger.warning("getRecentUserActions called with a non-integer limit or cursor.", extra={'crid': request.crid})
+    return HttpResponse("limit and before must be integers", status=400)
+  user_actions = UserAction.objects.select_related('user')
+  if(request.GET.get('entity_type')):
+    user_actions = user_actions.filter(entity_type__in=request.GET['entity_type'].split(','))
+  if(request.GET.get('action_type')):
+    user_actions = user_actions.filter(action_type__in=request.GET['action_type'].split(','))
+  # Keyset pagination: seek past the cursor on the id index instead of using OFFSET, so deep pages cost the same as the first
+  if(before is not None):
+    user_actions = user_actions.filter(id__lt=before)
+  # Fetch one extra row to know if there is another page
+  page = list(user_actions.order_by('-id')[:limit + 1])
+  has_more = len(page) > limit
+  page = page[:limit]
+  # Iterate User Action objects and convert to JSON, referenced albums are loaded in one query
+  albums = hydrateActionAlbums(page)
   outList = []
-  for action in user_actions:
-    outList.append(action.toJSON())
+  for action in page:
+    actionJSON = action.toJSON()
+    actionJSON['id'] = action.pk
+    if(action.entity_type in ALBUM_ENTITY_TYPES):
+      actionJSON['album'] = albums.get(action.entity_id)
+    outList.append(actionJSON)
   # Return response
-  return JsonResponse({'actions': outList})
\ No newline at end of file
+  return JsonResponse({'actions': outList, 'next_cursor': (page[-1].pk if (has_more and page) else None)})
+
+
+# Entity types whose entity_id is an Album pk
+ALBUM_ENTITY_TYPES = ("ALBUM", "ALBUM_OWNER", "ALBUM_COMMENT")
+USER_ACTION_PAGE_SIZE = 30
+USER_ACTION_MAX_PAGE_SIZE = 100
+
+
+def hydrateActionAlbums(actions: list) -> dict:
+  '''Return {album pk: short album dict} for every album referenced by the passed in actions, in a single query (deleted albums are omitted).'''
+  from aotd.models import Album  # Import inside to avoid circular import
+  album_ids = {action.entity_id for action in actions if action.entity_type in ALBUM_ENTITY_TYPES}
+  if(not album_ids):
+    return {}
+  return {
+    album['id']: {'mbid': album['mbid'], 'title': album['title'], 'artist': album['artist'], 'cover_url': album['cover_url']}
+    for album in Album.objects.filter(id__in=album_ids).values('id', 'mbid', 'title', 'artist', 'cover_url')
+  }
@@ -1,6 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server'
 import redis from '@/app/lib/caches'
 
+// Derivative sizes served by the backend (see DERIVATIVE_WIDTHS in backend/photos/derivatives.py)
+const IMAGE_SIZES = ['thumb', 'small', 'medium']
+
 export async function GET(
   request: NextRequest,
   { params } : { params: Promise<{ imageID: string }> }
@@ -11,7 +14,13 @@ export async function GET(
     return NextResponse.json({ error: 'Missing Image ID' }, { status: 400 })
   }
 
-  const cacheKey = `photoshop-${imageID}`
+  // Optional derivative size, the original is served when not provided
+  const size = request.nextUrl.searchParams.get('size')
+  if (size !== null && !IMAGE_SIZES.includes(size)) {
+    return NextResponse.json({ error: `Unknown size, expected one of: ${IMAGE_SIZES.join(', ')}` }, { status: 400 })
+  }
+
+  const cacheKey = size ? `photoshop-${imageID}-${size}` : `photoshop-${imageID}`
   const cached = await redis.getBuffer(cacheKey)
 
   if (cached) {
@@ -20,7 +29,7 @@ export async function GET(
     return new NextResponse(cached, {
       status: 200,
       headers: {
-        'Content-Type': 'image/jpeg',
+        'Content-Type': size ? 'image/webp' : 'image/jpeg',
         'Cache-Control': 'public, max-age=86400',
       },
     })
@@ -32,7 +41,7 @@ export async function GET(
     // If no imageID is provided, get a placemonkey image 
     imageUrl = `https://placehold.co/300x300/transparent/FOO?text=No+AOTD`
   } else {
-    imageUrl = `${process.env.NEXT_PUBLIC_BASE_BACKEND_URL}/photos/image/${imageID}`
+    imageUrl = `${process.env.NEXT_PUBLIC_BASE_BACKEND_URL}/photos/image/${imageID}${size ? `?size=${size}` : ''}`
   }
 
   try {
@@ -49,6 +58,18 @@ export async function GET(
     const arrayBuffer = await result.arrayBuffer()
     const buffer = Buffer.from(arrayBuffer)
 
+    // The backend serves the original (marked no-cache) while a derivative is still being generated,
+    // don't keep it under the derivative's cache key so the real derivative is picked up next time
+    if (size && (result.headers.get('Cache-Control') || '').includes('no-cache')) {
+      return new NextResponse(buffer, {
+        status: 200,
+        headers: {
+          'Content-Type': result.headers.get('Content-Type') || 'image/jpeg',
+          'Cache-Control': 'private, no-cache',
+        },
+      })
+    }
+
     // Cache for 30 days
     await redis.set(cacheKey, buffer, 'EX', 60 * 60 * 24 * 30)
 
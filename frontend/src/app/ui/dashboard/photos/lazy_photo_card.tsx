@@ -20,7 +20,7 @@
 //   preventing any visible gap or pop-in while scrolling.
 //
 // Expected Props:
-//  - imageSrc: String - Full path to the image API endpoint
+//  - imageSrc: String - Full path to the image API endpoint (without ?size=, PhotoModal picks the size)
 //  - imageID:  String - Database GUID for this image, passed through to PhotoModal
 
 import { useEffect, useRef, useState } from 'react'
@@ -22,7 +22,7 @@ import {Spinner} from "@heroui/spinner";
 import { convertToLocalTZString } from "@/app/lib/utils";
 
 // Expected props:
-//  - imageSrc: Source path of the picture
+//  - imageSrc: Source path of the picture (the original, sized variants are requested with ?size=)
 //  - imageID: Database GUID of image
 export default function PhotoModal(props) {
   const [imgData, setImgData] = useState({})
@@ -97,7 +97,7 @@ export default function PhotoModal(props) {
           className="object-cover"
           width={0}
           height={0}
-          src={props.imageSrc}
+          src={`${props.imageSrc}?size=small`}
           style={{ width: 'auto', height: 'auto' }}
         />
       </Card>
@@ -156,7 +156,7 @@ export default function PhotoModal(props) {
                     className="object-cover"
                     width={0}
                     height={0}
-                    src={props.imageSrc}
+                    src={`${props.imageSrc}?size=medium`}
                     style={{ width: 'auto', height: 'auto' }}
                   />
                 </ModalBody>